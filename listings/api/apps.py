@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from .search import restore_sqlite_triggers
+        from .stats import register_sqlite_functions
+
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
+        connection_created.connect(register_sqlite_functions)
@@ -0,0 +1,302 @@
+"""Benchmarks of the listing import and API over synthetic listings.
+
+Used by the ``benchmark_listings`` and ``benchmark_query_plans`` commands.
+Every ``run_*`` function returns JSON-serializable results, so runs on
+different versions or databases can be saved and compared (see
+``compare_results``). Times are wall-clock milliseconds unless a key says
+otherwise.
+"""
+
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import django
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import Client, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from .cache import bump_generation
+from .importing import ImportStats, import_records
+from .models import Listing
+from .renderers import FastJSONRenderer
+from .serializers import ListingRowSerializer, ListingSerializer
+from .summary import refresh_summaries
+from .synthetic import CSV_HEADER, generate_records
+from .views import ListingViewSet
+
+FIRST_ZILLOW_ID = 100_000_000
+
+# (label, query string) pairs matching what the frontend and API clients send.
+QUERY_SHAPES: List[Tuple[str, str]] = [
+    ("default ordering", ""),
+    ("order by price", "ordering=-price"),
+    ("state, order by price", "state=CA&ordering=price"),
+    ("home type, order by price", "home_type=Condominium&ordering=-price"),
+    ("bedrooms list", "bedrooms=3,4"),
+    ("home size range", "home_size_min=2000&home_size_max=2200"),
+    ("year built range, ordered", "year_built_min=2010&ordering=-year_built"),
+    ("bathrooms range", "bathrooms_min=5&bathrooms_max=6"),
+    ("order by zestimate", "ordering=-zestimate_amount"),
+    ("search", "search=magnolia"),
+    ("search, two terms", "search=sherman oaks"),
+    ("city substring", "city=oaks"),
+    ("near a point", "near=34.15,-118.45&radius_km=10"),
+    ("bounding box", "bbox=-118.6,34.1,-118.4,34.2"),
+]
+
+# List requests: the query shapes above plus page depth, page size and keyset
+# pagination variants.
+LIST_REQUESTS: List[Tuple[str, str]] = [
+    ("default ordering", ""),
+    ("order by price", "ordering=-price"),
+    ("state, order by price", "state=CA&ordering=price"),
+    ("price range, order by price", "price_min=500K&price_max=1M&ordering=-price"),
+    ("bedrooms list", "bedrooms=3,4"),
+    ("home size range", "home_size_min=2000&home_size_max=2200"),
+    ("year built range, ordered", "year_built_min=2010&ordering=-year_built"),
+    ("100-row page", "page_size=100&ordering=-price"),
+    ("page 50", "page=50&ordering=-price"),
+    ("keyset page", "cursor=&ordering=-price"),
+    ("sparse fields", "fields=id,address,price&page_size=100"),
+    ("near a point", "near=34.15,-118.45&radius_km=10"),
+    ("bounding box, order by price", "bbox=-118.6,34.1,-118.4,34.2&ordering=-price"),
+]
+
+SEARCH_REQUESTS: List[Tuple[str, str]] = [
+    ("search", "search=magnolia"),
+    ("search, two terms", "search=sherman oaks"),
+    ("search, short term", "search=oa"),
+    ("city substring", "city=oaks"),
+    ("address substring", "address=ventura"),
+    ("search, filtered", "search=valley&state=CA&ordering=-price"),
+]
+
+SUITES = ["import", "list", "search", "serialize"]
+
+
+def listing_queryset(query_string: str) -> QuerySet:
+    """Return the filtered queryset ListingViewSet builds for a query string."""
+    request = APIRequestFactory().get(f"/api/listings/?{query_string}")
+    view = ListingViewSet(action_map={"get": "list"}, format_kwarg=None)
+    view.request = view.initialize_request(request)
+    queryset: QuerySet = view.filter_queryset(view.get_queryset())
+    return queryset
+
+
+def seed_listings(rows: int) -> Optional[ImportStats]:
+    """Import synthetic listings until the table has at least ``rows``.
+
+    Returns the import's stats, or None when there were enough listings.
+    """
+    existing = Listing.objects.count()
+    if existing >= rows:
+        return None
+    records = generate_records(
+        rows - existing, seed=existing, first_zillow_id=FIRST_ZILLOW_ID + existing
+    )
+    return import_records(chain([CSV_HEADER], records))
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Percentiles of a list of timings, rounded to microseconds."""
+    ordered = sorted(timings)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p95, p99 = cuts[94], cuts[98]
+    else:
+        p95 = p99 = ordered[0]
+    return {
+        "runs": len(ordered),
+        "min": round(ordered[0], 3),
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(p95, 3),
+        "p99": round(p99, 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def time_ms(func: Callable[[], Any], repeat: int) -> List[float]:
+    """Wall time of ``repeat`` calls of ``func``, after one warm-up call."""
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Durations from a ``Server-Timing`` header, plus the query count."""
+    values: Dict[str, float] = {}
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if key == "dur":
+                values[f"{name}_ms"] = float(value)
+            elif key == "desc" and name == "db":
+                values["queries"] = int(value.strip('"').split()[0])
+    return values
+
+
+def environment() -> Dict[str, Any]:
+    """Where and on what the benchmarks ran."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    if connection.vendor == "sqlite":
+        version = sqlite3.sqlite_version
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT version()")
+            version = cursor.fetchone()[0]
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "database_version": version,
+        "listings": Listing.objects.count(),
+    }
+
+
+def run_import(rows: int, repeat: int) -> Dict[str, Any]:
+    """Import throughput for ``rows`` new listings, then for re-importing them
+    unchanged ``repeat`` times.
+
+    The listings are added on top of the table and deleted afterwards.
+    """
+    first_zillow_id = FIRST_ZILLOW_ID * 2
+
+    def records() -> Iterator[List[str]]:
+        generated = generate_records(rows, seed=rows, first_zillow_id=first_zillow_id)
+        return chain([CSV_HEADER], generated)
+
+    created = import_records(records())
+    timings = []
+    unchanged = 0
+    try:
+        for _ in range(repeat):
+            stats = import_records(records())
+            timings.append(stats.elapsed * 1000)
+            unchanged = stats.unchanged
+    finally:
+        Listing.objects.filter(
+            zillow_id__gte=str(first_zillow_id),
+            zillow_id__lt=str(first_zillow_id + rows),
+        ).delete()
+        refresh_summaries(created.zipcodes)
+        bump_generation()
+    return {
+        "rows": rows,
+        "created": created.created,
+        "create_rows_per_second": round(created.rows_per_second),
+        "unchanged": unchanged,
+        "unchanged_rows_per_second": round(rows * 1000 / statistics.median(timings)),
+        "unchanged_ms": summarize(timings),
+    }
+
+
+def run_requests(requests: List[Tuple[str, str]], repeat: int) -> List[Dict[str, Any]]:
+    """Latency of API list requests, with the response cache bypassed.
+
+    The import generation is bumped before every request, so each one is a
+    cache miss. The ``Server-Timing`` breakdown is the median per phase.
+
+    Raises:
+        ValueError: If a request does not succeed, e.g. a page past the end of
+            a small table.
+    """
+    client = Client()
+    results = []
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        for label, query_string in requests:
+            timings: List[float] = []
+            phases: Dict[str, List[float]] = {}
+            for run in range(repeat + 1):
+                bump_generation()
+                started = time.perf_counter()
+                response = client.get(f"/api/listings/?{query_string}")
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    raise ValueError(
+                        f"{label}: ?{query_string} returned {response.status_code}"
+                    )
+                if run == 0:  # warm-up
+                    continue
+                timings.append(elapsed)
+                timing = parse_server_timing(response.get("Server-Timing", ""))
+                for name, value in timing.items():
+                    phases.setdefault(name, []).append(value)
+            result: Dict[str, Any] = {"label": label, "query": query_string}
+            result.update(summarize(timings))
+            for name, values in phases.items():
+                result[name] = round(statistics.median(values), 3)
+            results.append(result)
+    return results
+
+
+def run_serialize(rows: int, repeat: int) -> List[Dict[str, Any]]:
+    """Per-row serialize and render cost on ``rows``-row pages."""
+    queryset = Listing.objects.order_by("-price")[:rows]
+    columns = ListingRowSerializer.columns
+    instances = list(queryset.all())
+    values = list(queryset.values_list(*columns, named=True))
+    page = ListingRowSerializer(values, many=True).data
+    data = OrderedDict([("count", len(page)), ("results", page)])
+    cases = [
+        ("ListingSerializer", lambda: ListingSerializer(instances, many=True).data),
+        ("ListingRowSerializer", lambda: ListingRowSerializer(values, many=True).data),
+        (
+            "ListingRowSerializer, fetch included",
+            lambda: ListingRowSerializer(
+                list(queryset.values_list(*columns, named=True)), many=True
+            ).data,
+        ),
+        ("JSONRenderer", lambda: JSONRenderer().render(data)),
+        ("FastJSONRenderer", lambda: FastJSONRenderer().render(data)),
+    ]
+    results = []
+    for label, func in cases:
+        timings = time_ms(func, repeat)
+        result: Dict[str, Any] = {"label": label, "rows": len(page)}
+        result.update(summarize(timings))
+        result["us_per_row"] = round(
+            statistics.median(timings) * 1000 / max(len(page), 1), 3
+        )
+        results.append(result)
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> List[Tuple[str, str, float, float]]:
+    """Pair up the p50 times of cases present in both result sets.
+
+    Returns ``(suite, label, baseline p50, current p50)`` tuples.
+    """
+    pairs = []
+    for suite in ("list", "search", "serialize"):
+        before = {case["label"]: case for case in baseline.get(suite, [])}
+        for case in current.get(suite, []):
+            if case["label"] in before:
+                pairs.append(
+                    (suite, case["label"], before[case["label"]]["p50"], case["p50"])
+                )
+    return pairs
@@ -0,0 +1,190 @@
+"""In-process bitmap index of the categorical listing columns.
+
+``home_type``, ``state``, ``bedrooms`` and ``bathrooms`` have a few dozen
+distinct values between them, and the price facet has a handful of buckets.
+The index keeps one bitmap per value: a Python ``int`` whose bit ``n`` is set
+when the ``n``-th listing (by id) has that value. Filters on those columns
+become ORs of the bitmaps of the selected values, ANDed across columns, and
+counts are popcounts, so list counts and facets of such requests never scan
+the table.
+
+Each bitmap takes one bit per listing, so the whole index costs roughly
+100 bits per listing. The index is off unless ``LISTINGS_BITMAP_INDEX`` is
+set; like the listing snapshot (see ``api.snapshot``) it is built on first
+use or at startup and rebuilt when the import generation changes.
+"""
+
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .cache import GenerationLocal
+from .facets import FACET_FIELDS, PRICE_BUCKETS, PRICE_FACET, price_bucket_entry
+from .facets import to_python as facet_value
+from .models import Listing
+
+BITMAP_FIELDS = FACET_FIELDS
+BUILD_CHUNK_SIZE = 10_000
+
+# Lower bounds of the price buckets in cents, as stored.
+PRICE_BUCKET_CENTS = [bound * 100 for bound in PRICE_BUCKETS]
+
+try:
+    popcount: Callable[[int], int] = int.bit_count  # type: ignore[attr-defined]
+except AttributeError:  # Python < 3.10
+
+    def popcount(bitmap: int) -> int:
+        return bin(bitmap).count("1")
+
+
+Condition = Callable[[Any], bool]
+
+
+def _member_of(wanted: Set[float]) -> Condition:
+    return lambda key: float(key) in wanted
+
+
+def _within(low: Optional[Decimal], high: Optional[Decimal]) -> Condition:
+    return lambda key: (low is None or key >= low) and (high is None or key <= high)
+
+
+def _bitmap(positions: List[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+class BitmapIndex:
+    """Bitmaps of every value of ``BITMAP_FIELDS`` and of the price buckets."""
+
+    def __init__(self, size: int, bitmaps: Dict[str, Dict[Any, int]]):
+        self.size = size
+        self.bitmaps = bitmaps
+        self.all = (1 << size) - 1
+
+    @classmethod
+    def build(cls, generation: int, using: str = "default") -> "BitmapIndex":
+        fields = BITMAP_FIELDS + [PRICE_FACET]
+        positions: Dict[str, Dict[Any, List[int]]] = {field: {} for field in fields}
+        rows = (
+            Listing.objects.using(using)
+            .order_by("id")
+            .values_list(*fields)
+            .iterator(chunk_size=BUILD_CHUNK_SIZE)
+        )
+        size = 0
+        for size, row in enumerate(rows, 1):
+            for field, value in zip(fields, row):
+                if value is None:
+                    continue
+                if field == PRICE_FACET:
+                    key = max(bisect_right(PRICE_BUCKET_CENTS, value) - 1, 0)
+                else:
+                    key = facet_value(field, value)
+                positions[field].setdefault(key, []).append(size - 1)
+        bitmaps = {
+            field: {key: _bitmap(found, size) for key, found in values.items()}
+            for field, values in positions.items()
+        }
+        return cls(size, bitmaps)
+
+    def select(self, conditions: Dict[str, List[Condition]]) -> int:
+        """Rows whose value of each field meets all of its conditions.
+
+        Null values meet no condition.
+        """
+        selected = self.all
+        for field, checks in conditions.items():
+            matching = 0
+            for key, bitmap in self.bitmaps[field].items():
+                if all(check(key) for check in checks):
+                    matching |= bitmap
+            selected &= matching
+        return selected
+
+    def count(self, selected: int) -> int:
+        return popcount(selected)
+
+    def facets(self, selected: int, facets: Sequence[str]) -> Dict[str, List[dict]]:
+        """Counts per value of ``facets`` among the ``selected`` rows, in the
+        format of ``api.facets.facet_counts``."""
+        results: Dict[str, List[dict]] = {}
+        for facet in facets:
+            counts = {
+                key: popcount(selected & bitmap)
+                for key, bitmap in self.bitmaps[facet].items()
+            }
+            if facet == PRICE_FACET:
+                results[facet] = [
+                    price_bucket_entry(position, counts.get(position, 0))
+                    for position in range(len(PRICE_BUCKETS))
+                ]
+            else:
+                results[facet] = [
+                    {"value": key, "count": count}
+                    for key, count in sorted(counts.items())
+                    if count
+                ]
+        return results
+
+
+def filter_conditions(filterset: Any) -> Optional[Dict[str, List[Condition]]]:
+    """``BitmapIndex.select`` conditions for a valid ``ListingFilter``.
+
+    Only ``BITMAP_FIELDS`` filters and their ranges are read; the caller
+    checks that nothing else filters the request. Returns None when no row
+    can match.
+    """
+    data = filterset.form.cleaned_data
+    bounds = filterset.get_range_bounds()
+    if bounds is None:
+        return None
+    conditions: Dict[str, List[Condition]] = {}
+    home_type = data.get("home_type")
+    if home_type:
+        conditions["home_type"] = [lambda key: key == home_type]
+    state = (data.get("state") or "").lower()
+    if state:
+        conditions["state"] = [lambda key: key.lower() == state]
+    for field, cast in (("bedrooms", int), ("bathrooms", float)):
+        value = data.get(field)
+        if not value:
+            continue
+        try:
+            wanted = {cast(v.strip()) for v in value.split(",") if v.strip()}
+        except ValueError:
+            return None
+        conditions[field] = [_member_of(wanted)]
+    for field, (low, high) in bounds.items():
+        conditions.setdefault(field, []).append(
+            _within(
+                None if low is None else Decimal(low),
+                None if high is None else Decimal(high),
+            )
+        )
+    return conditions
+
+
+bitmap_index = GenerationLocal(BitmapIndex.build)
+
+
+def get_bitmap_index() -> Optional[BitmapIndex]:
+    """The index of the current import generation, built if needed.
+
+    None while another thread builds it.
+    """
+    return bitmap_index.get()
+
+
+def warm_bitmap_index() -> None:
+    """Build the index at startup when ``LISTINGS_BITMAP_INDEX`` is set."""
+    if not settings.LISTINGS_BITMAP_INDEX:
+        return
+    try:
+        get_bitmap_index()
+    except DatabaseError:  # e.g. not migrated yet; built on first use instead
+        pass
@@ -0,0 +1,158 @@
+"""Cache helpers shared by the listings API.
+
+Listing data only changes when it is imported or saved, so cached values are
+keyed by an import *generation*: a counter bumped after every change. Bumping
+it invalidates every cached value at once without having to find and delete
+keys.
+
+The generation is kept in the database (``ImportGeneration``), so an import
+run by the management command invalidates the caches of every web worker
+and reading it costs one primary key lookup. Within a request, wrap the work
+in ``pinned_generation`` to read it once.
+
+Cached values live in ``LISTINGS_CACHE_ALIAS``. With the default
+local-memory backend each process caches its own values, which is correct
+but multiplies cache misses by the number of processes; use a shared backend
+(Redis, Memcached, database) to share them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Generic, Iterator, Optional, Tuple, TypeVar, cast
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+T = TypeVar("T")
+
+# Primary key of the single ``ImportGeneration`` row.
+GENERATION_ROW = 1
+
+Generation = Tuple[int, datetime]
+
+_pinned: ContextVar[Optional[Generation]] = ContextVar(
+    "pinned_generation", default=None
+)
+
+
+def listings_cache() -> BaseCache:
+    return cast(BaseCache, caches[settings.LISTINGS_CACHE_ALIAS])
+
+
+def _clock_generation() -> int:
+    # Generations follow the clock, so one rolled back with its transaction,
+    # or lost with a recreated table while a shared cache stays populated, is
+    # never reused for different data.
+    return time.time_ns() // 1000
+
+
+def _read_generation() -> Generation:
+    from .models import ImportGeneration
+
+    row = (
+        ImportGeneration.objects.filter(pk=GENERATION_ROW)
+        .values_list("generation", "started_at")
+        .first()
+    )
+    if row is not None:
+        return cast(Generation, row)
+    try:
+        with transaction.atomic():
+            created = ImportGeneration.objects.create(
+                pk=GENERATION_ROW,
+                generation=_clock_generation(),
+                started_at=timezone.now(),
+            )
+    except IntegrityError:  # created concurrently
+        return _read_generation()
+    return created.generation, created.started_at
+
+
+def _current_generation() -> Generation:
+    pinned = _pinned.get()
+    return pinned if pinned is not None else _read_generation()
+
+
+def get_generation() -> int:
+    """Return the current import generation."""
+    return _current_generation()[0]
+
+
+def get_generation_time(generation: int) -> float:
+    """When ``generation`` started, as a POSIX timestamp.
+
+    A generation that is no longer current counts from now.
+    """
+    current, started_at = _current_generation()
+    if current != generation:
+        return time.time()
+    return started_at.timestamp()
+
+
+def bump_generation() -> int:
+    """Start a new import generation, invalidating every cached value."""
+    from .models import ImportGeneration
+
+    ImportGeneration.objects.filter(pk=GENERATION_ROW).update(
+        generation=Greatest(F("generation") + 1, Value(_clock_generation())),
+        started_at=timezone.now(),
+    )
+    # Creates the row when missing.
+    return _read_generation()[0]
+
+
+@contextmanager
+def pinned_generation() -> Iterator[int]:
+    """Read the generation once and use it for the rest of the block.
+
+    Everything a request caches is then keyed by the same generation, even
+    if an import finishes while the request runs.
+    """
+    if _pinned.get() is not None:
+        yield get_generation()
+        return
+    token = _pinned.set(_read_generation())
+    try:
+        yield get_generation()
+    finally:
+        _pinned.reset(token)
+
+
+class GenerationLocal(Generic[T]):
+    """A value built from the listings and kept in process memory until the
+    import generation changes.
+
+    ``build`` is called with the generation. While one thread builds the
+    value, ``get`` returns None to the others, so they can answer from the
+    database instead of waiting.
+    """
+
+    def __init__(self, build: Callable[[int], T]):
+        self.build = build
+        self.current: Optional[Tuple[int, T]] = None
+        self.lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        generation = get_generation()
+        current = self.current
+        if current is not None and current[0] == generation:
+            return current[1]
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            current = self.current
+            if current is None or current[0] != generation:
+                current = self.current = (generation, self.build(generation))
+            return current[1]
+        finally:
+            self.lock.release()
+
+    def clear(self) -> None:
+        self.current = None
@@ -0,0 +1,102 @@
+"""Count strategies for paginated listing responses.
+
+An exact ``COUNT(*)`` over a large, broadly filtered table is often the
+slowest query of a list request. ``count_listings`` avoids it where it can:
+
+- Exact counts are cached per filter set for ``LISTING_COUNT_CACHE_TIMEOUT``
+  seconds and per import generation, so an import invalidates them.
+- Otherwise, on PostgreSQL, the planner's row estimate is used when it is at least
+  ``LISTING_COUNT_ESTIMATE_THRESHOLD``: ``pg_class.reltuples`` for an
+  unfiltered queryset, ``EXPLAIN`` otherwise. Small results are counted
+  exactly, since their counts are cheap and an estimate would be visibly off.
+
+Filter sets are normalized by their compiled SQL, so query strings that
+produce the same WHERE clause share a cached count.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+
+from .cache import get_generation, listings_cache
+
+COUNT_KEY_PREFIX = "listings:count"
+
+
+def count_cache_key(queryset: QuerySet) -> str:
+    """Cache key for the count of ``queryset``, ignoring its ordering."""
+    # Normalize the projection too: counts do not depend on it.
+    queryset = queryset.order_by().values("pk")
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    digest = hashlib.sha1(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    return f"{COUNT_KEY_PREFIX}:{get_generation()}:{digest}"
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """Return the PostgreSQL planner's row estimate, or None if unavailable."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 (or 0 before PostgreSQL 14) until the table is
+            # first vacuumed or analyzed.
+            return int(row[0]) if row and row[0] > 0 else None
+        query = queryset.values("pk").query
+        sql, params = query.get_compiler(using=queryset.db).as_sql()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan: Any = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_listings(queryset: QuerySet) -> Tuple[int, bool]:
+    """Count ``queryset`` using the cheapest adequate strategy.
+
+    Returns:
+        The count, and whether it is a planner estimate rather than exact.
+    """
+    if queryset.query.is_empty():
+        # ``none()``, e.g. an impossible filter range: no query needed.
+        return 0, False
+    cache = listings_cache()
+    try:
+        key = count_cache_key(queryset)
+    except EmptyResultSet:
+        # e.g. ``bedrooms__in=[]``, which Django does not mark as empty.
+        return 0, False
+    count = cache.get(key)
+    if count is not None:
+        return count, False
+
+    estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= settings.LISTING_COUNT_ESTIMATE_THRESHOLD:
+        return estimate, True
+
+    count = queryset.count()
+    cache.set(key, count, settings.LISTING_COUNT_CACHE_TIMEOUT)
+    return count, False
+
+
+def remember_count(queryset: QuerySet, count: int) -> None:
+    """Store an exact count of ``queryset`` obtained without counting it,
+    for ``count_listings`` to return."""
+    if queryset.query.is_empty():
+        return
+    try:
+        key = count_cache_key(queryset)
+    except EmptyResultSet:
+        return
+    listings_cache().set(key, count, settings.LISTING_COUNT_CACHE_TIMEOUT)
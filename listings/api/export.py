@@ -0,0 +1,68 @@
+"""Streaming bulk export of listings as NDJSON or CSV.
+
+Rows are read with ``QuerySet.iterator``, which uses a server-side cursor on
+PostgreSQL and fetches in chunks elsewhere, and are serialized and yielded one
+chunk at a time, so memory use does not grow with the size of the export.
+"""
+
+import csv
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+from django.db.models import QuerySet
+
+from .importing.pipeline import iter_batches
+from .renderers import dumps
+from .serializers import ListingRowSerializer
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def ndjson_chunks(fields: Sequence[str], rows: Iterable[List[dict]]) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for chunk in rows:
+        yield b"".join([dumps(row) + b"\n" for row in chunk])
+
+
+def csv_chunks(fields: Sequence[str], rows: Iterable[List[dict]]) -> Iterator[bytes]:
+    """A header line with the field names, then one line per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in rows:
+        writer.writerows(row.values() for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+# output name -> (content type, file extension, writer)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "ndjson": ("application/x-ndjson", "ndjson", ndjson_chunks),
+    "csv": ("text/csv; charset=utf-8", "csv", csv_chunks),
+}
+
+
+def export_listings(
+    queryset: QuerySet,
+    fields: Sequence[str],
+    output: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield ``queryset`` encoded as ``output``, one chunk of rows at a time.
+
+    Raises:
+        KeyError: If ``output`` is not one of ``EXPORT_FORMATS``.
+    """
+    write: Callable[..., Iterator[bytes]] = EXPORT_FORMATS[output][2]
+    serializer = ListingRowSerializer(fields=fields)
+    rows = queryset.values_list(*serializer.columns).iterator(chunk_size=chunk_size)
+    return write(
+        serializer.fields,
+        (
+            serializer.to_representations(batch)
+            for batch in iter_batches(rows, chunk_size)
+        ),
+    )
@@ -0,0 +1,130 @@
+"""Facet counts for the listing filters.
+
+``facet_counts`` returns, for each requested facet, the number of listings
+per value under the current filters. All facets come from one statement: a
+``UNION ALL`` of one ``GROUP BY`` per facet, so the client gets every count in
+a single round trip instead of one ``COUNT`` per option.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from django.db.models import (
+    Aggregate,
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    Field,
+    IntegerField,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+
+from .models import Listing
+
+FACET_FIELDS = ["home_type", "bedrooms", "bathrooms", "state"]
+PRICE_FACET = "price"
+FACETS = FACET_FIELDS + [PRICE_FACET]
+
+# Lower bounds of the price buckets, in dollars like the price_min/price_max
+# parameters. The last bucket has no upper bound.
+PRICE_BUCKETS = [
+    0,
+    250_000,
+    500_000,
+    750_000,
+    1_000_000,
+    1_500_000,
+    2_000_000,
+    3_000_000,
+    5_000_000,
+]
+
+
+def price_bucket() -> Case:
+    """Index into ``PRICE_BUCKETS`` of the bucket holding ``price``."""
+    return Case(
+        *(
+            When(price__lt=upper * 100, then=Value(position))
+            for position, upper in enumerate(PRICE_BUCKETS[1:])
+        ),
+        default=Value(len(PRICE_BUCKETS) - 1),
+        output_field=IntegerField(),
+    )
+
+
+def facet_query(queryset: QuerySet, facet: str, count: Aggregate) -> QuerySet:
+    """``(facet, value, count)`` rows for one facet; values cast to text."""
+    if facet == PRICE_FACET:
+        queryset = queryset.filter(price__isnull=False)
+        value = Cast(price_bucket(), CharField())
+    else:
+        queryset = queryset.exclude(**{f"{facet}__isnull": True})
+        value = Cast(facet, CharField())
+    return (
+        queryset.order_by()
+        .annotate(facet=Value(facet, output_field=CharField()), value=value)
+        .values("facet", "value")
+        .annotate(count=count)
+    )
+
+
+def to_python(facet: str, value: str) -> Any:
+    """Convert a facet value cast to text back to the field's type."""
+    field = cast(Field, Listing._meta.get_field(facet))
+    converted = field.to_python(value)
+    if isinstance(field, DecimalField):
+        # Databases render 2, 2.0 and 2.00 differently.
+        converted = converted.quantize(Decimal(1).scaleb(-field.decimal_places))
+    return converted
+
+
+def price_bucket_entry(position: int, count: int) -> Dict[str, Any]:
+    upper = PRICE_BUCKETS[position + 1] if position + 1 < len(PRICE_BUCKETS) else None
+    return {"min": PRICE_BUCKETS[position], "max": upper, "count": count}
+
+
+def facet_counts(
+    queryset: QuerySet, facets: Sequence[str], count: Optional[Aggregate] = None
+) -> Dict[str, List[dict]]:
+    """Counts per value of each of ``facets`` in ``queryset``.
+
+    ``count`` is the aggregate counted per value, ``Count("pk")`` by default;
+    summary rows are counted with ``Sum("count")``.
+
+    Field facets are lists of ``{"value": ..., "count": ...}`` sorted by value;
+    the price facet lists every bucket as ``{"min": ..., "max": ..., "count":
+    ...}`` in dollars, including empty ones. Null values are not counted.
+    """
+    if not facets:
+        return {}
+    if count is None:
+        count = Count("pk")
+    queries = [facet_query(queryset, facet, count) for facet in facets]
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+
+    counts: Dict[str, Dict[Any, int]] = {facet: {} for facet in facets}
+    for row in rows:
+        facet = row["facet"]
+        if facet == PRICE_FACET:
+            value: Any = int(row["value"])
+        else:
+            value = to_python(facet, row["value"])
+        counts[facet][value] = counts[facet].get(value, 0) + row["count"]
+
+    results: Dict[str, List[dict]] = {}
+    for facet in facets:
+        if facet == PRICE_FACET:
+            results[facet] = [
+                price_bucket_entry(position, counts[facet].get(position, 0))
+                for position in range(len(PRICE_BUCKETS))
+            ]
+        else:
+            results[facet] = [
+                {"value": value, "count": count}
+                for value, count in sorted(counts[facet].items())
+            ]
+    return results
@@ -0,0 +1,369 @@
+"""Listing coordinates and the ``near``/``bbox`` location filters.
+
+Listings have no coordinates in the feed, so ``latitude`` and ``longitude``
+are the centroid of their zipcode, looked up in ``data/zipcode_centroids.csv``
+or the file named by ``LISTINGS_ZIPCODE_CENTROIDS``. The table holds 5-digit
+zipcodes and, as a coarser fallback, 3-digit zipcode prefixes; listings whose
+zipcode matches neither have no coordinates and are never matched by the
+location filters. The bundled table only covers the sample data; the
+``load_zipcode_centroids`` command builds a complete one from the Census ZCTA
+Gazetteer file.
+
+Location queries are answered from an index on each database:
+
+- SQLite: ``geo_cell`` numbers a grid of ``CELL_DEGREES`` cells row by row,
+  so the cells of a bounding box form one contiguous range per grid row. A
+  box becomes a few ``geo_cell BETWEEN`` conditions on the B-tree index,
+  followed by exact latitude/longitude bounds.
+- PostgreSQL: a GiST index on ``point(longitude, latitude)``, queried with
+  the ``<@ box`` containment operator.
+
+Radius queries search the bounding box of the circle and keep the rows whose
+great-circle distance is within the radius.
+"""
+
+import csv
+import math
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from django import forms
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from django.utils import timezone
+from django_filters import filters
+
+CENTROIDS_PATH = Path(__file__).resolve().parent / "data" / "zipcode_centroids.csv"
+
+# Columns of the Census ZCTA Gazetteer file read by ``read_gazetteer``.
+GAZETTEER_COLUMNS = ("GEOID", "INTPTLAT", "INTPTLONG")
+
+# Fields derived from the zipcode by ``locate``.
+GEO_FIELDS = ["latitude", "longitude", "geo_cell"]
+
+# Grid cell size; 0.05 degrees of latitude is about 5.6 km.
+CELL_DEGREES = 0.05
+GRID_COLUMNS = round(360 / CELL_DEGREES)
+
+# Boxes spanning more grid rows than this skip the cell condition; they
+# select too much of the table for the index to help.
+MAX_CELL_ROWS = 64
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 500.0
+
+POSTGRES_INDEX = "listing_location_gist_idx"
+POSTGRES_CREATE_SQL = (
+    f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} "
+    f"ON api_listing USING gist (point(longitude, latitude))"
+)
+POSTGRES_DROP_SQL = f"DROP INDEX IF EXISTS {POSTGRES_INDEX}"
+
+# (min_lat, min_lng, max_lat, max_lng)
+Box = Tuple[float, float, float, float]
+Location = Tuple[Optional[float], Optional[float], Optional[int]]
+Centroids = Dict[str, Tuple[float, float]]
+
+
+def centroids_path() -> Path:
+    return Path(settings.LISTINGS_ZIPCODE_CENTROIDS or CENTROIDS_PATH)
+
+
+@lru_cache(maxsize=None)
+def load_centroids() -> Centroids:
+    """``{zipcode or 3-digit prefix: (latitude, longitude)}``."""
+    with open(centroids_path(), encoding="utf-8", newline="") as stream:
+        return {
+            row["zipcode"]: (float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(stream)
+        }
+
+
+def reload_centroids() -> None:
+    """Forget the loaded centroid table, e.g. after it was rewritten."""
+    load_centroids.cache_clear()
+    locate.cache_clear()
+
+
+def read_gazetteer(stream: TextIO) -> Centroids:
+    """Zipcode centroids from a Census ZCTA Gazetteer file.
+
+    The file is tab-separated with a header row; ``GAZETTEER_COLUMNS`` hold
+    the ZCTA code and its internal point.
+
+    Raises:
+        ValueError: If a column is missing or a coordinate is malformed.
+    """
+    reader = csv.reader(stream, delimiter="\t")
+    header = [name.strip() for name in next(reader, [])]
+    missing = [name for name in GAZETTEER_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Not a ZCTA Gazetteer file: no {', '.join(missing)} column")
+    code, latitude, longitude = (header.index(name) for name in GAZETTEER_COLUMNS)
+    return {
+        row[code].strip(): (float(row[latitude]), float(row[longitude]))
+        for row in reader
+        if row
+    }
+
+
+def add_prefix_centroids(centroids: Centroids) -> Centroids:
+    """``centroids`` plus, per 3-digit prefix, the mean of its zipcodes."""
+    points: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    for zipcode, point in centroids.items():
+        if len(zipcode) == 5:
+            points[zipcode[:3]].append(point)
+    prefixes = {
+        prefix: (
+            round(sum(lat for lat, _ in found) / len(found), 6),
+            round(sum(lng for _, lng in found) / len(found), 6),
+        )
+        for prefix, found in points.items()
+    }
+    return {**prefixes, **centroids}
+
+
+def write_centroids(path: Path, centroids: Centroids) -> None:
+    """Write a centroid table in the format ``load_centroids`` reads."""
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(["zipcode", "latitude", "longitude"])
+        for zipcode in sorted(centroids):
+            writer.writerow([zipcode, *centroids[zipcode]])
+
+
+def geo_cell(latitude: float, longitude: float) -> int:
+    """The grid cell containing a point."""
+    row = min(int((latitude + 90) / CELL_DEGREES), round(180 / CELL_DEGREES) - 1)
+    column = min(int((longitude + 180) / CELL_DEGREES), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + column
+
+
+@lru_cache(maxsize=65536)
+def locate(zipcode: Optional[str]) -> Location:
+    """``(latitude, longitude, geo_cell)`` for a zipcode, or Nones if unknown.
+
+    ZIP+4 codes are looked up by their first five digits.
+    """
+    code = (zipcode or "").strip()[:5]
+    centroids = load_centroids()
+    point = centroids.get(code) or (centroids.get(code[:3]) if len(code) == 5 else None)
+    if point is None:
+        return None, None, None
+    return point[0], point[1], geo_cell(*point)
+
+
+def update_locations(listing_model: Any, zipcodes: Optional[Any] = None) -> int:
+    """Set the coordinates of ``listing_model`` rows from their zipcode.
+
+    Only rows in ``zipcodes`` (all rows when None) whose stored location
+    differs are written, and their ``updated_at`` moves with it. Returns the
+    number of rows updated.
+    """
+    if zipcodes is None:
+        zipcodes = listing_model.objects.values_list("zipcode", flat=True).distinct()
+    updated = 0
+    now = timezone.now()
+    for zipcode in list(zipcodes):
+        latitude, longitude, cell = locate(zipcode)
+        rows = listing_model.objects.filter(zipcode=zipcode)
+        if cell is None:
+            rows = rows.filter(geo_cell__isnull=False)
+        else:
+            rows = rows.exclude(latitude=latitude, longitude=longitude, geo_cell=cell)
+        updated += rows.update(
+            latitude=latitude, longitude=longitude, geo_cell=cell, updated_at=now
+        )
+    return updated
+
+
+def count_unlocated(listing_model: Any) -> int:
+    """Listings whose zipcode is not in the centroid table."""
+    count: int = listing_model.objects.filter(geo_cell__isnull=True).count()
+    return count
+
+
+def cell_ranges(box: Box) -> List[Tuple[int, int]]:
+    """The ``geo_cell`` ranges covering ``box``, one per grid row."""
+    min_lat, min_lng, max_lat, max_lng = box
+    first, last = geo_cell(min_lat, min_lng), geo_cell(max_lat, max_lng)
+    first_row, first_column = divmod(first, GRID_COLUMNS)
+    last_row, last_column = divmod(last, GRID_COLUMNS)
+    return [
+        (row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column)
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def radius_box(latitude: float, longitude: float, radius_km: float) -> Box:
+    """The bounding box of a circle, clamped to valid coordinates."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return min_lat, -180.0, max_lat, 180.0
+    lng_delta = math.degrees(
+        radius_km / EARTH_RADIUS_KM / math.cos(math.radians(widest))
+    )
+    return (
+        min_lat,
+        max(longitude - lng_delta, -180.0),
+        max_lat,
+        min(longitude + lng_delta, 180.0),
+    )
+
+
+def distance_km(latitude: float, longitude: float) -> Any:
+    """Haversine distance of each row from a point, in kilometres."""
+    lat, lng = Radians(F("latitude")), Radians(F("longitude"))
+    lat0 = Value(math.radians(latitude), output_field=FloatField())
+    lng0 = Value(math.radians(longitude), output_field=FloatField())
+    half_chord = Power(Sin((lat - lat0) / 2), 2) + Cos(lat) * Cos(lat0) * Power(
+        Sin((lng - lng0) / 2), 2
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(half_chord))
+
+
+def within_box(queryset: QuerySet, box: Box) -> QuerySet:
+    """Keep listings whose coordinates lie in ``box``, edges included."""
+    min_lat, min_lng, max_lat, max_lng = box
+    if connections[queryset.db].vendor == "postgresql":
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            RawSQL(
+                f'point("{table}"."longitude", "{table}"."latitude") '
+                f"<@ box(point(%s, %s), point(%s, %s))",
+                [min_lng, min_lat, max_lng, max_lat],
+                output_field=BooleanField(),
+            )
+        )
+    condition = Q(latitude__range=(min_lat, max_lat)) & Q(
+        longitude__range=(min_lng, max_lng)
+    )
+    ranges = cell_ranges(box)
+    if len(ranges) <= MAX_CELL_ROWS:
+        cells = Q()
+        for first, last in ranges:
+            cells |= Q(geo_cell__range=(first, last))
+        condition = cells & condition
+    return queryset.filter(condition)
+
+
+def within_radius(
+    queryset: QuerySet, latitude: float, longitude: float, radius_km: float
+) -> QuerySet:
+    """Keep listings within ``radius_km`` of a point."""
+    queryset = within_box(queryset, radius_box(latitude, longitude, radius_km))
+    return queryset.alias(distance_km=distance_km(latitude, longitude)).filter(
+        distance_km__lte=radius_km
+    )
+
+
+def _parse_floats(value: str, count: int, message: str) -> List[float]:
+    parts = [part.strip() for part in value.split(",")]
+    try:
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        raise forms.ValidationError(message)
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        raise forms.ValidationError(message)
+    return numbers
+
+
+def _check_point(latitude: float, longitude: float) -> None:
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise forms.ValidationError(
+            "Latitude must be within [-90, 90] and longitude within [-180, 180]."
+        )
+
+
+def _strip(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+class PointField(forms.Field):
+    """A ``lat,lng`` pair."""
+
+    def to_python(self, value: Any) -> Optional[Tuple[float, float]]:
+        value = _strip(value)
+        if not value:
+            return None
+        latitude, longitude = _parse_floats(value, 2, "Enter a point as lat,lng.")
+        _check_point(latitude, longitude)
+        return latitude, longitude
+
+
+class BoxField(forms.Field):
+    """A ``min_lng,min_lat,max_lng,max_lat`` box, in GeoJSON order."""
+
+    def to_python(self, value: Any) -> Optional[Box]:
+        value = _strip(value)
+        if not value:
+            return None
+        min_lng, min_lat, max_lng, max_lat = _parse_floats(
+            value, 4, "Enter a box as min_lng,min_lat,max_lng,max_lat."
+        )
+        _check_point(min_lat, min_lng)
+        _check_point(max_lat, max_lng)
+        if min_lat > max_lat or min_lng > max_lng:
+            raise forms.ValidationError("The minimum corner must come first.")
+        return min_lat, min_lng, max_lat, max_lng
+
+
+class RadiusFilter(filters.NumberFilter):
+    """``radius_km`` for ``NearFilter``; filters nothing by itself."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        kwargs.setdefault("min_value", 0)
+        kwargs.setdefault("max_value", MAX_RADIUS_KM)
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs: QuerySet, value: Any) -> QuerySet:
+        return qs
+
+
+class NearFilter(filters.Filter):
+    """Listings within the ``radius_km`` filter's value of a ``lat,lng`` point."""
+
+    field_class = PointField
+
+    def __init__(self, *args: Any, radius_param: str = "radius_km", **kwargs: Any):
+        self.radius_param = radius_param
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs: QuerySet, value: Any) -> QuerySet:
+        if value is None:
+            return qs
+        radius = self.parent.form.cleaned_data.get(self.radius_param)
+        radius_km = float(radius) if radius is not None else DEFAULT_RADIUS_KM
+        return within_radius(qs, value[0], value[1], radius_km)
+
+
+class BoundingBoxFilter(filters.Filter):
+    """Listings inside a ``min_lng,min_lat,max_lng,max_lat`` box."""
+
+    field_class = BoxField
+
+    def filter(self, qs: QuerySet, value: Any) -> QuerySet:
+        if value is None:
+            return qs
+        return within_box(qs, value)
+
+
+def create_location_index(connection: Any) -> None:
+    """Create the PostgreSQL GiST index; SQLite uses the ``geo_cell`` index."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_CREATE_SQL)
+
+
+def drop_location_index(connection: Any) -> None:
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_DROP_SQL)
@@ -0,0 +1,4 @@
+"""Building blocks for the ``import_listing_data`` management command."""
+
+from .pipeline import import_csv, import_records
+from .writers import ENGINES, IMPORT_FIELDS, ImportStats, OrmWriter, get_writer
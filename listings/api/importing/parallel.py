@@ -0,0 +1,307 @@
+"""Multi-process import: parse byte ranges in a pool, write shards in parallel.
+
+The input file is split into byte ranges that start and end on line
+boundaries. A pool of parser processes runs each range through the normal
+pipeline stages and routes every converted row to one of the writer
+processes by a stable hash of its zillow_id. Each writer owns a disjoint set
+of listings, so concurrent writers never touch the same row.
+
+Ranges are split on newlines, so fields with embedded line breaks are not
+supported in parallel mode; the listing feed has none. SQLite allows one
+writer at a time, so parallel imports are refused there.
+"""
+
+import csv
+import multiprocessing
+import os
+import queue as queue_module
+import time
+import zlib
+from contextlib import nullcontext
+from itertools import chain
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import django
+from django.apps import apps
+from django.db import connections, transaction
+
+from ..cache import bump_generation
+from ..summary import refresh_summaries
+from .pipeline import convert_rows, normalize_rows, validate_rows, write_batches
+from .writers import REPORTED_INVALID_ROWS, ZILLOW_ID, ImportStats, Row, get_writer
+
+# Chunks handed to the parser pool per worker; more chunks than workers keeps
+# the pool busy when some ranges parse faster than others.
+CHUNKS_PER_WORKER = 4
+
+# Batches buffered per writer before parsers block.
+QUEUE_SIZE = 8
+
+# Seconds between checks that the writer processes are still running.
+WORKER_POLL_SECONDS = 1.0
+
+# State shared with parser processes through the pool initializer.
+_parser_state: Dict[str, Any] = {}
+
+
+class ImportWorkerError(Exception):
+    """Raised when a parser or writer process fails."""
+
+
+def shard_for(zillow_id: str, shards: int) -> int:
+    """Return the writer index for ``zillow_id``; stable across processes."""
+    return zlib.crc32(zillow_id.encode()) % shards
+
+
+def split_ranges(path: str, parts: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Split ``path`` into at most ``parts`` byte ranges on line boundaries.
+
+    Returns:
+        The raw header line and a list of ``(start, end)`` offsets covering
+        every data line exactly once.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        header = file.readline()
+        data_start = file.tell()
+        step = max(1, -(-(size - data_start) // parts))
+        boundaries = [data_start]
+        for offset in range(data_start + step, size, step):
+            if offset <= boundaries[-1]:
+                continue
+            file.seek(offset - 1)
+            file.readline()
+            position = file.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(size)
+    ranges = [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start
+    ]
+    return header, ranges
+
+
+def _setup_django() -> None:
+    # Processes started with "spawn" begin with an unconfigured Django.
+    if not apps.ready:
+        django.setup()
+
+
+def _read_lines(path: str, start: int, end: int) -> Iterator[str]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                return
+            yield line.decode("utf-8")
+
+
+def _init_parser(
+    path: str, header: str, queues: Sequence[Any], batch_size: int
+) -> None:
+    _setup_django()
+    _parser_state.update(path=path, header=header, queues=queues, batch_size=batch_size)
+
+
+def _parse_range(byte_range: Tuple[int, int]) -> ImportStats:
+    """Parse one byte range and route its rows to the writer queues.
+
+    Returns the parse counters of the range.
+    """
+    queues = _parser_state["queues"]
+    batch_size = _parser_state["batch_size"]
+    stats = ImportStats()
+    lines = chain(
+        [_parser_state["header"]], _read_lines(_parser_state["path"], *byte_range)
+    )
+    buckets: List[List[Row]] = [[] for _ in queues]
+    rows = convert_rows(normalize_rows(csv.reader(lines), stats))
+    for row in validate_rows(rows, stats):
+        shard = shard_for(row[ZILLOW_ID], len(queues))
+        bucket = buckets[shard]
+        bucket.append(row)
+        if len(bucket) >= batch_size:
+            queues[shard].put(bucket)
+            buckets[shard] = []
+    for shard, bucket in enumerate(buckets):
+        if bucket:
+            queues[shard].put(bucket)
+    return stats
+
+
+def _write_shard(shard: int, queue: Any, results: Any, engine: str) -> None:
+    """Write every batch received on ``queue`` until the ``None`` sentinel."""
+    _setup_django()
+    stats = ImportStats()
+    error: Optional[str] = None
+    try:
+        writer = get_writer(engine, stats)
+        context: ContextManager[Any] = nullcontext()
+        if writer.atomic:
+            context = transaction.atomic()
+        with context:
+            write_batches(writer, iter(queue.get, None))
+    except Exception as e:  # reported to the parent, which re-raises
+        error = f"{type(e).__name__}: {e}"
+        # Keep draining so parsers blocked on a full queue can finish.
+        for _ in iter(queue.get, None):
+            pass
+    finally:
+        connections.close_all()
+    results.put(
+        (shard, stats.created, stats.updated, stats.unchanged, stats.zipcodes, error)
+    )
+
+
+def _writer_died(writers: Sequence[Any]) -> bool:
+    """Whether a writer process died, e.g. killed or out of memory.
+
+    Writers report their own errors and exit normally.
+    """
+    return any(process.exitcode not in (None, 0) for process in writers)
+
+
+def _collect_results(
+    results: Any, writers: Sequence[Any]
+) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """Wait for the result of every writer.
+
+    A writer that exits without reporting is counted as failed instead of
+    waited for.
+
+    Returns:
+        The ``(created, updated, unchanged, zipcodes, error)`` results received
+        and errors for the writers that did not report.
+    """
+    pending = dict(enumerate(writers))
+    reported: List[Tuple[Any, ...]] = []
+    errors: List[str] = []
+    exited: Set[int] = set()
+    while pending:
+        try:
+            shard, *result = results.get(timeout=WORKER_POLL_SECONDS)
+        except queue_module.Empty:
+            # A writer puts its result before exiting; give it one more poll
+            # to arrive after the writer is seen to have exited.
+            for shard in exited & set(pending):
+                process = pending.pop(shard)
+                errors.append(
+                    f"writer {shard}: exited with code {process.exitcode} "
+                    "without reporting"
+                )
+            exited = {
+                shard
+                for shard, process in pending.items()
+                if process.exitcode is not None
+            }
+            continue
+        pending.pop(shard, None)
+        reported.append(tuple(result))
+    return reported, errors
+
+
+def import_csv_parallel(
+    path: str, workers: int, batch_size: int, engine: str = "auto"
+) -> ImportStats:
+    """Import ``path`` with ``workers`` parser and ``workers`` writer processes.
+
+    Raises:
+        ValueError: If ``engine`` is unknown or unsupported by the database,
+            or the database is SQLite.
+        ImportWorkerError: If any worker process fails.
+    """
+    if connections["default"].vendor == "sqlite":
+        # Concurrent writers fail with "database is locked" once one of them
+        # holds the write lock longer than the busy timeout.
+        raise ValueError(
+            "Parallel imports need a database that allows concurrent writers; "
+            "SQLite allows one writer at a time. Import with one worker."
+        )
+    # Validate the engine in the parent before starting any process.
+    get_writer(engine, ImportStats())
+    stats = ImportStats()
+    started = time.perf_counter()
+
+    raw_header, ranges = split_ranges(path, workers * CHUNKS_PER_WORKER)
+    header = raw_header.decode("utf-8-sig")
+
+    # Child processes must open their own database connections.
+    connections.close_all()
+    queues = [multiprocessing.Queue(QUEUE_SIZE) for _ in range(workers)]
+    results: Any = multiprocessing.Queue()
+    writers = [
+        multiprocessing.Process(
+            target=_write_shard, args=(shard, queue, results, engine)
+        )
+        for shard, queue in enumerate(queues)
+    ]
+    for process in writers:
+        process.start()
+
+    errors: List[str] = []
+    try:
+        with multiprocessing.Pool(
+            workers,
+            initializer=_init_parser,
+            initargs=(path, header, queues, batch_size),
+        ) as pool:
+            parsed = pool.imap_unordered(_parse_range, ranges)
+            while True:
+                try:
+                    parser_stats = parsed.next(timeout=WORKER_POLL_SECONDS)
+                except StopIteration:
+                    break
+                except multiprocessing.TimeoutError:
+                    if _writer_died(writers):
+                        # Parsers block on the full queue of a dead writer;
+                        # the writer is reported with the results below.
+                        pool.terminate()
+                        break
+                    continue
+                stats.rows += parser_stats.rows
+                stats.skipped += parser_stats.skipped
+                stats.invalid += parser_stats.invalid
+                stats.invalid_reasons.extend(parser_stats.invalid_reasons)
+                del stats.invalid_reasons[REPORTED_INVALID_ROWS:]
+            # Let parsers exit normally so their queue feeder threads flush;
+            # leaving the block would terminate them mid-write.
+            pool.close()
+            pool.join()
+    except Exception as e:
+        errors.append(f"parser: {type(e).__name__}: {e}")
+    finally:
+        for queue, process in zip(queues, writers):
+            if process.is_alive():
+                queue.put(None)
+        reported, lost = _collect_results(results, writers)
+        errors.extend(lost)
+        for created, updated, unchanged, zipcodes, error in reported:
+            stats.created += created
+            stats.updated += updated
+            stats.unchanged += unchanged
+            stats.zipcodes.update(zipcodes)
+            if error:
+                errors.append(f"writer: {error}")
+        for process in writers:
+            process.join()
+        refresh_summaries(stats.zipcodes)
+        if stats.created or stats.updated:
+            bump_generation()
+
+    if errors:
+        raise ImportWorkerError("; ".join(errors))
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,300 @@
+"""Streaming CSV import pipeline.
+
+The import runs as a chain of generators, so only one batch of rows is held
+in memory at a time regardless of the size of the input::
+
+    read_rows -> normalize_rows -> convert_rows -> validate_rows
+              -> iter_batches -> writer
+
+Rows travel between stages as tuples laid out as ``ROW_FIELDS``.
+"""
+
+import csv
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+)
+
+from django.db import DatabaseError, connections, models, transaction
+from django.utils.dateparse import parse_date
+
+from ..cache import bump_generation
+from ..models import Listing
+from ..summary import refresh_summaries
+from ..utils import convert_price_to_cents
+from .writers import (
+    REPORTED_INVALID_ROWS,
+    ROW_FIELDS,
+    ZILLOW_ID,
+    ImportStats,
+    Row,
+    get_writer,
+)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class ImportWriteError(Exception):
+    """Raised when the database rejects a batch of rows."""
+
+
+def parse_date_safely(value: Optional[str]) -> Optional[date]:
+    """Parse a date string safely, returning None for invalid inputs."""
+    if not value:
+        return None
+    try:
+        return parse_date(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def safe_int(value: Optional[str]) -> Optional[int]:
+    """Convert a CSV value to int, returning None for empty or invalid input."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def safe_decimal(value: Optional[str]) -> Optional[float]:
+    """Convert a CSV value to float, returning None for empty or invalid input."""
+    try:
+        return float(value) if value else None
+    except (ValueError, TypeError):
+        return None
+
+
+def text(value: Optional[str]) -> Optional[str]:
+    """Text columns are already stripped by ``normalize_rows``."""
+    return value
+
+
+FIELD_CONVERTERS = {
+    "bathrooms": safe_decimal,
+    "bedrooms": safe_int,
+    "home_size": safe_int,
+    "last_sold_date": parse_date_safely,
+    "last_sold_price": convert_price_to_cents,
+    "price": convert_price_to_cents,
+    "property_size": safe_int,
+    "rent_price": convert_price_to_cents,
+    "rentzestimate_amount": convert_price_to_cents,
+    "rentzestimate_last_updated": parse_date_safely,
+    "tax_value": convert_price_to_cents,
+    "tax_year": safe_int,
+    "year_built": safe_int,
+    "zestimate_amount": convert_price_to_cents,
+    "zestimate_last_updated": parse_date_safely,
+}
+
+# One converter per position of a row tuple.
+CONVERTERS: List[Callable[[Optional[str]], Any]] = [
+    FIELD_CONVERTERS.get(field, text) for field in ROW_FIELDS
+]
+
+
+def read_rows(stream: TextIO) -> Iterator[List[str]]:
+    """Yield raw CSV records from ``stream``, header first."""
+    return csv.reader(stream)
+
+
+def normalize_rows(
+    records: Iterable[Sequence[str]], stats: ImportStats
+) -> Iterator[Row]:
+    """Map raw records onto ``ROW_FIELDS`` and strip their values.
+
+    The first record is the header; column names are matched after stripping
+    whitespace, so the column order of the file does not matter. Columns
+    missing from the file and empty values become None. Records without a
+    zillow_id are counted as skipped and dropped.
+    """
+    records = iter(records)
+    header = [name.strip() for name in next(records, [])]
+    positions = [
+        header.index(field) if field in header else None for field in ROW_FIELDS
+    ]
+    width = len(header)
+    for record in records:
+        if not record:
+            continue
+        stats.rows += 1
+        if len(record) < width:
+            record = list(record) + [""] * (width - len(record))
+        row = tuple(
+            (record[position].strip() or None) if position is not None else None
+            for position in positions
+        )
+        if row[ZILLOW_ID] is None:
+            stats.skipped += 1
+            continue
+        yield row
+
+
+def convert_rows(rows: Iterable[Row]) -> Iterator[Row]:
+    """Convert normalized text values into Python values for each field."""
+    converters = CONVERTERS
+    for row in rows:
+        yield tuple([convert(value) for convert, value in zip(converters, row)])
+
+
+@dataclass(frozen=True)
+class FieldLimit:
+    """What the database accepts for the field at ``position`` of a row."""
+
+    position: int
+    name: str
+    required: bool
+    max_length: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+    def check(self, value: Any) -> Optional[str]:
+        """Why ``value`` would be rejected; None when it is accepted."""
+        if value is None:
+            return f"{self.name} is missing" if self.required else None
+        if self.max_length is not None and len(value) > self.max_length:
+            return f"{self.name} is longer than {self.max_length} characters"
+        if (self.min_value is not None and value < self.min_value) or (
+            self.max_value is not None and value > self.max_value
+        ):
+            return f"{self.name} {value} is out of range"
+        return None
+
+
+def field_limits(using: str = "default") -> List[FieldLimit]:
+    """The limits of the ``ROW_FIELDS`` that can reject a converted value."""
+    ops = connections[using].ops
+    limits = []
+    for position, name in enumerate(ROW_FIELDS):
+        field = Listing._meta.get_field(name)
+        low: Optional[float] = None
+        high: Optional[float] = None
+        if isinstance(field, models.IntegerField):
+            low, high = ops.integer_field_range(field.get_internal_type())
+        elif isinstance(field, models.DecimalField):
+            high = 10.0 ** (field.max_digits - field.decimal_places)
+            high -= 10.0**-field.decimal_places
+            low = -high
+        limit = FieldLimit(
+            position,
+            name,
+            required=not getattr(field, "null", True),
+            max_length=getattr(field, "max_length", None),
+            min_value=low,
+            max_value=high,
+        )
+        if limit.required or limit.max_length or low is not None or high is not None:
+            limits.append(limit)
+    return limits
+
+
+def validate_rows(
+    rows: Iterable[Row], stats: ImportStats, using: str = "default"
+) -> Iterator[Row]:
+    """Drop rows with a value the database would reject, such as a missing
+    city or a state longer than two characters, and count them as invalid."""
+    limits = field_limits(using)
+    for row in rows:
+        for limit in limits:
+            reason = limit.check(row[limit.position])
+            if reason is not None:
+                break
+        else:
+            yield row
+            continue
+        stats.invalid += 1
+        if len(stats.invalid_reasons) < REPORTED_INVALID_ROWS:
+            stats.invalid_reasons.append(f"zillow_id {row[ZILLOW_ID]}: {reason}")
+
+
+def iter_batches(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most ``batch_size`` items from ``rows``."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_batches(writer: Any, batches: Iterable[List[Row]]) -> None:
+    """Write every batch, then finish the writer.
+
+    Raises:
+        ImportWriteError: If the database rejects a batch.
+    """
+    batch: List[Row] = []
+    try:
+        for batch in batches:
+            writer.write(batch)
+        batch = []
+        writer.finish()
+    except DatabaseError as e:
+        if batch:
+            where = (
+                f"the batch of zillow_id {batch[0][ZILLOW_ID]} "
+                f"to {batch[-1][ZILLOW_ID]}"
+            )
+        else:
+            where = "the last rows"
+        raise ImportWriteError(
+            f"The database rejected {where}: {type(e).__name__}: {e}"
+        ) from e
+
+
+def import_records(
+    records: Iterable[Sequence[str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    engine: str = "auto",
+) -> ImportStats:
+    """Run the pipeline over raw CSV records, header first.
+
+    Raises:
+        ValueError: If ``engine`` is unknown or unsupported by the database.
+        ImportWriteError: If the database rejects a batch.
+    """
+    stats = ImportStats()
+    started = time.perf_counter()
+    writer = get_writer(engine, stats)
+    rows = validate_rows(convert_rows(normalize_rows(records, stats)), stats)
+    context: ContextManager[Any] = nullcontext()
+    if writer.atomic:
+        context = transaction.atomic()
+    try:
+        with context:
+            write_batches(writer, iter_batches(rows, batch_size))
+    finally:
+        # Batches written before a failure are committed too.
+        refresh_summaries(stats.zipcodes)
+        if stats.created or stats.updated:
+            bump_generation()
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def import_csv(
+    stream: TextIO,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    engine: str = "auto",
+) -> ImportStats:
+    """Run the whole pipeline over a CSV text stream.
+
+    Raises:
+        ValueError: If ``engine`` is unknown or unsupported by the database.
+        ImportWriteError: If the database rejects a batch.
+    """
+    return import_records(read_rows(stream), batch_size, engine)
@@ -0,0 +1,141 @@
+"""PostgreSQL import engine: COPY into a staging table, then one merge.
+
+Rows are streamed with ``COPY ... FROM STDIN`` into a temporary staging
+table, one batch at a time, so memory stays bounded by the batch size. When
+the input is exhausted a single ``INSERT ... ON CONFLICT (zillow_id) DO
+UPDATE`` merges the staging table into ``api_listing``; the ``WHERE`` clause
+on ``data_hash`` leaves unchanged listings untouched.
+"""
+
+import csv
+import io
+from typing import Any, Sequence
+
+from django.db import connection
+from django.utils import timezone
+
+from ..geo import GEO_FIELDS, locate
+from ..models import DERIVED_FIELDS, Listing, derive, hash_field_values
+from .writers import ROW_FIELDS, ZIPCODE, ImportStats, Row
+
+STAGING_TABLE = "api_listing_import_staging"
+NULL = "\\N"
+
+# Staging columns in COPY order; row_number preserves input order so the
+# last occurrence of a duplicated zillow_id wins, as in the ORM writer.
+STAGING_COLUMNS = ROW_FIELDS + GEO_FIELDS + DERIVED_FIELDS + ["data_hash", "row_number"]
+
+
+def _csv_value(value: Any) -> Any:
+    return NULL if value is None else value
+
+
+class CopyWriter:
+    """Write batches of converted rows with COPY and merge them at the end.
+
+    Must be used inside a transaction: the staging table is dropped on commit.
+    """
+
+    atomic = True
+
+    def __init__(self, stats: ImportStats) -> None:
+        self.stats = stats
+        self.row_number = 0
+        qn = connection.ops.quote_name
+        self.listing_table = qn(Listing._meta.db_table)
+        self.staging_table = qn(STAGING_TABLE)
+        self.columns = ", ".join(qn(column) for column in STAGING_COLUMNS)
+        self.staging_created = False
+
+    def create_staging_table(self) -> None:
+        """Create the staging table on first use, inside the open transaction."""
+        if self.staging_created:
+            return
+        qn = connection.ops.quote_name
+        # CREATE TABLE AS copies the column types but none of the constraints.
+        select_list = ", ".join(qn(column) for column in STAGING_COLUMNS[:-1])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {self.staging_table} ON COMMIT DROP AS "
+                f"SELECT {select_list}, 0::bigint AS {qn('row_number')} "
+                f"FROM {self.listing_table} WITH NO DATA"
+            )
+        self.staging_created = True
+
+    def write(self, batch: Sequence[Row]) -> None:
+        """COPY one batch of converted rows into the staging table."""
+        self.create_staging_table()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            self.row_number += 1
+            writer.writerow(
+                [_csv_value(value) for value in row]
+                + [_csv_value(value) for value in locate(row[ZIPCODE])]
+                + [_csv_value(value) for value in derive(dict(zip(ROW_FIELDS, row)))]
+                + [hash_field_values(row), self.row_number]
+            )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {self.staging_table} ({self.columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{NULL}')",
+                buffer,
+            )
+
+    def finish(self) -> None:
+        """Merge the staging table into the listing table."""
+        if not self.staging_created:
+            return
+        qn = connection.ops.quote_name
+        data_columns = STAGING_COLUMNS[:-1]
+        insert_columns = data_columns + [
+            "created_at",
+            "updated_at",
+            "last_imported_at",
+        ]
+        select_list = ", ".join(qn(column) for column in data_columns)
+        assignments = ", ".join(
+            f"{qn(column)} = EXCLUDED.{qn(column)}"
+            for column in insert_columns
+            if column not in ("zillow_id", "created_at")
+        )
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(DISTINCT {qn('zillow_id')}) FROM {self.staging_table}"
+            )
+            distinct_rows = cursor.fetchone()[0]
+            # Zipcodes that changed listings are moving out of.
+            cursor.execute(
+                f"SELECT DISTINCT listing.{qn('zipcode')} "
+                f"FROM {self.listing_table} listing "
+                f"JOIN {self.staging_table} staging "
+                f"ON staging.{qn('zillow_id')} = listing.{qn('zillow_id')} "
+                f"WHERE staging.{qn('data_hash')} "
+                f"IS DISTINCT FROM listing.{qn('data_hash')}"
+            )
+            self.stats.zipcodes.update(zipcode for zipcode, in cursor.fetchall())
+            cursor.execute(
+                f"WITH merged AS ("
+                f"INSERT INTO {self.listing_table} "
+                f"({', '.join(qn(column) for column in insert_columns)}) "
+                f"SELECT DISTINCT ON ({qn('zillow_id')}) {select_list}, %s, %s, %s "
+                f"FROM {self.staging_table} "
+                f"ORDER BY {qn('zillow_id')}, {qn('row_number')} DESC "
+                f"ON CONFLICT ({qn('zillow_id')}) DO UPDATE SET {assignments} "
+                f"WHERE {self.listing_table}.{qn('data_hash')} "
+                f"IS DISTINCT FROM EXCLUDED.{qn('data_hash')} "
+                f"RETURNING (xmax = 0) AS created, {qn('zipcode')}"
+                f") SELECT "
+                f"COUNT(*) FILTER (WHERE created), "
+                f"COUNT(*) FILTER (WHERE NOT created), "
+                f"ARRAY_AGG(DISTINCT {qn('zipcode')}) "
+                f"FROM merged",
+                [now, now, now],
+            )
+            created, updated, zipcodes = cursor.fetchone()
+        self.stats.zipcodes.update(zipcodes or [])
+        self.stats.created += created
+        self.stats.updated += updated
+        self.stats.unchanged += distinct_rows - created - updated
@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from typing import Any, List, Sequence, Set, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..geo import GEO_FIELDS, locate
+from ..models import DERIVED_FIELDS, HASH_FIELDS, Listing, derive, hash_field_values
+
+# Model fields populated from the CSV, in the order they are written.
+IMPORT_FIELDS = [
+    "area_unit",
+    "bathrooms",
+    "bedrooms",
+    "home_size",
+    "home_type",
+    "last_sold_date",
+    "last_sold_price",
+    "link",
+    "price",
+    "property_size",
+    "rent_price",
+    "rentzestimate_amount",
+    "rentzestimate_last_updated",
+    "tax_value",
+    "tax_year",
+    "year_built",
+    "zestimate_amount",
+    "zestimate_last_updated",
+    "address",
+    "city",
+    "state",
+    "zipcode",
+]
+
+# Layout of the converted row tuples passed between pipeline stages. It
+# matches the hashing order so a row can be hashed without building a dict.
+ROW_FIELDS = list(HASH_FIELDS)
+ZILLOW_ID = ROW_FIELDS.index("zillow_id")
+ZIPCODE = ROW_FIELDS.index("zipcode")
+
+# A converted CSV row, laid out as ``ROW_FIELDS``.
+Row = Tuple[Any, ...]
+
+# Fields rewritten on existing listings by ``bulk_update``.
+UPDATE_FIELDS = (
+    IMPORT_FIELDS
+    + GEO_FIELDS
+    + DERIVED_FIELDS
+    + ["data_hash", "last_imported_at", "updated_at"]
+)
+
+ENGINES = ["auto", "orm", "copy"]
+
+REPORTED_INVALID_ROWS = 5
+
+
+@dataclass
+class ImportStats:
+    """Counters reported at the end of an import run."""
+
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    # Rows dropped because the database would reject one of their values,
+    # and why, for the first ``REPORTED_INVALID_ROWS`` of them.
+    invalid: int = 0
+    invalid_reasons: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    # Zipcodes of listings created, changed or moved, whose summary rows are
+    # refreshed after the import.
+    zipcodes: Set[str] = field(default_factory=set)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class OrmWriter:
+    """Write batches of converted rows through the Django ORM.
+
+    Works on every database backend. Each batch costs one query to load the
+    existing listings plus one ``bulk_create`` and one ``bulk_update``.
+    """
+
+    atomic = False
+
+    def __init__(self, stats: ImportStats) -> None:
+        self.stats = stats
+
+    def write(self, batch: Sequence[Row]) -> None:
+        """Insert or update one batch of converted rows.
+
+        The data hash of every row is computed before touching the database
+        and compared against the stored hashes, which are loaded for the whole
+        batch with a single query. Unchanged rows are not written at all; new
+        listings go through ``bulk_create`` and changed ones through
+        ``bulk_update``. If a zillow_id appears more than once in the batch,
+        the last row wins.
+        """
+        by_zillow_id = {row[ZILLOW_ID]: row for row in batch}
+        existing = {
+            zillow_id: (pk, data_hash, zipcode)
+            for zillow_id, pk, data_hash, zipcode in Listing.objects.filter(
+                zillow_id__in=list(by_zillow_id)
+            ).values_list("zillow_id", "id", "data_hash", "zipcode")
+        }
+        imported_at = timezone.now()
+
+        to_create: List[Listing] = []
+        to_update: List[Listing] = []
+        for zillow_id, row in by_zillow_id.items():
+            data_hash = hash_field_values(row)
+            current = existing.get(zillow_id)
+            if current is not None and current[1] == data_hash:
+                self.stats.unchanged += 1
+                continue
+            values = dict(zip(ROW_FIELDS, row))
+            listing = Listing(
+                **values,
+                **dict(zip(GEO_FIELDS, locate(row[ZIPCODE]))),
+                **dict(zip(DERIVED_FIELDS, derive(values))),
+                data_hash=data_hash,
+                last_imported_at=imported_at,
+            )
+            if current is not None:
+                listing.pk = current[0]
+                listing.updated_at = imported_at
+                to_update.append(listing)
+                self.stats.zipcodes.add(current[2])
+            else:
+                to_create.append(listing)
+            self.stats.zipcodes.add(row[ZIPCODE])
+
+        if to_create or to_update:
+            with transaction.atomic():
+                Listing.objects.bulk_create(to_create)
+                Listing.objects.bulk_update(to_update, UPDATE_FIELDS)
+
+        self.stats.created += len(to_create)
+        self.stats.updated += len(to_update)
+
+    def finish(self) -> None:
+        """Nothing is buffered; every batch is committed by ``write``."""
+
+
+def get_writer(engine: str, stats: ImportStats) -> Any:
+    """Return the writer for ``engine`` ("auto", "orm" or "copy").
+
+    "auto" picks the COPY engine on PostgreSQL and the ORM everywhere else.
+
+    Raises:
+        ValueError: If the COPY engine is requested on another backend.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown import engine: {engine}")
+    if engine == "auto":
+        engine = "copy" if connection.vendor == "postgresql" else "orm"
+    if engine == "copy":
+        if connection.vendor != "postgresql":
+            raise ValueError("The copy engine requires a PostgreSQL database")
+        from .postgres import CopyWriter
+
+        return CopyWriter(stats)
+    return OrmWriter(stats)
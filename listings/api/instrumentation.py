@@ -0,0 +1,203 @@
+"""Per-request query counts and timings for the listings API.
+
+``RequestMetricsMiddleware`` measures every request under
+``LISTINGS_METRICS_PATH_PREFIX``:
+
+- the number of database queries and the time spent in them, through
+  ``connection.execute_wrapper``;
+- the time spent serializing and rendering, through ``timed`` blocks in the
+  serializers and the JSON renderer.
+
+The measurements are returned in a ``Server-Timing`` header and logged as one
+logfmt line per request on the ``api.metrics.requests`` logger. Requests that
+take at least ``LISTINGS_SLOW_REQUEST_MS`` are also logged on
+``api.metrics.slow`` with their filter signature (see
+``api.query.filter_signature``) and, when ``LISTINGS_SLOW_REQUEST_EXPLAIN`` is
+set, the query plan of their slowest query.
+
+Streaming responses are measured up to the point their headers are returned;
+queries run while the body streams are not counted.
+"""
+
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .query import filter_signature
+
+request_logger = logging.getLogger("api.metrics.requests")
+slow_logger = logging.getLogger("api.metrics.slow")
+
+# Phases timed with ``timed``, in Server-Timing order.
+PHASES = ["serialize", "render"]
+
+
+@dataclass
+class RequestMetrics:
+    """Counters collected while one request is handled."""
+
+    queries: int = 0
+    db_time: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)
+    # The slowest query, for EXPLAIN.
+    slowest_time: float = 0.0
+    slowest_sql: Optional[str] = None
+    slowest_params: Optional[Sequence[Any]] = None
+    slowest_alias: Optional[str] = None
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "listings_request_metrics", default=None
+)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """The metrics of the request being handled, if it is instrumented."""
+    return _current.get()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to ``phase`` of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.phases[phase] = metrics.phases.get(phase, 0.0) + elapsed
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times the queries of a connection."""
+
+    def __init__(self, metrics: RequestMetrics, alias: str):
+        self.metrics = metrics
+        self.alias = alias
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: Any
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics = self.metrics
+            metrics.queries += 1
+            metrics.db_time += elapsed
+            if not many and elapsed > metrics.slowest_time:
+                metrics.slowest_time = elapsed
+                metrics.slowest_sql = sql
+                metrics.slowest_params = params
+                metrics.slowest_alias = self.alias
+
+
+def logfmt(values: Dict[str, Any]) -> str:
+    """Format ``values`` as a logfmt line, quoting values that need it."""
+    parts = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        value = f"{value:.2f}" if isinstance(value, float) else str(value)
+        if not value or any(c in value for c in ' ="\n'):
+            value = '"{}"'.format(
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+        parts.append(f"{key}={value}")
+    return " ".join(parts)
+
+
+def explain(metrics: RequestMetrics) -> Optional[str]:
+    """The query plan of the request's slowest query, if it was a SELECT."""
+    sql, alias = metrics.slowest_sql, metrics.slowest_alias
+    if not sql or alias is None or not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix()} {sql}",
+                metrics.slowest_params,
+            )
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def server_timing(metrics: RequestMetrics, total: float) -> str:
+    entries: List[str] = [
+        f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"'
+    ]
+    for phase in PHASES:
+        if phase in metrics.phases:
+            entries.append(f"{phase};dur={metrics.phases[phase] * 1000:.2f}")
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    """Measure, report and log the cost of each listings API request."""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+
+    def __call__(self, request: Any) -> Any:
+        if not request.path.startswith(settings.LISTINGS_METRICS_PATH_PREFIX):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(
+                            QueryRecorder(metrics, connection.alias)
+                        )
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = server_timing(metrics, total)
+        self.log(request, response, metrics, total)
+        return response
+
+    def log(
+        self, request: Any, response: Any, metrics: RequestMetrics, total: float
+    ) -> None:
+        slow = total * 1000 >= settings.LISTINGS_SLOW_REQUEST_MS
+        if not slow and not request_logger.isEnabledFor(logging.INFO):
+            return
+        values: Dict[str, Any] = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": metrics.db_time * 1000,
+        }
+        for phase in PHASES:
+            values[f"{phase}_ms"] = metrics.phases.get(phase, 0.0) * 1000
+        values["total_ms"] = total * 1000
+        values["cache"] = response.get("X-Cache")
+        values["signature"] = filter_signature(request.GET)
+        request_logger.info(logfmt(values))
+
+        if slow:
+            values["slowest_query_ms"] = metrics.slowest_time * 1000
+            if settings.LISTINGS_SLOW_REQUEST_EXPLAIN:
+                values["explain"] = explain(metrics)
+            slow_logger.warning(logfmt(values))
@@ -0,0 +1,165 @@
+import json
+import sys
+from typing import Any, Dict
+
+from api import benchmarks
+from api.models import Listing
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark import throughput, list and search latency and serialization "
+        "over synthetic listings, and save the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000,
+            help="Seed synthetic listings until the table has at least this many "
+            "(default 10000)",
+        )
+        parser.add_argument(
+            "--suites",
+            default=",".join(benchmarks.SUITES),
+            help="Comma-separated suites to run (default all: "
+            f"{', '.join(benchmarks.SUITES)})",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs per case (default 20)"
+        )
+        parser.add_argument(
+            "--import-rows",
+            type=int,
+            default=10_000,
+            help="Listings written by the import suite (default 10000)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100,
+            help="Rows per page in the serialize suite (default 100)",
+        )
+        parser.add_argument(
+            "--output",
+            help="JSON file to write the results to, or '-' for stdout "
+            "(default benchmark-<database>-<rows>.json)",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Results file of an earlier run to compare p50 times against",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        suites = [name.strip() for name in options["suites"].split(",") if name.strip()]
+        unknown = set(suites) - set(benchmarks.SUITES)
+        if unknown:
+            raise CommandError(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+        for option in ("rows", "repeat", "import_rows", "page_size"):
+            if options[option] < 1:
+                name = option.replace("_", "-")
+                raise CommandError(f"--{name} must be a positive integer")
+        if options["output"] == "-":
+            # Keep stdout for the JSON results.
+            self.stdout = self.stderr
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as stream:
+                baseline = json.load(stream)
+
+        repeat = options["repeat"]
+        results: Dict[str, Any] = {}
+        stats = benchmarks.seed_listings(options["rows"])
+        if stats is not None:
+            self.stdout.write(
+                f"Seeded {stats.created:,} synthetic listings in {stats.elapsed:.1f}s "
+                f"({stats.rows_per_second:,.0f} rows/sec)"
+            )
+            results["seed"] = {
+                "rows": stats.created,
+                "seconds": round(stats.elapsed, 3),
+                "rows_per_second": round(stats.rows_per_second),
+            }
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        results["environment"] = benchmarks.environment()
+        results["environment"]["repeat"] = repeat
+        self.stdout.write(
+            f"Listings: {Listing.objects.count():,} on {connection.vendor}\n"
+        )
+
+        if "import" in suites:
+            results["import"] = benchmarks.run_import(options["import_rows"], repeat)
+            self.write_import(results["import"])
+        for suite, requests in (
+            ("list", benchmarks.LIST_REQUESTS),
+            ("search", benchmarks.SEARCH_REQUESTS),
+        ):
+            if suite in suites:
+                try:
+                    results[suite] = benchmarks.run_requests(requests, repeat)
+                except ValueError as e:
+                    raise CommandError(str(e)) from e
+                self.write_cases(suite, results[suite])
+        if "serialize" in suites:
+            results["serialize"] = benchmarks.run_serialize(
+                options["page_size"], repeat
+            )
+            self.write_cases("serialize", results["serialize"])
+
+        if baseline is not None:
+            self.write_comparison(baseline, results)
+        self.save(results, options["output"])
+
+    def write_import(self, result: Dict[str, Any]) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING("=== import ==="))
+        self.stdout.write(
+            f"  {result['rows']:,} new listings: "
+            f"{result['create_rows_per_second']:,} rows/sec"
+        )
+        self.stdout.write(
+            f"  {result['rows']:,} unchanged listings: "
+            f"{result['unchanged_rows_per_second']:,} rows/sec"
+        )
+
+    def write_cases(self, suite: str, cases: Any) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(f"=== {suite} ==="))
+        for case in cases:
+            line = (
+                f"  {case['label']:<38} p50 {case['p50']:8.2f}ms  "
+                f"p95 {case['p95']:8.2f}ms  p99 {case['p99']:8.2f}ms"
+            )
+            if "db_ms" in case:
+                line += f"  db {case['db_ms']:.2f}ms/{case['queries']:.0f}q"
+            self.stdout.write(line)
+
+    def write_comparison(
+        self, baseline: Dict[str, Any], results: Dict[str, Any]
+    ) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING("=== p50 vs baseline ==="))
+        for suite, label, before, after in benchmarks.compare_results(
+            baseline, results
+        ):
+            change = (after - before) / before * 100 if before else 0.0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS
+            self.stdout.write(
+                style(
+                    f"  {suite}: {label:<38} {before:8.2f}ms -> {after:8.2f}ms "
+                    f"({change:+.0f}%)"
+                )
+            )
+
+    def save(self, results: Dict[str, Any], output: Any) -> None:
+        data = json.dumps(results, indent=2)
+        if output == "-":
+            sys.stdout.write(data + "\n")
+            return
+        output = output or (
+            f"benchmark-{connection.vendor}-{results['environment']['listings']}.json"
+        )
+        with open(output, "w", encoding="utf-8") as stream:
+            stream.write(data + "\n")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
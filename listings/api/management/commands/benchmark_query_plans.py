@@ -0,0 +1,88 @@
+import statistics
+import time
+from typing import Any
+
+from api.benchmarks import QUERY_SHAPES, listing_queryset, seed_listings
+from api.models import Listing
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for representative listing API queries, "
+        "optionally seeding synthetic listings and comparing against a table "
+        "without the listing indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=0,
+            help="Seed synthetic listings until the table has at least this many",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also run every query with the listing indexes dropped "
+            "(inside a transaction that is rolled back)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed runs per query (default 5)"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be a positive integer")
+
+        stats = seed_listings(options["rows"])
+        if stats is not None:
+            self.stdout.write(
+                f"Seeded {stats.created:,} synthetic listings in {stats.elapsed:.1f}s "
+                f"({stats.rows_per_second:,.0f} rows/sec)"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.stdout.write(f"Listings: {Listing.objects.count():,}\n")
+        self.run_shapes("with indexes", options["repeat"])
+
+        if options["compare"]:
+            with transaction.atomic():
+                self.drop_indexes()
+                self.run_shapes("without indexes", options["repeat"])
+                transaction.set_rollback(True)
+
+    def drop_indexes(self) -> None:
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for index in Listing._meta.indexes:
+                cursor.execute(str(index.remove_sql(Listing, editor)))
+            cursor.execute("ANALYZE")
+
+    def run_shapes(self, title: str, repeat: int) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(f"=== {title} ==="))
+        for label, query_string in QUERY_SHAPES:
+            queryset = listing_queryset(query_string)
+            page = queryset[:10]
+            count_ms = self.time_ms(queryset.count, repeat)
+            page_ms = self.time_ms(lambda: list(page.all()), repeat)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label} [?{query_string}]: page {page_ms:.2f}ms, "
+                    f"count {count_ms:.2f}ms"
+                )
+            )
+            for line in page.explain().splitlines():
+                self.stdout.write(f"    {line}")
+
+    @staticmethod
+    def time_ms(func: Any, repeat: int) -> float:
+        """Median wall time of ``func`` in milliseconds."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
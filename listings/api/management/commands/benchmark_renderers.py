@@ -0,0 +1,87 @@
+import statistics
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, List
+
+from api import renderers
+from api.importing import import_records
+from api.models import Listing
+from api.renderers import FastJSONRenderer
+from api.serializers import ListingRowSerializer, ListingSerializer
+from api.synthetic import CSV_HEADER, generate_records
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare p50/p99 render times of JSONRenderer and FastJSONRenderer "
+        "on list pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=100, help="Rows per page (default 100)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=500, help="Timed runs per path (default 500)"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows, repeat = options["rows"], options["repeat"]
+        if rows < 1 or repeat < 1:
+            raise CommandError("--rows and --repeat must be positive integers")
+        if renderers.orjson is None:
+            self.stderr.write("orjson is not installed; FastJSONRenderer uses json")
+
+        existing = Listing.objects.count()
+        if existing < rows:
+            records = generate_records(
+                rows - existing, seed=existing, first_zillow_id=100_000_000 + existing
+            )
+            import_records(chain([CSV_HEADER], records))
+
+        queryset = Listing.objects.order_by("-price")[:rows]
+        columns = ListingRowSerializer.columns
+        page = ListingRowSerializer(
+            list(queryset.values_list(*columns, named=True)), many=True
+        ).data
+        if page != ListingSerializer(list(queryset.all()), many=True).data:
+            raise CommandError("ListingRowSerializer output differs")
+
+        # The envelope CustomPageNumberPagination responds with.
+        data = OrderedDict(
+            [
+                ("count", Listing.objects.count()),
+                ("estimated_count", False),
+                ("next", "http://testserver/api/listings/?page=2"),
+                ("previous", None),
+                ("results", page),
+            ]
+        )
+
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        if stdlib.render(data) != fast.render(data):
+            raise CommandError("FastJSONRenderer output differs from JSONRenderer")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{rows}-row pages"))
+        results = {}
+        for label, renderer in [("JSONRenderer", stdlib), ("FastJSONRenderer", fast)]:
+            p50, p99 = self.percentiles_us(lambda: renderer.render(data), repeat)
+            results[label] = p99
+            self.stdout.write(f"  {label:<17} p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+        speedup = results["JSONRenderer"] / results["FastJSONRenderer"]
+        self.stdout.write(self.style.SUCCESS(f"  p99 {speedup:.1f}x faster"))
+
+    @staticmethod
+    def percentiles_us(func: Callable[[], Any], repeat: int) -> List[float]:
+        """Median and 99th percentile wall time of ``func``, in microseconds."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        if repeat == 1:
+            return [timings[0], timings[0]]
+        return [statistics.median(timings), statistics.quantiles(timings, n=100)[-1]]
@@ -0,0 +1,79 @@
+import statistics
+import time
+from itertools import chain
+from typing import Any, Callable
+
+from api.importing import import_records
+from api.models import Listing
+from api.serializers import ListingRowSerializer, ListingSerializer
+from api.synthetic import CSV_HEADER, generate_records
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row cost of ListingSerializer on model instances with "
+        "ListingRowSerializer on values_list rows, fetch included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=100, help="Rows per page (default 100)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50, help="Timed runs per path (default 50)"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows, repeat = options["rows"], options["repeat"]
+        if rows < 1 or repeat < 1:
+            raise CommandError("--rows and --repeat must be positive integers")
+
+        existing = Listing.objects.count()
+        if existing < rows:
+            records = generate_records(
+                rows - existing, seed=existing, first_zillow_id=100_000_000 + existing
+            )
+            import_records(chain([CSV_HEADER], records))
+
+        queryset = Listing.objects.order_by("-price")[:rows]
+        columns = ListingRowSerializer.columns
+
+        instances = list(queryset.all())
+        rows_page = list(queryset.values_list(*columns, named=True))
+        cases = {
+            "serialize only": (
+                lambda: ListingSerializer(instances, many=True).data,
+                lambda: ListingRowSerializer(rows_page, many=True).data,
+            ),
+            "fetch + serialize": (
+                lambda: ListingSerializer(list(queryset.all()), many=True).data,
+                lambda: ListingRowSerializer(
+                    list(queryset.values_list(*columns, named=True)), many=True
+                ).data,
+            ),
+        }
+
+        drf, fast = cases["serialize only"]
+        if drf() != fast():
+            raise CommandError(
+                "ListingRowSerializer output differs from ListingSerializer"
+            )
+
+        for label, (drf, fast) in cases.items():
+            drf_us = self.per_row_us(drf, rows, repeat)
+            fast_us = self.per_row_us(fast, rows, repeat)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}, {rows}-row pages"))
+            self.stdout.write(f"  ListingSerializer:    {drf_us:8.1f} us/row")
+            self.stdout.write(f"  ListingRowSerializer: {fast_us:8.1f} us/row")
+            self.stdout.write(self.style.SUCCESS(f"  {drf_us / fast_us:.1f}x faster"))
+
+    @staticmethod
+    def per_row_us(func: Callable[[], Any], rows: int, repeat: int) -> float:
+        """Median wall time of ``func`` per row, in microseconds."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) / rows * 1_000_000
@@ -0,0 +1,56 @@
+import csv
+import sys
+from typing import Any
+
+from api.benchmarks import FIRST_ZILLOW_ID
+from api.synthetic import CSV_HEADER, generate_records
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Write synthetic listings as a CSV file in the layout of "
+        "sample-data/data_with_rent.csv, for import_listing_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="CSV file to write, or '-' for stdout")
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000,
+            help="Listings to generate (default 10000)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; the same seed always produces the same file (default 0)",
+        )
+        parser.add_argument(
+            "--first-zillow-id",
+            type=int,
+            default=FIRST_ZILLOW_ID,
+            help=f"zillow_id of the first listing (default {FIRST_ZILLOW_ID})",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows = options["rows"]
+        if rows < 1:
+            raise CommandError("--rows must be a positive integer")
+
+        records = generate_records(rows, options["seed"], options["first_zillow_id"])
+        if options["output"] == "-":
+            self.write(sys.stdout, records)
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as stream:
+            self.write(stream, records)
+        self.stderr.write(
+            self.style.SUCCESS(f"Wrote {rows:,} listings to {options['output']}")
+        )
+
+    @staticmethod
+    def write(stream: Any, records: Any) -> None:
+        writer = csv.writer(stream)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(records)
@@ -1,161 +1,137 @@
-import csv
+import io
 import os
-from datetime import date, datetime
-from typing import Any, Dict, Optional
-
+import sys
+from typing import Any
+
+from api.cache import bump_generation
+from api.geo import count_unlocated
+from api.importing import ENGINES, ImportStats, import_csv
+from api.importing.parallel import ImportWorkerError, import_csv_parallel
+from api.importing.pipeline import DEFAULT_BATCH_SIZE, ImportWriteError
 from api.models import Listing
-from api.utils import convert_price_to_cents
-from django.core.management.base import BaseCommand
-from django.utils.dateparse import parse_date
-
+from api.summary import refresh_summaries
+from django.core.management.base import BaseCommand, CommandError
 
-def parse_date_safely(value: Optional[str]) -> Optional[date]:
-    """Parse a date string safely, returning None for invalid inputs."""
-    if not value:
-        return None
-    try:
-        return parse_date(value)
-    except (ValueError, TypeError):
-        return None
+DEFAULT_CSV_FILE = os.path.join("sample-data", "data_with_rent.csv")
 
 
 class Command(BaseCommand):
     help = "Import listing data from CSV file"
 
     def add_arguments(self, parser):
+        parser.add_argument(
+            "csv_file",
+            nargs="?",
+            default=DEFAULT_CSV_FILE,
+            help=f"CSV file to import, or '-' for stdin (default {DEFAULT_CSV_FILE})",
+        )
         parser.add_argument(
             "--reset",
             action="store_true",
             help="Delete all existing records before import",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Number of rows written per batch (default {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=ENGINES,
+            default="auto",
+            help=(
+                "Write engine: 'copy' streams rows into a staging table with "
+                "PostgreSQL COPY and merges them in one statement, 'orm' uses "
+                "bulk_create/bulk_update. 'auto' (default) uses 'copy' on "
+                "PostgreSQL and 'orm' elsewhere."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of parser processes and of writer processes (default 1). "
+                "Rows are sharded between writers by zillow_id. Requires a file "
+                "path and a database with concurrent writers such as PostgreSQL; "
+                "not supported on SQLite."
+            ),
+        )
+
+    def import_stream(self, csv_file: str, batch_size: int, engine: str) -> ImportStats:
+        if csv_file == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+        else:
+            stream = open(csv_file, "r", encoding="utf-8-sig", newline="")
+        with stream:
+            return import_csv(stream, batch_size, engine)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be a positive integer")
+
+        csv_file = options["csv_file"]
+        if csv_file == "-" and workers > 1:
+            raise CommandError("--workers cannot be used when reading from stdin")
+        if csv_file != "-" and not os.path.exists(csv_file):
+            raise CommandError(f"File not found: {csv_file}")
 
-    def handle(self, *args: Any, **options: Dict[str, Any]) -> None:
         if options["reset"]:
             Listing.objects.all().delete()
+            refresh_summaries()
+            bump_generation()
             self.stdout.write(
                 self.style.SUCCESS("Successfully deleted all existing listings")
             )
 
-        csv_file = os.path.join("sample-data", "data_with_rent.csv")
-        if not os.path.exists(csv_file):
-            self.stdout.write(self.style.ERROR(f"File not found: {csv_file}"))
-            return
-
-        with open(csv_file, "r", encoding="utf-8-sig") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Clean up column names and values
-                row = {k.strip(): v.strip() if v else None for k, v in row.items()}
-
-                # Convert date strings to date objects
-                last_sold_date = parse_date_safely(row.get("last_sold_date"))
-                rentzestimate_last_updated = parse_date_safely(
-                    row.get("rentzestimate_last_updated")
-                )
-                zestimate_last_updated = parse_date_safely(
-                    row.get("zestimate_last_updated")
-                )
-
-                # Convert numeric strings to integers or None
-                def safe_int(value: Optional[str]) -> Optional[int]:
-                    if not value:
-                        return None
-                    try:
-                        return int(value)
-                    except (ValueError, TypeError):
-                        return None
-
-                def safe_decimal(value: Optional[str]) -> Optional[float]:
-                    try:
-                        return float(value) if value else None
-                    except (ValueError, TypeError):
-                        return None
-
-                # Convert prices using the proper conversion function
-                price = convert_price_to_cents(row.get("price"))
-                last_sold_price = convert_price_to_cents(row.get("last_sold_price"))
-                rent_price = convert_price_to_cents(row.get("rent_price"))
-                rentzestimate_amount = convert_price_to_cents(
-                    row.get("rentzestimate_amount")
+        try:
+            if workers > 1:
+                stats = import_csv_parallel(
+                    csv_file, workers, batch_size, options["engine"]
                 )
-                tax_value = convert_price_to_cents(row.get("tax_value"))
-                zestimate_amount = convert_price_to_cents(row.get("zestimate_amount"))
+            else:
+                stats = self.import_stream(csv_file, batch_size, options["engine"])
+        except (ValueError, ImportWorkerError, ImportWriteError) as e:
+            raise CommandError(str(e)) from e
 
-                # Debug logging for price conversions
-                self.stdout.write(
-                    self.style.SUCCESS(f'Converting prices for {row.get("zillow_id")}:')
-                )
-                self.stdout.write(f'  Original price: {row.get("price")} -> {price}')
-                self.stdout.write(
-                    f"  Original last_sold_price: "
-                    f'{row.get("last_sold_price")} -> {last_sold_price}'
-                )
-                self.stdout.write(
-                    f"  Original rent_price: "
-                    f'{row.get("rent_price")} -> {rent_price}'
-                )
-                self.stdout.write(
-                    f"  Original rentzestimate_amount: "
-                    f'{row.get("rentzestimate_amount")} -> {rentzestimate_amount}'
-                )
-                self.stdout.write(
-                    f"  Original tax_value: " f'{row.get("tax_value")} -> {tax_value}'
-                )
-                self.stdout.write(
-                    f"  Original zestimate_amount: "
-                    f'{row.get("zestimate_amount")} -> {zestimate_amount}'
+        if stats.skipped:
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {stats.skipped} rows without zillow_id")
+            )
+        if stats.invalid:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipped {stats.invalid} rows with values the database "
+                    "would reject:"
                 )
-
-                try:
-                    listing, created = Listing.objects.update_or_create(
-                        zillow_id=row["zillow_id"],
-                        defaults={
-                            "area_unit": row.get("area_unit"),
-                            "bathrooms": safe_decimal(row.get("bathrooms")),
-                            "bedrooms": safe_int(row.get("bedrooms")),
-                            "home_size": safe_int(row.get("home_size")),
-                            "home_type": row.get("home_type"),
-                            "last_sold_date": last_sold_date,
-                            "last_sold_price": last_sold_price,
-                            "link": row.get("link"),
-                            "price": price,
-                            "property_size": safe_int(row.get("property_size")),
-                            "rent_price": rent_price,
-                            "rentzestimate_amount": rentzestimate_amount,
-                            "rentzestimate_last_updated": rentzestimate_last_updated,
-                            "tax_value": tax_value,
-                            "tax_year": safe_int(row.get("tax_year")),
-                            "year_built": safe_int(row.get("year_built")),
-                            "zestimate_amount": zestimate_amount,
-                            "zestimate_last_updated": zestimate_last_updated,
-                            "address": row.get("address"),
-                            "city": row.get("city"),
-                            "state": row.get("state"),
-                            "zipcode": row.get("zipcode"),
-                            "last_imported_at": datetime.now(),
-                        },
-                    )
-                    if created:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"Created new listing: {listing.zillow_id}"
-                            )
-                        )
-                    else:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"Updated existing listing: {listing.zillow_id}"
-                            )
-                        )
-                    # Calculate and save the data hash
-                    listing.data_hash = listing.calculate_data_hash()
-                    listing.save()
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error processing row: {e}"))
-
+            )
+            for reason in stats.invalid_reasons:
+                self.stdout.write(f"  {reason}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {stats.rows} rows in {stats.elapsed:.2f}s "
+                f"({stats.rows_per_second:,.0f} rows/sec): "
+                f"{stats.created} created, {stats.updated} updated, "
+                f"{stats.unchanged} unchanged."
+            )
+        )
         self.stdout.write(
             self.style.SUCCESS(f"Imported {Listing.objects.count()} listings.")
         )
+        unlocated = count_unlocated(Listing)
+        if unlocated:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{unlocated} listings have a zipcode without a known centroid "
+                    "and no coordinates; see load_zipcode_centroids."
+                )
+            )
 
         if options["reset"]:
             self.stdout.write(
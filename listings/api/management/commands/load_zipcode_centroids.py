@@ -0,0 +1,70 @@
+from pathlib import Path
+from typing import Any
+
+from api.cache import bump_generation
+from api.geo import (
+    add_prefix_centroids,
+    centroids_path,
+    count_unlocated,
+    read_gazetteer,
+    reload_centroids,
+    update_locations,
+    write_centroids,
+)
+from api.models import Listing
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the zipcode centroid table from a Census ZCTA Gazetteer file "
+        "(e.g. 2023_Gaz_zcta_national.txt) and relocate the stored listings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("gazetteer", help="Unzipped ZCTA Gazetteer file")
+        parser.add_argument(
+            "--output",
+            help=(
+                "Centroid table to write (default: LISTINGS_ZIPCODE_CENTROIDS, "
+                "or the bundled api/data/zipcode_centroids.csv)"
+            ),
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            with open(options["gazetteer"], encoding="utf-8", newline="") as stream:
+                centroids = read_gazetteer(stream)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        if not centroids:
+            raise CommandError(f"No zipcodes in {options['gazetteer']}")
+
+        output = Path(options["output"] or centroids_path())
+        table = add_prefix_centroids(centroids)
+        write_centroids(output, table)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(centroids):,} zipcodes and "
+                f"{len(table) - len(centroids):,} prefixes to {output}"
+            )
+        )
+        if output.resolve() != centroids_path().resolve():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Set LISTINGS_ZIPCODE_CENTROIDS={output} to use it; "
+                    "listings were not relocated."
+                )
+            )
+            return
+
+        reload_centroids()
+        updated = update_locations(Listing)
+        if updated:
+            bump_generation()
+        self.stdout.write(self.style.SUCCESS(f"Relocated {updated:,} listings."))
+        unlocated = count_unlocated(Listing)
+        if unlocated:
+            self.stdout.write(
+                self.style.WARNING(f"{unlocated:,} listings still have no coordinates.")
+            )
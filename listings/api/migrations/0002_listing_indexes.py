@@ -0,0 +1,87 @@
+# Generated by Django 3.2.25 on 2026-10-17 20:58
+
+import django.db.models.expressions
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["price"], name="listing_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["last_sold_price"], name="listing_last_sold_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["rent_price"], name="listing_rent_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["rentzestimate_amount"], name="listing_rentzestimate_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["tax_value"], name="listing_tax_value_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["zestimate_amount"], name="listing_zestimate_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["bedrooms"], name="listing_bedrooms_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["bathrooms"], name="listing_bathrooms_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["home_size"], name="listing_home_size_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["property_size"], name="listing_property_size_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["year_built"], name="listing_year_built_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["home_type", "price"], name="listing_home_type_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                django.db.models.functions.text.Upper("state"),
+                django.db.models.expressions.F("price"),
+                name="listing_state_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["created_at", "id"], name="listing_created_at_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,92 @@
+import sqlite3
+
+from django.db import migrations
+
+# The SQL of api.search when this migration was written, frozen so that later
+# changes to the search index get migrations of their own.
+POSTGRES_CREATE_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS listing_address_trgm_idx "
+    "ON api_listing USING gin (UPPER(address) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS listing_city_trgm_idx "
+    "ON api_listing USING gin (UPPER(city) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS listing_state_trgm_idx "
+    "ON api_listing USING gin (UPPER(state) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS listing_zipcode_trgm_idx "
+    "ON api_listing USING gin (UPPER(zipcode) gin_trgm_ops)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS listing_address_trgm_idx",
+    "DROP INDEX IF EXISTS listing_city_trgm_idx",
+    "DROP INDEX IF EXISTS listing_state_trgm_idx",
+    "DROP INDEX IF EXISTS listing_zipcode_trgm_idx",
+]
+
+SQLITE_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS api_listing_search USING fts5("
+    "address, city, state, zipcode, content='api_listing', content_rowid='id', "
+    "tokenize='trigram')"
+)
+SQLITE_INSERT_NEW = (
+    "INSERT INTO api_listing_search(rowid, address, city, state, zipcode) "
+    "VALUES (new.id, new.address, new.city, new.state, new.zipcode);"
+)
+SQLITE_DELETE_OLD = (
+    "INSERT INTO api_listing_search"
+    "(api_listing_search, rowid, address, city, state, zipcode) "
+    "VALUES ('delete', old.id, old.address, old.city, old.state, old.zipcode);"
+)
+SQLITE_TRIGGER_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS api_listing_search_insert "
+    f"AFTER INSERT ON api_listing BEGIN {SQLITE_INSERT_NEW} END",
+    "CREATE TRIGGER IF NOT EXISTS api_listing_search_delete "
+    f"AFTER DELETE ON api_listing BEGIN {SQLITE_DELETE_OLD} END",
+    "CREATE TRIGGER IF NOT EXISTS api_listing_search_update "
+    "AFTER UPDATE OF address, city, state, zipcode ON api_listing "
+    f"BEGIN {SQLITE_DELETE_OLD} {SQLITE_INSERT_NEW} END",
+]
+SQLITE_REBUILD_SQL = (
+    "INSERT INTO api_listing_search(api_listing_search) VALUES ('rebuild')"
+)
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_listing_search_insert",
+    "DROP TRIGGER IF EXISTS api_listing_search_delete",
+    "DROP TRIGGER IF EXISTS api_listing_search_update",
+    "DROP TABLE IF EXISTS api_listing_search",
+]
+
+
+def forwards(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        statements = POSTGRES_CREATE_SQL
+    elif connection.vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 34):
+        # FTS5's trigram tokenizer needs SQLite 3.34.
+        statements = [SQLITE_TABLE_SQL, *SQLITE_TRIGGER_SQL, SQLITE_REBUILD_SQL]
+    else:
+        statements = []
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        statements = POSTGRES_DROP_SQL
+    elif vendor == "sqlite":
+        statements = SQLITE_DROP_SQL
+    else:
+        statements = []
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
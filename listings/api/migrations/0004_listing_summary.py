@@ -0,0 +1,87 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:43
+
+from typing import Any, Dict
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+# api.summary as of this migration.
+SUMMARY_FIELDS = ["state", "city", "zipcode", "home_type", "bedrooms"]
+SUMMARY_METRICS = ["price", "rent_price", "zestimate_amount"]
+
+
+def populate_summaries(apps, schema_editor):
+    Listing = apps.get_model("api", "Listing")
+    ListingSummary = apps.get_model("api", "ListingSummary")
+    annotations: Dict[str, Any] = {"count": Count("pk")}
+    for metric in SUMMARY_METRICS:
+        annotations[f"{metric}_count"] = Count(metric)
+        annotations[f"{metric}_sum"] = Sum(metric)
+        annotations[f"{metric}_min"] = Min(metric)
+        annotations[f"{metric}_max"] = Max(metric)
+    rows = (
+        Listing.objects.order_by()
+        .values(*SUMMARY_FIELDS)
+        .annotate(**annotations)
+        .order_by()
+    )
+    ListingSummary.objects.bulk_create(
+        [ListingSummary(**row) for row in rows], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_listing_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ListingSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("state", models.CharField(max_length=2)),
+                ("city", models.CharField(max_length=100)),
+                ("zipcode", models.CharField(max_length=10)),
+                ("home_type", models.CharField(max_length=50)),
+                ("bedrooms", models.IntegerField(null=True)),
+                ("count", models.IntegerField()),
+                ("price_count", models.IntegerField()),
+                ("price_sum", models.BigIntegerField(null=True)),
+                ("price_min", models.BigIntegerField(null=True)),
+                ("price_max", models.BigIntegerField(null=True)),
+                ("rent_price_count", models.IntegerField()),
+                ("rent_price_sum", models.BigIntegerField(null=True)),
+                ("rent_price_min", models.IntegerField(null=True)),
+                ("rent_price_max", models.IntegerField(null=True)),
+                ("zestimate_amount_count", models.IntegerField()),
+                ("zestimate_amount_sum", models.BigIntegerField(null=True)),
+                ("zestimate_amount_min", models.IntegerField(null=True)),
+                ("zestimate_amount_max", models.IntegerField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["zipcode"], name="listing_zipcode_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listingsummary",
+            index=models.Index(fields=["zipcode"], name="listing_summary_zipcode_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listingsummary",
+            index=models.Index(
+                fields=["state", "city"], name="listing_summary_state_city_idx"
+            ),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
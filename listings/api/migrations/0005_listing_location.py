@@ -0,0 +1,126 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:54
+
+from django.db import migrations, models
+
+# api.geo as of this migration, with the bundled api/data/zipcode_centroids.csv
+# frozen here: the file can be replaced by the load_zipcode_centroids command.
+CENTROIDS = {
+    "91302": (34.1233, -118.6722),
+    "91303": (34.1982, -118.6017),
+    "91304": (34.2246, -118.6327),
+    "91307": (34.2000, -118.6601),
+    "91316": (34.1577, -118.5166),
+    "91335": (34.2006, -118.5397),
+    "91352": (34.2264, -118.3656),
+    "91356": (34.1561, -118.5490),
+    "91364": (34.1562, -118.6009),
+    "91367": (34.1766, -118.6157),
+    "91401": (34.1790, -118.4316),
+    "91403": (34.1498, -118.4622),
+    "91411": (34.1780, -118.4575),
+    "91423": (34.1485, -118.4328),
+    "91436": (34.1517, -118.4891),
+    "91601": (34.1683, -118.3720),
+    "91602": (34.1508, -118.3670),
+    "91604": (34.1393, -118.3926),
+    "91605": (34.2072, -118.4000),
+    "91606": (34.1866, -118.3877),
+    "91607": (34.1654, -118.3995),
+    "100": (40.7831, -73.9712),
+    "112": (40.6782, -73.9442),
+    "142": (42.8864, -78.8784),
+    "303": (33.7490, -84.3880),
+    "314": (32.0809, -81.0912),
+    "328": (28.5383, -81.3792),
+    "331": (25.7617, -80.1918),
+    "336": (27.9506, -82.4572),
+    "605": (41.7508, -88.1535),
+    "606": (41.8781, -87.6298),
+    "752": (32.7767, -96.7970),
+    "770": (29.7604, -95.3698),
+    "787": (30.2672, -97.7431),
+    "802": (39.7392, -104.9903),
+    "803": (40.0150, -105.2705),
+    "850": (33.4484, -112.0740),
+    "857": (32.2226, -110.9747),
+    "900": (34.0522, -118.2437),
+    "913": (34.1870, -118.5510),
+    "914": (34.1650, -118.4560),
+    "916": (34.1670, -118.3820),
+    "921": (32.7157, -117.1611),
+    "941": (37.7749, -122.4194),
+    "981": (47.6062, -122.3321),
+    "984": (47.2529, -122.4443),
+    "992": (47.6588, -117.4260),
+}
+CELL_DEGREES = 0.05
+GRID_ROWS = round(180 / CELL_DEGREES)
+GRID_COLUMNS = round(360 / CELL_DEGREES)
+
+POSTGRES_CREATE_SQL = (
+    "CREATE INDEX IF NOT EXISTS listing_location_gist_idx "
+    "ON api_listing USING gist (point(longitude, latitude))"
+)
+POSTGRES_DROP_SQL = "DROP INDEX IF EXISTS listing_location_gist_idx"
+
+
+def geo_cell(latitude, longitude):
+    row = min(int((latitude + 90) / CELL_DEGREES), GRID_ROWS - 1)
+    column = min(int((longitude + 180) / CELL_DEGREES), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + column
+
+
+def populate_locations(apps, schema_editor):
+    Listing = apps.get_model("api", "Listing")
+    zipcodes = Listing.objects.order_by().values_list("zipcode", flat=True).distinct()
+    for zipcode in list(zipcodes):
+        # 5-digit zipcodes, then 3-digit prefixes; ZIP+4 by the first five.
+        code = (zipcode or "").strip()[:5]
+        point = CENTROIDS.get(code) or (
+            CENTROIDS.get(code[:3]) if len(code) == 5 else None
+        )
+        if point is not None:
+            Listing.objects.filter(zipcode=zipcode).update(
+                latitude=point[0], longitude=point[1], geo_cell=geo_cell(*point)
+            )
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_CREATE_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_listing_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="geo_cell",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="latitude",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="longitude",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["geo_cell"], name="listing_geo_cell_idx"),
+        ),
+        migrations.RunPython(populate_locations, migrations.RunPython.noop),
+        migrations.RunPython(forwards, backwards),
+    ]
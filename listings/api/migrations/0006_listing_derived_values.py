@@ -0,0 +1,136 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+# api.models.derive and api.utils.format_price_from_cents as of this migration.
+PRICE_FIELDS = [
+    "price",
+    "last_sold_price",
+    "rent_price",
+    "rentzestimate_amount",
+    "tax_value",
+    "zestimate_amount",
+]
+DERIVED_FIELDS = [f"{field}_display" for field in PRICE_FIELDS] + [
+    "price_per_sqft",
+    "rent_yield_bps",
+    "zestimate_delta",
+]
+BATCH_SIZE = 2000
+
+
+def format_price(cents):
+    if cents is None or cents == 0:
+        return None
+    dollars = round(cents / 100)
+    if dollars >= 10_000_000:
+        return f"${dollars/1_000_000:.1f}M"
+    return f"${dollars:,}"
+
+
+def derive(values):
+    price = values["price"]
+    home_size = values["home_size"]
+    rent = values["rent_price"]
+    zestimate = values["zestimate_amount"]
+    price_per_sqft = rent_yield_bps = zestimate_delta = None
+    if price:
+        if home_size:
+            price_per_sqft = round(price / home_size)
+        if rent:
+            rent_yield_bps = round(rent * 12 * 10_000 / price)
+        if zestimate:
+            zestimate_delta = zestimate - price
+    displays = [format_price(values[field]) for field in PRICE_FIELDS]
+    return (*displays, price_per_sqft, rent_yield_bps, zestimate_delta)
+
+
+def populate_derived_values(apps, schema_editor):
+    Listing = apps.get_model("api", "Listing")
+    sources = PRICE_FIELDS + ["home_size"]
+    rows = Listing.objects.order_by("pk").values_list("pk", *sources)
+    # One chunk of rows at a time, resuming after the last primary key, so
+    # memory does not grow with the table and no cursor stays open on the
+    # rows being updated.
+    chunk = list(rows[:BATCH_SIZE])
+    while chunk:
+        changed = []
+        for row in chunk:
+            values = derive(dict(zip(sources, row[1:])))
+            changed.append(Listing(pk=row[0], **dict(zip(DERIVED_FIELDS, values))))
+        Listing.objects.bulk_update(changed, DERIVED_FIELDS)
+        chunk = list(rows.filter(pk__gt=chunk[-1][0])[:BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_listing_location"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="last_sold_price_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="price_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="price_per_sqft",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rent_price_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rent_yield_bps",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="rentzestimate_amount_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="tax_value_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="zestimate_amount_display",
+            field=models.CharField(max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="zestimate_delta",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["price_per_sqft"], name="listing_price_per_sqft_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["rent_yield_bps"], name="listing_rent_yield_bps_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["zestimate_delta"], name="listing_zestimate_delta_idx"
+            ),
+        ),
+        migrations.RunPython(populate_derived_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-17 22:23
+
+import time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_generation(apps, schema_editor):
+    # Clock-derived like api.cache, so a recreated table starts a generation
+    # no cache has seen.
+    ImportGeneration = apps.get_model("api", "ImportGeneration")
+    ImportGeneration.objects.create(
+        pk=1, generation=time.time_ns() // 1000, started_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_listing_derived_values"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("generation", models.BigIntegerField()),
+                ("started_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_generation, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,129 @@
 import hashlib
-from typing import Any, List, cast
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, cast
 
 from django.db import models
+from django.db.models.functions import Upper
+
+from .geo import locate
+from .utils import format_price_from_cents
+
+# Fields that contribute to ``Listing.data_hash``, in hashing order.
+HASH_FIELDS: List[str] = [
+    "area_unit",
+    "bathrooms",
+    "bedrooms",
+    "home_size",
+    "home_type",
+    "last_sold_date",
+    "last_sold_price",
+    "link",
+    "price",
+    "property_size",
+    "rent_price",
+    "rentzestimate_amount",
+    "rentzestimate_last_updated",
+    "tax_value",
+    "tax_year",
+    "year_built",
+    "zestimate_amount",
+    "zestimate_last_updated",
+    "zillow_id",
+    "address",
+    "city",
+    "state",
+    "zipcode",
+]
+
+# Fields stored in cents and formatted as prices by the API.
+PRICE_FIELDS: List[str] = [
+    "price",
+    "last_sold_price",
+    "rent_price",
+    "rentzestimate_amount",
+    "tax_value",
+    "zestimate_amount",
+]
+
+
+# Stored display strings of the price fields, returned by the API in place of
+# the cents (see ``format_price_from_cents``).
+DISPLAY_FIELDS: Dict[str, str] = {field: f"{field}_display" for field in PRICE_FIELDS}
+
+# Metrics derived from the imported values; orderable through the API.
+DERIVED_METRICS: List[str] = ["price_per_sqft", "rent_yield_bps", "zestimate_delta"]
+
+# Fields computed by ``derive``, in its output order.
+DERIVED_FIELDS: List[str] = list(DISPLAY_FIELDS.values()) + DERIVED_METRICS
+
+DERIVE_BATCH_SIZE = 2000
+
+
+def derive(values: Mapping[str, Any]) -> Tuple[Any, ...]:
+    """The ``DERIVED_FIELDS`` of a mapping of listing values.
+
+    - ``price_per_sqft``: ``price`` per unit of ``home_size``, in cents.
+    - ``rent_yield_bps``: yearly ``rent_price`` over ``price``, in basis points.
+    - ``zestimate_delta``: ``zestimate_amount`` minus ``price``, in cents.
+
+    Metrics are null when a value they need is missing or zero.
+    """
+    price = values.get("price")
+    home_size = values.get("home_size")
+    rent = values.get("rent_price")
+    zestimate = values.get("zestimate_amount")
+    price_per_sqft: Optional[int] = None
+    rent_yield_bps: Optional[int] = None
+    zestimate_delta: Optional[int] = None
+    if price:
+        if home_size:
+            price_per_sqft = round(price / home_size)
+        if rent:
+            rent_yield_bps = round(rent * 12 * 10_000 / price)
+        if zestimate:
+            zestimate_delta = zestimate - price
+    displays = [format_price_from_cents(values.get(field)) for field in PRICE_FIELDS]
+    return (*displays, price_per_sqft, rent_yield_bps, zestimate_delta)
+
+
+def update_derived_values(listing_model: Any) -> int:
+    """Recompute the ``DERIVED_FIELDS`` of every ``listing_model`` row whose
+    stored values differ. Returns the number of rows updated.
+
+    Rows are read and written ``DERIVE_BATCH_SIZE`` at a time, resuming after
+    the last primary key, so memory does not grow with the table.
+    """
+    sources = PRICE_FIELDS + ["home_size"]
+    rows = listing_model.objects.order_by("pk").values_list(
+        "pk", *sources, *DERIVED_FIELDS
+    )
+    updated = 0
+    chunk = list(rows[:DERIVE_BATCH_SIZE])
+    while chunk:
+        changed = []
+        for row in chunk:
+            values = derive(dict(zip(sources, row[1 : len(sources) + 1])))
+            if values != tuple(row[len(sources) + 1 :]):
+                changed.append(
+                    listing_model(pk=row[0], **dict(zip(DERIVED_FIELDS, values)))
+                )
+        listing_model.objects.bulk_update(changed, DERIVED_FIELDS)
+        updated += len(changed)
+        chunk = list(rows.filter(pk__gt=chunk[-1][0])[:DERIVE_BATCH_SIZE])
+    return updated
+
+
+def hash_field_values(values: Iterable[Any]) -> str:
+    """Hash listing values that are already laid out in ``HASH_FIELDS`` order."""
+    return hashlib.sha256("".join(map(str, values)).encode()).hexdigest()
+
+
+def calculate_data_hash(values: Mapping[str, Any]) -> str:
+    """Calculate the change-detection hash for a mapping of listing values.
+
+    This lets the importer hash a parsed CSV row without building a model
+    instance; ``Listing.calculate_data_hash`` produces the same digest.
+    """
+    return hash_field_values(values.get(field) for field in HASH_FIELDS)
 
 
 class Listing(models.Model):
@@ -29,6 +151,22 @@ class Listing(models.Model):
     state = models.CharField(max_length=2)
     zipcode = models.CharField(max_length=10)
 
+    # Zipcode centroid and its grid cell, set from ``zipcode`` (see api.geo).
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    geo_cell = models.IntegerField(null=True)
+
+    # Computed from the fields above by ``derive``.
+    price_display = models.CharField(max_length=20, null=True)
+    last_sold_price_display = models.CharField(max_length=20, null=True)
+    rent_price_display = models.CharField(max_length=20, null=True)
+    rentzestimate_amount_display = models.CharField(max_length=20, null=True)
+    tax_value_display = models.CharField(max_length=20, null=True)
+    zestimate_amount_display = models.CharField(max_length=20, null=True)
+    price_per_sqft = models.BigIntegerField(null=True)  # Cents per unit of area
+    rent_yield_bps = models.IntegerField(null=True)  # Basis points per year
+    zestimate_delta = models.BigIntegerField(null=True)  # Stored in cents
+
     # New timestamp fields
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -45,36 +183,119 @@ class Listing(models.Model):
 
     def calculate_data_hash(self) -> str:
         """Calculate a hash of the relevant fields to detect changes."""
-        fields_to_hash: List[str] = [
-            str(self.area_unit),
-            str(self.bathrooms),
-            str(self.bedrooms),
-            str(self.home_size),
-            str(self.home_type),
-            str(self.last_sold_date),
-            str(self.last_sold_price),
-            str(self.link),
-            str(self.price),
-            str(self.property_size),
-            str(self.rent_price),
-            str(self.rentzestimate_amount),
-            str(self.rentzestimate_last_updated),
-            str(self.tax_value),
-            str(self.tax_year),
-            str(self.year_built),
-            str(self.zestimate_amount),
-            str(self.zestimate_last_updated),
-            str(self.zillow_id),
-            str(self.address),
-            str(self.city),
-            str(self.state),
-            str(self.zipcode),
-        ]
-        return hashlib.sha256("".join(fields_to_hash).encode()).hexdigest()
+        values = {field: getattr(self, field) for field in HASH_FIELDS}
+        return calculate_data_hash(values)
+
+    @classmethod
+    def from_db(cls, db: Any, field_names: Any, values: Any) -> "Listing":
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that ``save`` can refresh the summary of the zipcode
+        # a listing moves out of without reading it again.
+        instance._loaded_zipcode = instance.__dict__.get("zipcode")
+        return instance
 
     def save(self, *args: Any, **kwargs: Any) -> None:
+        from .summary import refresh_on_commit
+
         self.data_hash = self.calculate_data_hash()
+        self.latitude, self.longitude, self.geo_cell = locate(self.zipcode)
+        derived = derive({field: getattr(self, field) for field in HASH_FIELDS})
+        for field, value in zip(DERIVED_FIELDS, derived):
+            setattr(self, field, value)
+        zipcodes = {self.zipcode, getattr(self, "_loaded_zipcode", None)}
         super().save(*args, **kwargs)
+        self._loaded_zipcode = self.zipcode
+        refresh_on_commit(zipcodes, using=self._state.db or "default")
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        from .summary import refresh_on_commit
+
+        using = kwargs.get("using") or self._state.db or "default"
+        result = super().delete(*args, **kwargs)
+        refresh_on_commit([self.zipcode], using=using)
+        return result
 
     class Meta:
         ordering = ["-zestimate_amount"]
+        indexes = [
+            # Range filters and ordering fields exposed by the listings API.
+            models.Index(fields=["price"], name="listing_price_idx"),
+            models.Index(
+                fields=["last_sold_price"], name="listing_last_sold_price_idx"
+            ),
+            models.Index(fields=["rent_price"], name="listing_rent_price_idx"),
+            models.Index(
+                fields=["rentzestimate_amount"], name="listing_rentzestimate_idx"
+            ),
+            models.Index(fields=["tax_value"], name="listing_tax_value_idx"),
+            models.Index(fields=["zestimate_amount"], name="listing_zestimate_idx"),
+            models.Index(fields=["bedrooms"], name="listing_bedrooms_idx"),
+            models.Index(fields=["bathrooms"], name="listing_bathrooms_idx"),
+            models.Index(fields=["home_size"], name="listing_home_size_idx"),
+            models.Index(fields=["property_size"], name="listing_property_size_idx"),
+            models.Index(fields=["year_built"], name="listing_year_built_idx"),
+            models.Index(fields=["price_per_sqft"], name="listing_price_per_sqft_idx"),
+            models.Index(fields=["rent_yield_bps"], name="listing_rent_yield_bps_idx"),
+            models.Index(
+                fields=["zestimate_delta"], name="listing_zestimate_delta_idx"
+            ),
+            # Equality filter combined with a price range or price ordering.
+            models.Index(
+                fields=["home_type", "price"], name="listing_home_type_price_idx"
+            ),
+            # ``state`` is filtered with iexact, i.e. UPPER(state) = UPPER(%s).
+            models.Index(Upper("state"), "price", name="listing_state_price_idx"),
+            # Default API ordering, with the primary key as a tiebreaker.
+            models.Index(fields=["created_at", "id"], name="listing_created_at_id_idx"),
+            # Summary refreshes recompute listings by zipcode.
+            models.Index(fields=["zipcode"], name="listing_zipcode_idx"),
+            # Location filters on SQLite; PostgreSQL uses a GiST index.
+            models.Index(fields=["geo_cell"], name="listing_geo_cell_idx"),
+        ]
+
+
+class ListingSummary(models.Model):
+    """
+    Listing count and price aggregates per (state, city, zipcode, home_type,
+    bedrooms) group, maintained by ``api.summary.refresh_summaries``.
+    """
+
+    state = models.CharField(max_length=2)
+    city = models.CharField(max_length=100)
+    zipcode = models.CharField(max_length=10)
+    home_type = models.CharField(max_length=50)
+    bedrooms = models.IntegerField(null=True)
+
+    count = models.IntegerField()
+    # Per summarized price field: non-null values, and their sum, min and max
+    # in cents.
+    price_count = models.IntegerField()
+    price_sum = models.BigIntegerField(null=True)
+    price_min = models.BigIntegerField(null=True)
+    price_max = models.BigIntegerField(null=True)
+    rent_price_count = models.IntegerField()
+    rent_price_sum = models.BigIntegerField(null=True)
+    rent_price_min = models.IntegerField(null=True)
+    rent_price_max = models.IntegerField(null=True)
+    zestimate_amount_count = models.IntegerField()
+    zestimate_amount_sum = models.BigIntegerField(null=True)
+    zestimate_amount_min = models.IntegerField(null=True)
+    zestimate_amount_max = models.IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["zipcode"], name="listing_summary_zipcode_idx"),
+            models.Index(
+                fields=["state", "city"], name="listing_summary_state_city_idx"
+            ),
+        ]
+
+
+class ImportGeneration(models.Model):
+    """
+    The single row holding the current import generation (see ``api.cache``),
+    shared by every process.
+    """
+
+    generation = models.BigIntegerField()
+    started_at = models.DateTimeField()
@@ -1,21 +1,264 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple, cast
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import count_listings
+
+
+class ListingPaginator(Paginator):
+    """Paginator that counts querysets through ``count_listings``."""
+
+    count_estimated = False
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):  # e.g. ``SnapshotRows``
+            return len(self.object_list)
+        queryset = cast(QuerySet, self.object_list)
+        count, self.count_estimated = count_listings(queryset)
+        return count
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+    django_paginator_class = ListingPaginator
 
     def get_count(self, queryset):
         """
         Override to ensure we're getting the count after all filters are applied.
         """
-        return queryset.count()
+        return count_listings(queryset)[0]
 
     def get_paginated_response(self, data):
         """
         Override to ensure count is calculated after all filters are applied.
+
+        ``estimated_count`` is true when ``count`` is a planner estimate.
+        """
+        paginator = self.page.paginator
+        return Response(
+            OrderedDict(
+                [
+                    ("count", paginator.count),
+                    ("estimated_count", paginator.count_estimated),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["estimated_count"] = {"type": "boolean"}
+        return response_schema
+
+
+def _cursor_value(value: Any) -> Any:
+    # Unlike DjangoJSONEncoder, keep full microsecond precision so that rows
+    # equal to the cursor are matched exactly.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _reverse(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over the queryset's active ordering, with ``id`` as
+    the tiebreaker.
+
+    Pages continue from the ordering values of the last (or first) row of the
+    previous page instead of an OFFSET, and no count is run, so every page
+    costs the same. Cursors are opaque and only valid for the ordering they
+    were issued with. Null values sort where the database puts them, as in
+    the page number mode.
+    """
+
+    page_size = CustomPageNumberPagination.page_size
+    page_size_query_param = CustomPageNumberPagination.page_size_query_param
+    max_page_size = CustomPageNumberPagination.max_page_size
+    cursor_query_param = "cursor"
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+
+        ordering = [_reverse(f) for f in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        rows: List[Any] = []
+        for segment in self.segments(queryset, ordering, values):
+            rows.extend(segment[: page_size + 1 - len(rows)])
+            if len(rows) > page_size:
+                break
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else values is not None
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request: Any) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset: QuerySet) -> List[str]:
+        """The queryset's ordering field names, ending with the tiebreaker."""
+        ordering = [
+            field
+            for field in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(field, str)
+        ]
+        names = {field.lstrip("-") for field in ordering}
+        if self.tiebreaker not in names and "pk" not in names:
+            descending = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(f"-{self.tiebreaker}" if descending else self.tiebreaker)
+        return ordering
+
+    def segments(
+        self, queryset: QuerySet, ordering: Sequence[str], values: Optional[Sequence]
+    ) -> List[QuerySet]:
+        """Querysets that return the rows after ``values``, one after another.
+
+        The leading ordering field gets a plain range condition the database
+        can seek its index with. Rows where that field is null go in a separate
+        segment, since an ``OR ... IS NULL`` would defeat the index.
         """
-        response = super().get_paginated_response(data)
-        response.data["count"] = self.page.paginator.count
-        return response
+        if values is None:
+            return [queryset]
+        field, value = ordering[0], values[0]
+        name = field.lstrip("-")
+        rest = self.after(queryset, ordering[1:], values[1:])
+        nulls_after = self.nulls_after(queryset, field)
+        if value is None:
+            ties = queryset.filter(Q(**{f"{name}__isnull": True}) & rest)
+            if nulls_after:
+                return [ties]
+            return [ties, queryset.filter(**{f"{name}__isnull": False})]
+        lookup = "lt" if field.startswith("-") else "gt"
+        bounded = queryset.filter(**{f"{name}__{lookup}e": value}).filter(
+            Q(**{f"{name}__{lookup}": value}) | Q(**{name: value}) & rest
+        )
+        if nulls_after and self.is_nullable(queryset, name):
+            return [bounded, queryset.filter(**{f"{name}__isnull": True})]
+        return [bounded]
+
+    def after(self, queryset: QuerySet, ordering: Sequence[str], values: Sequence) -> Q:
+        """Condition for rows that sort after ``values`` under ``ordering``."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            nulls_after = self.nulls_after(queryset, field)
+            if value is None:
+                beyond = (
+                    Q(pk__in=[]) if nulls_after else Q(**{f"{name}__isnull": False})
+                )
+                equal_value = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if field.startswith("-") else "gt"
+                beyond = Q(**{f"{name}__{lookup}": value})
+                if nulls_after and self.is_nullable(queryset, name):
+                    beyond |= Q(**{f"{name}__isnull": True})
+                equal_value = Q(**{name: value})
+            condition |= equal & beyond
+            equal &= equal_value
+        return condition
+
+    @staticmethod
+    def nulls_after(queryset: QuerySet, field: str) -> bool:
+        """Whether nulls sort after every value of ``field`` on this database."""
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+        return nulls_largest != field.startswith("-")
+
+    @staticmethod
+    def is_nullable(queryset: QuerySet, name: str) -> bool:
+        opts = queryset.model._meta
+        return bool((opts.pk if name == "pk" else opts.get_field(name)).null)
+
+    def decode_cursor(self, request: Any) -> Tuple[Optional[List[Any]], bool]:
+        """Return the cursor's ordering values and direction; None on page one."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(encoded + padding))
+            ordering, values, reverse = payload["o"], payload["v"], payload["r"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(reverse)
+
+    def encode_cursor(self, row: Any, reverse: bool) -> str:
+        values = [getattr(row, field.lstrip("-")) for field in self.ordering]
+        payload = {"o": self.ordering, "v": values, "r": reverse}
+        data = json.dumps(payload, default=_cursor_value, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(data.encode())
+        return encoded.decode().rstrip("=")
+
+    def get_link(self, row: Any, reverse: bool) -> str:
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        cursor = self.encode_cursor(row, reverse)
+        link: str = replace_query_param(url, self.cursor_query_param, cursor)
+        return link
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.rows:
+            return None
+        return self.get_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.rows:
+            return None
+        return self.get_link(self.rows[0], reverse=True)
@@ -0,0 +1,93 @@
+"""Canonical forms of listing API query strings.
+
+Different query strings often select the same listings: parameters in a
+different order, ``price_min=500K`` versus ``price_min=50000000``, or
+``city=encino`` versus ``city=Encino``. ``canonical_query`` maps them to one
+string so caches can share entries between them.
+"""
+
+from typing import List, Tuple
+from urllib.parse import parse_qsl
+
+from django.http import QueryDict
+from django.utils.http import urlencode
+
+from .models import PRICE_FIELDS
+from .ranges import parse_price_bound
+
+PRICE_PARAMS = {
+    f"{field}_{bound}" for field in PRICE_FIELDS for bound in ("min", "max")
+}
+
+# Matched case-insensitively by the API.
+CASE_INSENSITIVE_PARAMS = {"address", "city", "state", "zipcode"}
+
+# Comma-separated lists of values, matched in any order.
+LIST_PARAMS = {
+    "bedrooms",
+    "bathrooms",
+    "fields",
+    "exclude",
+    "metrics",
+    "aggregates",
+    "facets",
+}
+
+# Parameters whose empty value is meaningful (an empty cursor selects
+# keyset pagination).
+KEEP_EMPTY_PARAMS = {"cursor"}
+
+
+def canonical_value(name: str, value: str) -> str:
+    value = value.strip()
+    if name in PRICE_PARAMS:
+        cents = parse_price_bound(value)
+        return value if cents is None else str(cents)
+    if name in CASE_INSENSITIVE_PARAMS:
+        return value.lower()
+    if name == "search":
+        # SearchFilter splits terms on whitespace and commas and ANDs them.
+        return " ".join(sorted(set(value.lower().replace(",", " ").split())))
+    if name in LIST_PARAMS:
+        return ",".join(sorted({v.strip() for v in value.split(",") if v.strip()}))
+    return value
+
+
+def canonical_query(params: QueryDict) -> str:
+    """Return a canonical query string for listing API parameters.
+
+    Like the API, only the last value of a repeated parameter is used. Empty
+    parameters and ``page=1`` are dropped, since the API ignores them.
+    """
+    items: List[Tuple[str, str]] = []
+    for name, values in params.lists():
+        value = canonical_value(name, values[-1])
+        if not value and name not in KEEP_EMPTY_PARAMS:
+            continue
+        if name == "page" and value == "1":
+            continue
+        items.append((name, value))
+    return urlencode(sorted(items))
+
+
+# Parameters that page through or shape the output of a result set without
+# changing which listings it selects.
+PAGING_PARAMS = {"page", "page_size", "fields", "exclude", "serializer"}
+
+# Parameters whose value changes the query plan, not just its selectivity.
+PLAN_PARAMS = {"ordering", "group_by", "metrics", "aggregates", "facets", "output"}
+
+
+def filter_signature(params: QueryDict) -> str:
+    """Return the shape of a listing API query, for grouping requests in logs.
+
+    Filter values are dropped (``city=encino`` and ``city=tarzana`` share a
+    signature), as are paging parameters; parameters that change the query
+    plan, such as ``ordering``, keep their canonical value.
+    """
+    names = []
+    for name, value in parse_qsl(canonical_query(params), keep_blank_values=True):
+        if name in PAGING_PARAMS:
+            continue
+        names.append(f"{name}={value}" if name in PLAN_PARAMS else name)
+    return "&".join(names)
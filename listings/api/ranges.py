@@ -0,0 +1,113 @@
+"""Declarative ``<field>_min``/``<field>_max`` range filters.
+
+A ``RangeFilterSet`` declares the model fields that take a range::
+
+    class ListingFilter(RangeFilterSet):
+        range_fields = ["home_size", "bedrooms"]
+        price_range_fields = ["price"]
+
+and gets a ``_min`` and a ``_max`` filter for each. The bounds are validated
+by the filter form like any other filter, but instead of each adding its own
+``.filter()`` call they are collected after the other filters run and applied
+as a single condition, with ``field BETWEEN min AND max`` when both bounds of
+a field are given. A range whose minimum exceeds its maximum, or a price bound
+that cannot be parsed, matches nothing and short-circuits to ``none()``.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from django import forms
+from django.db.models import Q, QuerySet
+from django_filters import filters
+from django_filters.filterset import FilterSet, FilterSetMetaclass
+
+from .utils import convert_price_param_to_cents
+
+BOUNDS = ("min", "max")
+
+
+@lru_cache(maxsize=1024)
+def parse_price_bound(value: str) -> Optional[int]:
+    """Memoized ``convert_price_param_to_cents`` for price range parameters."""
+    cents: Optional[int] = convert_price_param_to_cents(value)
+    return cents
+
+
+class RangeBoundFilter(filters.Filter):
+    """One bound of a declared range.
+
+    ``filter`` leaves the queryset alone; ``RangeFilterSet`` applies the bounds
+    of every range together.
+    """
+
+    field_class: Type[forms.Field] = forms.DecimalField
+
+    def __init__(self, *args: Any, bound: str, price: bool = False, **kwargs: Any):
+        self.bound = bound
+        self.price = price
+        if price:
+            # Prices accept formats like 500K, $1.5M and 1,200,000.
+            self.field_class = forms.CharField
+        kwargs.setdefault("lookup_expr", "gte" if bound == "min" else "lte")
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs: QuerySet, value: Any) -> QuerySet:
+        return qs
+
+
+class RangeFilterSetMetaclass(FilterSetMetaclass):
+    """Declares the bound filters of ``range_fields`` and ``price_range_fields``."""
+
+    def __new__(cls, name: str, bases: Tuple[type, ...], attrs: Dict[str, Any]) -> Any:
+        for attribute, price in (("range_fields", False), ("price_range_fields", True)):
+            for field in attrs.get(attribute, []):
+                for bound in BOUNDS:
+                    attrs.setdefault(
+                        f"{field}_{bound}",
+                        RangeBoundFilter(field_name=field, bound=bound, price=price),
+                    )
+        return super().__new__(cls, name, bases, attrs)
+
+
+class RangeFilterSet(FilterSet, metaclass=RangeFilterSetMetaclass):
+    """FilterSet that applies all of its range bounds as one condition."""
+
+    range_fields: List[str] = []
+    price_range_fields: List[str] = []
+
+    def get_range_bounds(self) -> Optional[Dict[str, List[Any]]]:
+        """``{field: [min, max]}`` for the ranges in the request.
+
+        Returns None when the bounds cannot match any row.
+        """
+        ranges: Dict[str, List[Any]] = {}
+        for name, value in self.form.cleaned_data.items():
+            bound_filter = self.filters[name]
+            if not isinstance(bound_filter, RangeBoundFilter) or value in (None, ""):
+                continue
+            if bound_filter.price:
+                value = parse_price_bound(value)
+                if value is None:
+                    return None
+            bounds = ranges.setdefault(bound_filter.field_name, [None, None])
+            bounds[BOUNDS.index(bound_filter.bound)] = value
+        for low, high in ranges.values():
+            if low is not None and high is not None and low > high:
+                return None
+        return ranges
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        queryset = super().filter_queryset(queryset)
+        ranges = self.get_range_bounds()
+        if ranges is None:
+            return queryset.none()
+        condition = Q()
+        for field, (low, high) in ranges.items():
+            if low is not None and high is not None:
+                condition &= Q(**{f"{field}__range": (low, high)})
+            elif low is not None:
+                condition &= Q(**{f"{field}__gte": low})
+            else:
+                condition &= Q(**{f"{field}__lte": high})
+        return queryset.filter(condition) if condition else queryset
@@ -0,0 +1,80 @@
+"""JSON rendering with orjson, falling back to the stdlib encoder.
+
+orjson is an optional dependency. When it is installed, ``dumps`` and
+``FastJSONRenderer`` encode with it; values orjson does not handle itself
+(``Decimal``, dates and datetimes, lazy strings) are passed to DRF's
+``JSONEncoder`` so the output matches ``JSONRenderer`` byte for byte. When it
+is not installed, both fall back to the stdlib ``json`` module.
+"""
+
+import json
+from types import ModuleType
+from typing import Any, Optional
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# DRF formats datetimes (millisecond precision, "Z" for UTC) differently from
+# orjson, so they go through DRF's encoder too.
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+_encoder = JSONEncoder()
+
+
+def _escape_line_separators(data: bytes) -> bytes:
+    # Like JSONRenderer, escape U+2028 and U+2029 so the output is also valid
+    # JavaScript.
+    if b"\xe2\x80\xa8" in data or b"\xe2\x80\xa9" in data:
+        data = data.replace(b"\xe2\x80\xa8", b"\\u2028")
+        data = data.replace(b"\xe2\x80\xa9", b"\\u2029")
+    return data
+
+
+def dumps(data: Any) -> bytes:
+    """Encode ``data`` as compact UTF-8 JSON, like ``JSONRenderer``."""
+    if orjson is not None:
+        encoded = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    else:
+        encoded = json.dumps(
+            data,
+            cls=JSONEncoder,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode()
+    return _escape_line_separators(encoded)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Pretty-printed output (``indent``) and non-default JSON settings are
+    rendered by ``JSONRenderer``. Rendering time is recorded for the request
+    metrics (see ``api.instrumentation``).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("render"):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
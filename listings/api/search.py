@@ -0,0 +1,166 @@
+"""Indexed substring search over the listing address columns.
+
+``search`` and the ``address``/``city``/``zipcode`` filters match
+case-insensitive substrings, which the ORM compiles to
+``UPPER(col) LIKE '%x%'``. A B-tree index cannot serve that, so each
+database gets a trigram index instead:
+
+- PostgreSQL: a ``pg_trgm`` GIN index on ``UPPER(col)`` for every column.
+  These match the expressions Django generates for ``icontains``, so the
+  planner uses them for the ordinary ORM lookups.
+- SQLite: an FTS5 table with the ``trigram`` tokenizer that mirrors the
+  columns through triggers (``api_listing_search``). Lookups are rewritten
+  to ``id IN (SELECT rowid ... MATCH ...)``.
+
+Terms shorter than a trigram cannot use either index and fall back to a
+plain ``icontains`` scan.
+"""
+
+import operator
+import sqlite3
+from functools import reduce
+from typing import Any, Iterable, List, Sequence
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ["address", "city", "state", "zipcode"]
+SEARCH_TABLE = "api_listing_search"
+
+# Trigram indexes can only serve terms of at least this many characters.
+MIN_TERM_LENGTH = 3
+
+POSTGRES_CREATE_SQL = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+    f"CREATE INDEX IF NOT EXISTS listing_{field}_trgm_idx "
+    f"ON api_listing USING gin (UPPER({field}) gin_trgm_ops)"
+    for field in SEARCH_FIELDS
+]
+POSTGRES_DROP_SQL = [
+    f"DROP INDEX IF EXISTS listing_{field}_trgm_idx" for field in SEARCH_FIELDS
+]
+
+_columns = ", ".join(SEARCH_FIELDS)
+_new_values = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+_old_values = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+_delete_old = (
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values});"
+)
+_insert_new = (
+    f"INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});"
+)
+
+SQLITE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"{_columns}, content='api_listing', content_rowid='id', tokenize='trigram')"
+)
+SQLITE_TRIGGER_SQL = [
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON api_listing "
+    f"BEGIN {_insert_new} END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON api_listing "
+    f"BEGIN {_delete_old} END",
+    f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update "
+    f"AFTER UPDATE OF {_columns} ON api_listing "
+    f"BEGIN {_delete_old} {_insert_new} END",
+]
+SQLITE_REBUILD_SQL = f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+SQLITE_DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+
+def sqlite_search_supported(connection: Any) -> bool:
+    """FTS5's trigram tokenizer needs SQLite 3.34."""
+    return connection.vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def create_search_index(connection: Any) -> None:
+    """Create the search index for ``connection``'s database, if supported."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for sql in POSTGRES_CREATE_SQL:
+                cursor.execute(sql)
+        elif sqlite_search_supported(connection):
+            cursor.execute(SQLITE_TABLE_SQL)
+            for sql in SQLITE_TRIGGER_SQL:
+                cursor.execute(sql)
+            cursor.execute(SQLITE_REBUILD_SQL)
+
+
+def drop_search_index(connection: Any) -> None:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            statements = POSTGRES_DROP_SQL
+        elif connection.vendor == "sqlite":
+            statements = SQLITE_DROP_SQL
+        else:
+            statements = []
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def restore_sqlite_triggers(using: str = "default", **kwargs: Any) -> None:
+    """Recreate the FTS5 triggers after a migration rebuilt ``api_listing``.
+
+    SQLite migrations that alter ``api_listing`` copy it into a new table and
+    drop the old one, which drops its triggers. Connected to ``post_migrate``.
+    """
+    connection = connections[using]
+    if not sqlite_search_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if SEARCH_TABLE not in tables:
+            return
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'api_listing' AND name LIKE %s",
+            [f"{SEARCH_TABLE}_%"],
+        )
+        if cursor.fetchone()[0] == len(SQLITE_TRIGGER_SQL):
+            return
+        for sql in SQLITE_TRIGGER_SQL:
+            cursor.execute(sql)
+        cursor.execute(SQLITE_REBUILD_SQL)
+
+
+def _fts_phrase(fields: Sequence[str], term: str) -> str:
+    quoted = term.replace('"', '""')
+    return f'{{{" ".join(fields)}}} : "{quoted}"'
+
+
+def _icontains(fields: Sequence[str], term: str) -> Q:
+    return reduce(
+        operator.or_, (Q(**{f"{field}__icontains": term}) for field in fields)
+    )
+
+
+def search(queryset: QuerySet, terms: Iterable[str], fields: Sequence[str]) -> QuerySet:
+    """Keep rows where every term is a case-insensitive substring of a field.
+
+    Matches the semantics of DRF's ``SearchFilter``: terms are ANDed, and a
+    term matches when any of ``fields`` contains it.
+    """
+    indexed: List[str] = []
+    for term in terms:
+        if (
+            len(term) >= MIN_TERM_LENGTH
+            and set(fields) <= set(SEARCH_FIELDS)
+            and sqlite_search_supported(connections[queryset.db])
+        ):
+            indexed.append(term)
+        else:
+            queryset = queryset.filter(_icontains(fields, term))
+    if indexed:
+        match = " AND ".join(_fts_phrase(fields, term) for term in indexed)
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+                [match],
+            )
+        )
+    return queryset
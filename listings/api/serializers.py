@@ -1,19 +1,44 @@
+import decimal
+from operator import attrgetter
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Listing
-from .utils import format_price_from_cents
+from .instrumentation import timed
+from .models import DISPLAY_FIELDS, Listing
+
+
+class ListingListSerializer(serializers.ListSerializer):
+    """ListSerializer that records its serialization time (see
+    ``api.instrumentation``)."""
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
 
 
 class ListingSerializer(serializers.ModelSerializer):
-    price = serializers.SerializerMethodField()
-    last_sold_price = serializers.SerializerMethodField()
-    rent_price = serializers.SerializerMethodField()
-    rentzestimate_amount = serializers.SerializerMethodField()
-    tax_value = serializers.SerializerMethodField()
-    zestimate_amount = serializers.SerializerMethodField()
+    """Serializes listings; pass ``fields`` to serialize only some of them."""
+
+    # Prices are returned as their stored display strings.
+    price = serializers.CharField(source="price_display", read_only=True)
+    last_sold_price = serializers.CharField(
+        source="last_sold_price_display", read_only=True
+    )
+    rent_price = serializers.CharField(source="rent_price_display", read_only=True)
+    rentzestimate_amount = serializers.CharField(
+        source="rentzestimate_amount_display", read_only=True
+    )
+    tax_value = serializers.CharField(source="tax_value_display", read_only=True)
+    zestimate_amount = serializers.CharField(
+        source="zestimate_amount_display", read_only=True
+    )
 
     class Meta:
         model = Listing
+        list_serializer_class = ListingListSerializer
         fields = [
             "id",
             "zillow_id",
@@ -39,38 +64,122 @@ class ListingSerializer(serializers.ModelSerializer):
             "city",
             "state",
             "zipcode",
+            "latitude",
+            "longitude",
+            "price_per_sqft",
+            "rent_yield_bps",
+            "zestimate_delta",
             "created_at",
             "updated_at",
             "last_imported_at",
             "data_hash",
         ]
 
-    def get_price(self, obj):
-        return format_price_from_cents(obj.price) if obj.price else None
-
-    def get_last_sold_price(self, obj):
-        return (
-            format_price_from_cents(obj.last_sold_price)
-            if obj.last_sold_price
-            else None
-        )
-
-    def get_rent_price(self, obj):
-        return format_price_from_cents(obj.rent_price) if obj.rent_price else None
-
-    def get_rentzestimate_amount(self, obj):
-        return (
-            format_price_from_cents(obj.rentzestimate_amount)
-            if obj.rentzestimate_amount
-            else None
-        )
-
-    def get_tax_value(self, obj):
-        return format_price_from_cents(obj.tax_value) if obj.tax_value else None
-
-    def get_zestimate_amount(self, obj):
-        return (
-            format_price_from_cents(obj.zestimate_amount)
-            if obj.zestimate_amount
-            else None
-        )
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class ListingRowSerializer:
+    """
+    Fast path with the same output as ``ListingSerializer``.
+
+    Works on ``values_list`` rows whose leading columns are ``columns`` (or on
+    model instances) and converts each row in one loop over converters chosen
+    once per field, skipping DRF's per-field ``get_attribute``/
+    ``to_representation`` dispatch. Only the read side of the serializer API
+    is implemented.
+    """
+
+    fields: List[str] = ListingSerializer.Meta.fields
+    # Model fields holding ``fields``; prices are read from their display columns.
+    columns: List[str] = [DISPLAY_FIELDS.get(name, name) for name in fields]
+    _drf_fields: Optional[Any] = None
+
+    def __init__(
+        self,
+        instance: Any = None,
+        many: bool = False,
+        fields: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ):
+        self.instance = instance
+        self.many = many
+        if fields is not None:
+            self.fields = [name for name in type(self).fields if name in fields]
+            self.columns = [DISPLAY_FIELDS.get(name, name) for name in self.fields]
+
+    def converters(self) -> List[Optional[Callable[[Any], Any]]]:
+        """One converter per field, or None where the value is used as is."""
+        cls = type(self)
+        if cls._drf_fields is None:
+            cls._drf_fields = ListingSerializer().fields
+        tz = timezone.get_current_timezone()
+        return [self.converter(name, cls._drf_fields[name], tz) for name in self.fields]
+
+    @staticmethod
+    def converter(name: str, field: serializers.Field, tz: Any) -> Optional[Callable]:
+        if isinstance(field, serializers.DecimalField):
+            exponent = decimal.Decimal(".1") ** field.decimal_places
+            context = decimal.getcontext().copy()
+            context.prec = field.max_digits
+
+            def to_decimal_string(value: Any) -> str:
+                if not isinstance(value, decimal.Decimal):
+                    value = decimal.Decimal(str(value).strip())
+                return "{:f}".format(value.quantize(exponent, context=context))
+
+            return to_decimal_string
+        if isinstance(field, serializers.DateTimeField):
+
+            def to_datetime_string(value: Any) -> Any:
+                if isinstance(value, str) or value.tzinfo is None:
+                    return field.to_representation(value)
+                value = value.astimezone(tz).isoformat()
+                return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+            return to_datetime_string
+        if isinstance(field, serializers.DateField):
+            to_date_string: Callable[[Any], Any] = field.to_representation
+            return to_date_string
+        return None
+
+    def to_representation(self, row: Any) -> dict:
+        return self.to_representations([row])[0]
+
+    def to_representations(self, rows: Iterable[Any]) -> List[dict]:
+        fields = self.fields
+        width = len(fields)
+        get_values = attrgetter(*self.columns)
+        converters = [
+            (position, convert)
+            for position, convert in enumerate(self.converters())
+            if convert is not None
+        ]
+        data = []
+        for row in rows:
+            if isinstance(row, tuple):
+                values = list(row[:width])
+            else:
+                values = list(get_values(row)) if width > 1 else [get_values(row)]
+            for position, convert in converters:
+                value = values[position]
+                if value is not None:
+                    values[position] = convert(value)
+            data.append(dict(zip(fields, values)))
+        return data
+
+    @property
+    def data(self) -> Any:
+        with timed("serialize"):
+            if self.many:
+                return self.to_representations(self.instance)
+            return self.to_representation(self.instance)
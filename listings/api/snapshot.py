@@ -0,0 +1,317 @@
+"""In-process columnar snapshot of the listing table for list requests.
+
+Listings only change on import, so a worker can answer the common list
+requests - numeric range filters, ``bedrooms``/``bathrooms`` lists and
+ordering by one numeric field - from memory, and ask the database only for
+the rows of the page it returns.
+
+The snapshot holds one ``array`` per numeric column (nulls as NaN) and, per
+column, the row positions in ascending order of that column. Range filters
+are answered by bisecting the sorted positions; the smallest match is checked
+against the remaining predicates, then ordered either by sorting the matches
+or, for large results, by walking the ordering column's positions. Nulls
+sort like they do on the database.
+
+The snapshot is off unless ``LISTINGS_SNAPSHOT`` is set. Each process builds
+it on first use (``warm_snapshot`` builds it at startup) and rebuilds it when
+the import generation changes, which is read from the database, so imports
+made by other processes are noticed; while one thread rebuilds, other
+requests use the database. It costs about 200 bytes per listing: an 8-byte
+id, plus an 8-byte value and an 8-byte sorted position per column.
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+
+from .cache import GenerationLocal
+from .models import PRICE_FIELDS, Listing
+
+SNAPSHOT_FIELDS = PRICE_FIELDS + [
+    "bedrooms",
+    "bathrooms",
+    "home_size",
+    "property_size",
+    "year_built",
+]
+# Columns held only to order by.
+ORDER_ONLY_FIELDS = ["created_at"]
+# ``ListingFilter`` list filters the snapshot answers, with their value type.
+MEMBER_FIELDS = {"bedrooms": int, "bathrooms": float}
+
+# Results larger than this share of the table are ordered by walking the
+# ordering column's positions instead of sorting the matches.
+SORT_THRESHOLD = 0.05
+
+BUILD_CHUNK_SIZE = 10_000
+NULL = math.nan
+
+Range = Tuple[Optional[float], Optional[float]]
+
+
+def _number(value: Any) -> float:
+    if value is None:
+        return NULL
+    if hasattr(value, "timestamp"):
+        return float(value.timestamp())
+    return float(value)
+
+
+def _bisect(
+    order: array, values: array, target: float, lo: int, hi: int, right: bool
+) -> int:
+    """``bisect_left``/``bisect_right`` of ``target`` in ``order[lo:hi]`` by value.
+
+    ``bisect``'s ``key`` argument needs Python 3.10.
+    """
+    while lo < hi:
+        middle = (lo + hi) // 2
+        value = values[order[middle]]
+        if value < target or (right and value == target):
+            lo = middle + 1
+        else:
+            hi = middle
+    return lo
+
+
+class Column:
+    """One numeric column and its row positions in ascending order."""
+
+    __slots__ = ("values", "order", "nulls_first", "null_count")
+
+    def __init__(self, values: array, nulls_first: bool):
+        self.values = values
+        self.nulls_first = nulls_first
+        nulls = [p for p, value in enumerate(values) if value != value]
+        present = [p for p, value in enumerate(values) if value == value]
+        # A stable sort keeps equal values in position (id) order.
+        present.sort(key=values.__getitem__)
+        self.null_count = len(nulls)
+        self.order = array("l", nulls + present if nulls_first else present + nulls)
+
+    def between(self, low: Optional[float], high: Optional[float]) -> Sequence[int]:
+        """Positions of the rows with ``low <= value <= high``, in value order."""
+        start = self.null_count if self.nulls_first else 0
+        end = len(self.order) - (0 if self.nulls_first else self.null_count)
+        if low is not None:
+            start = _bisect(self.order, self.values, low, start, end, right=False)
+        if high is not None:
+            end = _bisect(self.order, self.values, high, start, end, right=True)
+        return self.order[start:end]
+
+    def sort_key(self, position: int) -> Tuple[int, float]:
+        value = self.values[position]
+        if value != value:
+            return (0 if self.nulls_first else 2, 0.0)
+        return (1, value)
+
+
+class ListingSnapshot:
+    """Columns of every listing at one import generation."""
+
+    def __init__(self, generation: int, ids: array, columns: Dict[str, Column]):
+        self.generation = generation
+        self.ids = ids
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, generation: int, using: str = "default") -> "ListingSnapshot":
+        fields = SNAPSHOT_FIELDS + ORDER_ONLY_FIELDS
+        ids = array("q")
+        values = [array("d") for _ in fields]
+        rows = (
+            Listing.objects.using(using)
+            .order_by("id")
+            .values_list("id", *fields)
+            .iterator(chunk_size=BUILD_CHUNK_SIZE)
+        )
+        for row in rows:
+            ids.append(row[0])
+            for column, value in zip(values, row[1:]):
+                column.append(_number(value))
+        nulls_first = not connections[using].features.nulls_order_largest
+        columns = {
+            field: Column(column, nulls_first) for field, column in zip(fields, values)
+        }
+        return cls(generation, ids, columns)
+
+    def select(
+        self,
+        ranges: Dict[str, Range],
+        members: Mapping[str, Iterable[float]],
+    ) -> Optional[List[int]]:
+        """Positions of the rows matching every range and member list, in
+        position order; None when nothing filters the rows.
+
+        Null values match nothing.
+        """
+        predicates: List[Tuple[Column, List[Range]]] = []
+        for field in {**ranges, **members}:
+            low, high = ranges.get(field, (None, None))
+            bounds: List[Range]
+            if field in members:
+                # A member list within a range: keep the members in range.
+                bounds = [
+                    (value, value)
+                    for value in sorted(set(members[field]))
+                    if (low is None or value >= low) and (high is None or value <= high)
+                ]
+            else:
+                bounds = [(low, high)]
+            predicates.append((self.columns[field], bounds))
+        if not predicates:
+            return None
+        candidates: List[int] = []
+        narrowest: Optional[int] = None
+        for index, (column, bounds) in enumerate(predicates):
+            matches = [column.between(low, high) for low, high in bounds]
+            if narrowest is None or sum(map(len, matches)) < len(candidates):
+                candidates = [p for match in matches for p in match]
+                narrowest = index
+        for index, (column, bounds) in enumerate(predicates):
+            if index == narrowest:
+                continue
+            values = column.values
+            candidates = [
+                p
+                for p in candidates
+                if any(
+                    (low is None or values[p] >= low)
+                    and (high is None or values[p] <= high)
+                    for low, high in bounds
+                )
+            ]
+        candidates.sort()
+        return candidates
+
+    def query(
+        self,
+        ranges: Dict[str, Range],
+        members: Mapping[str, Iterable[float]],
+        ordering: str,
+    ) -> "SnapshotIds":
+        """Ids of the rows matching ``ranges`` and ``members`` (see ``select``),
+        ordered by an ordering term such as ``price`` or ``-price``."""
+        name = ordering.lstrip("-")
+        if not members and list(ranges) == [name]:
+            # A range on the ordering column is already in order.
+            positions = self.columns[name].between(*ranges[name])
+            return SnapshotIds(self.ids, positions, ordering.startswith("-"))
+        return self.order(self.select(ranges, members), ordering)
+
+    def order(self, positions: Optional[List[int]], ordering: str) -> "SnapshotIds":
+        """Order ``positions`` (every row when None) by an ordering term."""
+        descending = ordering.startswith("-")
+        column = self.columns[ordering.lstrip("-")]
+        if positions is None:
+            ordered: Sequence[int] = column.order
+        elif len(positions) <= SORT_THRESHOLD * len(self):
+            ordered = sorted(positions, key=column.sort_key)
+        else:
+            mask = bytearray(len(self))
+            for p in positions:
+                mask[p] = 1
+            ordered = [p for p in column.order if mask[p]]
+        return SnapshotIds(self.ids, ordered, descending)
+
+
+class SnapshotIds:
+    """Listing ids of a snapshot result, in order; sliced lazily."""
+
+    def __init__(self, ids: array, positions: Sequence[int], descending: bool):
+        self.ids = ids
+        self.positions = positions
+        self.descending = descending
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: slice) -> List[int]:
+        start, stop, _ = index.indices(len(self))
+        if self.descending:
+            size = len(self)
+            start, stop = size - stop, size - start
+            return [self.ids[p] for p in reversed(self.positions[start:stop])]
+        return [self.ids[p] for p in self.positions[start:stop]]
+
+
+class SnapshotRows:
+    """Rows of ``queryset`` for ``ids``, for the paginator.
+
+    Slicing fetches the rows of that slice only, by primary key.
+    """
+
+    def __init__(self, ids: SnapshotIds, queryset: QuerySet):
+        self.ids = ids
+        self.queryset = queryset
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: slice) -> List[Any]:
+        ids = self.ids[index]
+        rows = {row.id: row for row in self.queryset.filter(id__in=ids).order_by()}
+        return [rows[pk] for pk in ids if pk in rows]
+
+
+def snapshot_ids(
+    snapshot: ListingSnapshot, filterset: Any, ordering: str
+) -> Optional[SnapshotIds]:
+    """Ids of the listings matching a valid ``ListingFilter``, in ``ordering``.
+
+    Only the filterset's ranges and ``MEMBER_FIELDS`` lists are applied; the
+    caller checks that nothing else filters the request. Returns None when
+    the database should answer instead.
+    """
+    bounds = filterset.get_range_bounds()
+    if bounds is None:
+        return None
+    ranges = {
+        field: (
+            None if low is None else float(low),
+            None if high is None else float(high),
+        )
+        for field, (low, high) in bounds.items()
+    }
+    members: Dict[str, List[float]] = {}
+    for field, cast in MEMBER_FIELDS.items():
+        value = filterset.form.cleaned_data.get(field)
+        if not value:
+            continue
+        try:
+            values = [cast(v.strip()) for v in value.split(",") if v.strip()]
+        except ValueError:
+            return None
+        # An empty list (``bedrooms=,``) matches nothing, as on the database.
+        members[field] = [float(v) for v in values]
+    if any(field not in snapshot.columns for field in ranges):
+        return None
+    return snapshot.query(ranges, members, ordering)
+
+
+listing_snapshot = GenerationLocal(ListingSnapshot.build)
+
+
+def get_snapshot() -> Optional[ListingSnapshot]:
+    """The snapshot of the current import generation, built if needed.
+
+    None while another thread builds it.
+    """
+    return listing_snapshot.get()
+
+
+def warm_snapshot() -> None:
+    """Build the snapshot at startup when ``LISTINGS_SNAPSHOT`` is set."""
+    if not settings.LISTINGS_SNAPSHOT:
+        return
+    try:
+        get_snapshot()
+    except DatabaseError:  # e.g. not migrated yet; built on first use instead
+        pass
@@ -0,0 +1,143 @@
+"""Grouped listing statistics computed by the database.
+
+``listing_stats`` runs one ``GROUP BY`` query with a ``COUNT`` per group and
+the requested aggregates of the cents fields. Percentiles use
+``PERCENTILE_CONT``, which PostgreSQL provides; on SQLite it is registered as
+a user-defined aggregate on every new connection (``register_sqlite_functions``).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import NotSupportedError
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Min, QuerySet
+
+from .models import PRICE_FIELDS
+
+GROUP_BY_FIELDS = ["state", "city", "zipcode", "home_type", "bedrooms"]
+METRIC_FIELDS = PRICE_FIELDS
+AGGREGATES = {"min": Min, "max": Max, "avg": Avg}
+
+DEFAULT_METRICS = ["price"]
+DEFAULT_AGGREGATES = ["min", "max", "avg", "p50"]
+
+
+class Percentile(Aggregate):
+    """Continuous percentile (``fraction`` between 0 and 1) of an expression."""
+
+    function = "PERCENTILE_CONT"
+    name = "Percentile"
+    output_field = FloatField()
+
+    def __init__(self, expression: Any, fraction: float, **extra: Any):
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+        super().__init__(expression, fraction=repr(float(fraction)), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor == "postgresql":
+            template = (
+                "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+            )
+        elif connection.vendor == "sqlite":
+            template = "%(function)s(%(fraction)s, %(expressions)s)"
+        else:
+            raise NotSupportedError(
+                f"Percentiles are not supported on {connection.display_name}"
+            )
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class PercentileCont:
+    """SQLite aggregate matching PostgreSQL's ``percentile_cont``.
+
+    Nulls are ignored and the result is linearly interpolated between the two
+    nearest values.
+    """
+
+    def __init__(self) -> None:
+        self.values: List[float] = []
+        self.fraction = 0.0
+
+    def step(self, fraction: float, value: Optional[float]) -> None:
+        self.fraction = fraction
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self) -> Optional[float]:
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        position = self.fraction * (len(values) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def register_sqlite_functions(sender: Any, connection: Any, **kwargs: Any) -> None:
+    """Register ``percentile_cont`` on new SQLite connections.
+
+    Connected to ``connection_created``.
+    """
+    if connection.vendor == "sqlite":
+        connection.connection.create_aggregate("percentile_cont", 2, PercentileCont)
+
+
+def parse_percentile(name: str) -> Optional[float]:
+    """Return the fraction for an aggregate name like ``p90``, else None."""
+    if not name.startswith("p"):
+        return None
+    try:
+        percent = float(name[1:])
+    except ValueError:
+        return None
+    return percent / 100 if 0 <= percent <= 100 else None
+
+
+def make_aggregate(name: str, field: str) -> Aggregate:
+    if name in AGGREGATES:
+        return AGGREGATES[name](field)
+    fraction = parse_percentile(name)
+    if fraction is None:
+        raise ValueError(f"Unknown aggregate: {name}")
+    return Percentile(field, fraction)
+
+
+def listing_stats(
+    queryset: QuerySet,
+    group_by: Sequence[str],
+    metrics: Sequence[str],
+    aggregates: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """Count and aggregate ``queryset`` per distinct ``group_by`` values.
+
+    Every result has the ``group_by`` values, ``count`` and, per metric field,
+    a mapping of aggregate name to value in cents (rounded to whole cents).
+    Without ``group_by`` there is a single result for the whole queryset.
+    """
+    annotations: Dict[str, Any] = {"count": Count("pk")}
+    columns = []
+    for field in metrics:
+        for name in aggregates:
+            alias = f"stat_{len(columns)}"
+            annotations[alias] = make_aggregate(name, field)
+            columns.append((alias, field, name))
+
+    queryset = queryset.order_by()
+    if group_by:
+        rows = list(
+            queryset.values(*group_by).annotate(**annotations).order_by(*group_by)
+        )
+    else:
+        rows = [queryset.aggregate(**annotations)]
+
+    results = []
+    for row in rows:
+        result = {field: row[field] for field in group_by}
+        result["count"] = row["count"]
+        for field in metrics:
+            result[field] = {}
+        for alias, field, name in columns:
+            value = row[alias]
+            result[field][name] = None if value is None else round(value)
+        results.append(result)
+    return results
@@ -0,0 +1,175 @@
+"""Incremental maintenance of the ``ListingSummary`` table.
+
+``ListingSummary`` holds one row per (state, city, zipcode, home_type,
+bedrooms) group. Every group lies within one zipcode, so the table is
+refreshed per zipcode: the importers record the zipcodes of the listings they
+create, change or move (``ImportStats.zipcodes``), and ``refresh_summaries``
+recomputes only the groups in those zipcodes.
+
+Statistics and facet requests that only filter, group and aggregate on what
+the table holds are answered from it instead of from ``api_listing``.
+
+Single listings saved or deleted through the ORM are refreshed by
+``refresh_on_commit``, once per transaction.
+"""
+
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, QuerySet, Sum
+
+from .cache import bump_generation
+from .models import Listing, ListingSummary
+
+SUMMARY_FIELDS = ["state", "city", "zipcode", "home_type", "bedrooms"]
+SUMMARY_METRICS = ["price", "rent_price", "zestimate_amount"]
+# Aggregates that can be combined from the per-group values.
+SUMMARY_AGGREGATES = ["min", "max", "avg"]
+
+# Zipcodes recomputed per query.
+REFRESH_BATCH_SIZE = 500
+
+
+def summary_annotations() -> Dict[str, Any]:
+    annotations: Dict[str, Any] = {"count": Count("pk")}
+    for metric in SUMMARY_METRICS:
+        annotations[f"{metric}_count"] = Count(metric)
+        annotations[f"{metric}_sum"] = Sum(metric)
+        annotations[f"{metric}_min"] = Min(metric)
+        annotations[f"{metric}_max"] = Max(metric)
+    return annotations
+
+
+def summarize(listings: QuerySet, summary_model: Any = ListingSummary) -> List[Any]:
+    """Unsaved summary rows for the groups in ``listings``."""
+    rows = (
+        listings.order_by()
+        .values(*SUMMARY_FIELDS)
+        .annotate(**summary_annotations())
+        .order_by()
+    )
+    return [summary_model(**row) for row in rows]
+
+
+def refresh_summaries(
+    zipcodes: Optional[Iterable[Optional[str]]] = None,
+    listing_model: Any = Listing,
+    summary_model: Any = ListingSummary,
+) -> None:
+    """Recompute the summary rows of ``zipcodes``; all of them when None.
+
+    The models can be swapped for historical models in migrations.
+    """
+    if zipcodes is None:
+        with transaction.atomic():
+            summary_model.objects.all().delete()
+            summary_model.objects.bulk_create(
+                summarize(listing_model.objects.all(), summary_model),
+                batch_size=REFRESH_BATCH_SIZE,
+            )
+        return
+    selected = sorted({zipcode for zipcode in zipcodes if zipcode is not None})
+    if not selected:
+        return
+    with transaction.atomic():
+        for start in range(0, len(selected), REFRESH_BATCH_SIZE):
+            batch = selected[start : start + REFRESH_BATCH_SIZE]
+            summary_model.objects.filter(zipcode__in=batch).delete()
+            summary_model.objects.bulk_create(
+                summarize(
+                    listing_model.objects.filter(zipcode__in=batch), summary_model
+                )
+            )
+
+
+def summary_stats(
+    summaries: QuerySet,
+    group_by: Sequence[str],
+    metrics: Sequence[str],
+    aggregates: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """``listing_stats`` computed from summary rows.
+
+    Only ``SUMMARY_METRICS`` and ``SUMMARY_AGGREGATES`` are available.
+    """
+    annotations: Dict[str, Any] = {"count": Sum("count")}
+    for metric in metrics:
+        annotations[f"{metric}_min"] = Min(f"{metric}_min")
+        annotations[f"{metric}_max"] = Max(f"{metric}_max")
+        annotations[f"{metric}_sum"] = Sum(f"{metric}_sum")
+        annotations[f"{metric}_count"] = Sum(f"{metric}_count")
+
+    summaries = summaries.order_by()
+    if group_by:
+        rows = list(
+            summaries.values(*group_by).annotate(**annotations).order_by(*group_by)
+        )
+    else:
+        rows = [summaries.aggregate(**annotations)]
+
+    results = []
+    for row in rows:
+        result = {field: row[field] for field in group_by}
+        result["count"] = row["count"] or 0
+        for metric in metrics:
+            total, count = row[f"{metric}_sum"], row[f"{metric}_count"]
+            values = {
+                "min": row[f"{metric}_min"],
+                "max": row[f"{metric}_max"],
+                "avg": round(total / count) if count else None,
+            }
+            result[metric] = {
+                name: None if values[name] is None else round(values[name])
+                for name in aggregates
+            }
+        results.append(result)
+    return results
+
+
+def refresh_on_commit(
+    zipcodes: Iterable[Optional[str]], using: str = "default"
+) -> None:
+    """Refresh the summaries of ``zipcodes`` once the current transaction
+    commits, then start a new import generation; immediately in autocommit
+    mode.
+
+    Zipcodes scheduled in one transaction are refreshed together, so saving
+    many listings inside ``transaction.atomic()`` refreshes each zipcode once.
+    The generation is also bumped with the first change of a transaction, so
+    the new generation commits together with the changed listings.
+    """
+    selected = {zipcode for zipcode in zipcodes if zipcode is not None}
+    connection = transaction.get_connection(using)
+    pending = _pending_zipcodes(connection)
+    if pending is not None:
+        pending.update(selected)
+        return
+    if connection.in_atomic_block:
+        bump_generation()
+    # Runs the refresh right away in autocommit mode, so ``selected`` must be
+    # complete by now.
+    transaction.on_commit(partial(_refresh_pending, selected), using=using)
+
+
+def _pending_zipcodes(connection: Any) -> Optional[Set[str]]:
+    """Zipcodes of the refresh already scheduled in the current savepoint.
+
+    Callbacks go away when their transaction or savepoint is rolled back.
+    """
+    savepoints = set(connection.savepoint_ids)
+    for entry in connection.run_on_commit:
+        callback = entry[1]
+        if (
+            isinstance(callback, partial)
+            and callback.func is _refresh_pending
+            and entry[0] == savepoints
+        ):
+            pending: Set[str] = callback.args[0]
+            return pending
+    return None
+
+
+def _refresh_pending(zipcodes: Set[str]) -> None:
+    refresh_summaries(zipcodes)
+    bump_generation()
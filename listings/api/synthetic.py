@@ -0,0 +1,184 @@
+"""Synthetic listing data for benchmarks.
+
+Records follow the layout of ``sample-data/data_with_rent.csv``: the same
+columns, the same raw formats (``$739K`` prices, ``MM/DD/YYYY`` dates) and
+value ranges modelled on the sample, spread over more states and home types
+so that filters have realistic selectivity on large tables.
+"""
+
+import random
+from typing import Iterator, List, Sequence, Tuple
+
+CSV_HEADER = [
+    "area_unit",
+    "bathrooms",
+    "bedrooms",
+    "home_size",
+    "home_type",
+    "last_sold_date",
+    "last_sold_price",
+    "link",
+    "price",
+    "property_size",
+    "rent_price",
+    "rentzestimate_amount",
+    "rentzestimate_last_updated",
+    "tax_value",
+    "tax_year",
+    "year_built",
+    "zestimate_amount",
+    "zestimate_last_updated",
+    "zillow_id",
+    "address",
+    "city",
+    "state",
+    "zipcode",
+]
+
+# (state, weight, price multiplier, [(city, zipcode prefix), ...])
+STATES: List[Tuple[str, float, float, List[Tuple[str, str]]]] = [
+    (
+        "CA",
+        0.30,
+        1.6,
+        [
+            ("Encino", "913"),
+            ("Sherman Oaks", "914"),
+            ("Studio City", "916"),
+            ("Los Angeles", "900"),
+            ("San Francisco", "941"),
+            ("San Diego", "921"),
+        ],
+    ),
+    ("TX", 0.14, 0.7, [("Austin", "787"), ("Houston", "770"), ("Dallas", "752")]),
+    ("FL", 0.12, 0.8, [("Miami", "331"), ("Orlando", "328"), ("Tampa", "336")]),
+    ("NY", 0.10, 1.4, [("New York", "100"), ("Brooklyn", "112"), ("Buffalo", "142")]),
+    ("WA", 0.08, 1.2, [("Seattle", "981"), ("Spokane", "992"), ("Tacoma", "984")]),
+    ("IL", 0.07, 0.8, [("Chicago", "606"), ("Naperville", "605")]),
+    ("AZ", 0.07, 0.8, [("Phoenix", "850"), ("Tucson", "857")]),
+    ("CO", 0.06, 1.0, [("Denver", "802"), ("Boulder", "803")]),
+    ("GA", 0.06, 0.7, [("Atlanta", "303"), ("Savannah", "314")]),
+]
+
+HOME_TYPES: List[Tuple[str, float]] = [
+    ("SingleFamily", 0.70),
+    ("Condominium", 0.12),
+    ("Townhouse", 0.06),
+    ("MultiFamily2To4", 0.05),
+    ("Apartment", 0.03),
+    ("VacantResidentialLand", 0.02),
+    ("Duplex", 0.01),
+    ("Miscellaneous", 0.01),
+]
+
+BEDROOMS: List[Tuple[int, float]] = [
+    (1, 0.05),
+    (2, 0.15),
+    (3, 0.30),
+    (4, 0.28),
+    (5, 0.15),
+    (6, 0.05),
+    (7, 0.02),
+]
+
+STREETS = [
+    "Quimby",
+    "Vicky",
+    "Ventura",
+    "Magnolia",
+    "Oak",
+    "Pine",
+    "Maple",
+    "Cedar",
+    "Elm",
+    "Valley",
+    "Hillcrest",
+    "Sunset",
+    "Lake",
+    "Park",
+    "Washington",
+]
+STREET_SUFFIXES = ["Ave", "St", "Blvd", "Dr", "Pl", "Way", "Ct", "Ln"]
+
+
+def _weighted(rng: random.Random, choices: Sequence[Tuple[object, float]]) -> object:
+    return rng.choices([c[0] for c in choices], [c[1] for c in choices])[0]
+
+
+def format_feed_price(dollars: int) -> str:
+    """Format a price the way the feed's ``price`` column does ($739K, $1.2M)."""
+    if dollars >= 1_000_000:
+        return f"${dollars / 1_000_000:.1f}M"
+    return f"${round(dollars / 1000)}K"
+
+
+def _feed_date(rng: random.Random, first_year: int, last_year: int) -> str:
+    return (
+        f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/"
+        f"{rng.randint(first_year, last_year)}"
+    )
+
+
+def generate_records(
+    count: int, seed: int = 0, first_zillow_id: int = 100_000_000
+) -> Iterator[List[str]]:
+    """Yield ``count`` raw CSV records laid out as ``CSV_HEADER``.
+
+    The same ``seed`` always produces the same records.
+    """
+    rng = random.Random(seed)
+    state_choices = [(state, weight) for state, weight, _, _ in STATES]
+    states = {state: (multiplier, cities) for state, _, multiplier, cities in STATES}
+    for offset in range(count):
+        zillow_id = str(first_zillow_id + offset)
+        state = str(_weighted(rng, state_choices))
+        multiplier, cities = states[state]
+        city, zip_prefix = rng.choice(cities)
+        zipcode = f"{zip_prefix}{rng.randint(1, 99):02d}"
+        home_type = str(_weighted(rng, HOME_TYPES))
+        bedrooms = int(str(_weighted(rng, BEDROOMS)))
+        bathrooms = max(1.0, bedrooms - 1 + rng.choice([0, 0.5, 1, 1.5, 2]))
+        home_size = int(rng.gauss(450 + bedrooms * 420, 250))
+        home_size = max(400, home_size)
+        property_size = int(rng.lognormvariate(8.8, 0.5))
+        year_built = min(2018, int(rng.triangular(1900, 2018, 1960)))
+
+        dollars = int(rng.lognormvariate(13.4, 0.55) * multiplier)
+        dollars = max(50_000, dollars)
+        zestimate = int(dollars * rng.uniform(0.9, 1.1))
+        rent = int(dollars * rng.uniform(0.0035, 0.005))
+        tax_value = dollars * rng.uniform(0.25, 0.9)
+        sold = rng.random() < 0.8
+        last_sold_price = str(int(dollars * rng.uniform(0.7, 1.0))) if sold else ""
+        last_sold_date = _feed_date(rng, 1995, 2018) if sold else ""
+
+        number = rng.randint(100, 29999)
+        street = f"{rng.choice(STREETS)} {rng.choice(STREET_SUFFIXES)}"
+        address = f"{number} {street}"
+        slug = f"{address}-{city}-{state}-{zipcode}".replace(" ", "-")
+
+        yield [
+            "SqFt",
+            f"{bathrooms:.1f}",
+            str(bedrooms),
+            str(home_size),
+            home_type,
+            last_sold_date,
+            last_sold_price,
+            f"https://www.zillow.com/homedetails/{slug}/{zillow_id}_zpid/",
+            format_feed_price(dollars),
+            str(property_size),
+            str(rent),
+            str(rent),
+            "08/07/2018",
+            f"{tax_value:.1f}",
+            rng.choice(["2016", "2017", "2017", "2017"]),
+            str(year_built),
+            str(zestimate) if rng.random() > 0.02 else "",
+            "08/07/2018",
+            zillow_id,
+            address,
+            city,
+            state,
+            zipcode,
+        ]
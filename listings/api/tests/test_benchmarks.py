@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..benchmarks import compare_results, parse_server_timing, summarize
+from ..models import Listing
+
+
+class BenchmarkHelperTests(TestCase):
+    def test_summarize(self):
+        summary = summarize([float(n) for n in range(1, 101)])
+        self.assertEqual(summary["runs"], 100)
+        self.assertEqual((summary["min"], summary["max"]), (1.0, 100.0))
+        self.assertEqual(summary["p50"], 50.5)
+        self.assertAlmostEqual(summary["p99"], 99.01)
+        self.assertEqual(summarize([2.0])["p99"], 2.0)
+
+    def test_parse_server_timing(self):
+        header = 'db;dur=1.50;desc="3 queries", render;dur=0.20, total;dur=4.00'
+        self.assertEqual(
+            parse_server_timing(header),
+            {"db_ms": 1.5, "queries": 3, "render_ms": 0.2, "total_ms": 4.0},
+        )
+
+    def test_compare_results(self):
+        baseline = {"list": [{"label": "a", "p50": 2.0}, {"label": "b", "p50": 1.0}]}
+        current = {"list": [{"label": "a", "p50": 3.0}, {"label": "c", "p50": 1.0}]}
+        self.assertEqual(compare_results(baseline, current), [("list", "a", 2.0, 3.0)])
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_listings_imports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "listings.csv")
+            call_command("generate_listings", path, rows=25, stderr=StringIO())
+            call_command("import_listing_data", path, stdout=StringIO())
+        self.assertEqual(Listing.objects.count(), 25)
+
+    def test_benchmark_listings_writes_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_listings",
+                rows=500,
+                repeat=2,
+                import_rows=10,
+                page_size=5,
+                output=path,
+                stdout=StringIO(),
+            )
+            with open(path) as stream:
+                results = json.load(stream)
+            call_command(
+                "benchmark_listings",
+                rows=500,
+                repeat=1,
+                suites="serialize",
+                output=os.path.join(directory, "second.json"),
+                compare=path,
+                stdout=StringIO(),
+            )
+
+        self.assertEqual(results["environment"]["listings"], 500)
+        self.assertEqual(results["seed"]["rows"], 500)
+        self.assertEqual(results["import"]["created"], 10)
+        self.assertEqual(results["import"]["unchanged"], 10)
+        self.assertEqual(Listing.objects.count(), 500)
+        labels = [case["label"] for case in results["list"]]
+        self.assertIn("keyset page", labels)
+        self.assertEqual(results["list"][0]["runs"], 2)
+        self.assertIn("db_ms", results["search"][0])
+        self.assertEqual(results["serialize"][0]["rows"], 5)
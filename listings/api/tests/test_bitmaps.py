@@ -0,0 +1,72 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import bitmaps
+from ..benchmarks import seed_listings
+from ..cache import bump_generation
+from .test_import import import_rows, make_row
+
+QUERIES = [
+    "",
+    "home_type=Condominium",
+    "state=ca",
+    "bedrooms=2,3&bathrooms=1,2.5",
+    "bedrooms_min=3&bedrooms_max=4&state=TX",
+    "bathrooms_min=2.5&home_type=SingleFamily",
+    "bedrooms=x",
+    "bedrooms_min=5&bedrooms_max=2",
+    "state=ZZ",
+]
+
+
+class BitmapIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_listings(300)
+        import_rows([make_row("1", bedrooms="", bathrooms="", price="")])
+
+    def setUp(self):
+        bitmaps.bitmap_index.clear()
+        self.client = APIClient()
+
+    def fetch(self, url, enabled):
+        bump_generation()  # bypass the response and count caches
+        with override_settings(LISTINGS_BITMAP_INDEX=enabled):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def test_facets_match_database(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                url = f"{reverse('listing-facets')}?{query}"
+                self.assertEqual(
+                    self.fetch(url, enabled=True), self.fetch(url, enabled=False)
+                )
+
+    def test_counts_match_database(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                url = f"{reverse('listing-list')}?{query}&ordering=price"
+                expected = self.fetch(url, enabled=False)
+                actual = self.fetch(url, enabled=True)
+                self.assertEqual(actual["count"], expected["count"])
+                self.assertEqual(actual["results"], expected["results"])
+
+    def test_no_count_or_facet_queries(self):
+        self.fetch(reverse("listing-facets"), enabled=True)  # builds the index
+        # Every request reads the import generation.
+        with override_settings(LISTINGS_BITMAP_INDEX=True):
+            with self.assertNumQueries(1):
+                self.client.get(f"{reverse('listing-facets')}?bedrooms=3,4")
+            # The page is still read from the database, but not counted.
+            with self.assertNumQueries(2):
+                self.client.get(f"{reverse('listing-list')}?state=CA&bedrooms=3")
+            # Other filters are counted by the database.
+            with self.assertNumQueries(3):
+                self.client.get(f"{reverse('listing-list')}?city=oaks")
+
+    def test_popcount(self):
+        self.assertEqual(bitmaps.popcount(0), 0)
+        self.assertEqual(bitmaps.popcount(0b1011 << 70), 3)
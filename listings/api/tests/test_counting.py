@@ -0,0 +1,84 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..cache import bump_generation, get_generation
+from ..counting import count_cache_key, count_listings, estimate_count
+from ..models import Listing
+from .test_import import import_rows, make_row
+from .test_summary import committing
+
+
+class CountingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+        for i in range(3):
+            Listing.objects.create(zillow_id=str(i), bedrooms=i + 2, city="Encino")
+
+    def test_response_reports_exact_count(self):
+        response = self.client.get(self.url, {"bedrooms_min": 3})
+        self.assertEqual(response.json()["count"], 2)
+        self.assertIs(response.json()["estimated_count"], False)
+
+    def test_count_is_cached_per_filter_set(self):
+        # Each request also reads the import generation.
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {"bedrooms_min": "3", "ordering": "price"})
+        # Ordering and parameter order do not change the filter set.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.url, {"ordering": "-price", "bedrooms_min": "3"}
+            )
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_empty_value_list_counts_nothing(self):
+        response = self.client.get(self.url, {"bedrooms": ","})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_cache_key_ignores_ordering(self):
+        queryset = Listing.objects.filter(city="Encino")
+        self.assertEqual(
+            count_cache_key(queryset.order_by("price")),
+            count_cache_key(queryset.order_by("-year_built")),
+        )
+        self.assertNotEqual(
+            count_cache_key(queryset), count_cache_key(Listing.objects.all())
+        )
+
+    def test_saving_a_listing_invalidates_counts(self):
+        self.assertEqual(count_listings(Listing.objects.all()), (3, False))
+        with committing(self):
+            Listing.objects.create(zillow_id="3")
+        self.assertEqual(count_listings(Listing.objects.all()), (4, False))
+        with committing(self):
+            Listing.objects.get(zillow_id="3").delete()
+        self.assertEqual(count_listings(Listing.objects.all()), (3, False))
+
+    def test_import_invalidates_counts(self):
+        self.assertEqual(count_listings(Listing.objects.all()), (3, False))
+        generation = get_generation()
+        import_rows([make_row("100"), make_row("101")])
+        self.assertGreater(get_generation(), generation)
+        self.assertEqual(count_listings(Listing.objects.all()), (5, False))
+
+    def test_bump_generation(self):
+        generation = get_generation()
+        self.assertGreater(bump_generation(), generation)
+        self.assertGreater(bump_generation(), generation + 1)
+
+    @skipIf(connection.vendor == "postgresql", "estimates are PostgreSQL only")
+    def test_no_estimates_on_other_databases(self):
+        self.assertIsNone(estimate_count(Listing.objects.filter(bedrooms=3)))
+
+    @skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+    @override_settings(LISTING_COUNT_ESTIMATE_THRESHOLD=1)
+    def test_large_counts_are_estimated_on_postgresql(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_listing")
+        response = self.client.get(self.url, {"city": "Encino"})
+        self.assertIs(response.json()["estimated_count"], True)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Listing
+from ..serializers import ListingSerializer
+from .test_import import import_rows, make_row
+
+
+@override_settings(LISTINGS_EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$500K", state="CA", home_size="1200"),
+                make_row("2", price="$1.2M", state="CA", city="Encino"),
+                make_row("3", price="$300K", state="TX", bathrooms=""),
+                make_row("4", price="$800K", state="CA"),
+                make_row("5", price="", state="CA"),
+            ]
+        )
+        self.client = APIClient()
+        self.url = reverse("listing-export")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, response.getvalue().decode()
+
+    def test_ndjson_matches_serializer(self):
+        response, content = self.export(ordering="-price")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("listings.ndjson", response["Content-Disposition"])
+        rows = [json.loads(line) for line in content.splitlines()]
+        listings = Listing.objects.order_by("-price")
+        expected = json.loads(json.dumps(ListingSerializer(listings, many=True).data))
+        self.assertEqual(rows, expected)
+
+    def test_honors_filters_and_ordering(self):
+        _, content = self.export(state="ca", home_size_min="1500", ordering="price")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["price"] for row in rows], [None, "$800,000", "$1,200,000"]
+        )
+
+        _, content = self.export(search="encino")
+        self.assertEqual(
+            [json.loads(line)["city"] for line in content.splitlines()], ["Encino"]
+        )
+
+    def test_csv(self):
+        response, content = self.export(
+            output="csv", fields="zillow_id,price,bathrooms", ordering="price"
+        )
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ["zillow_id", "bathrooms", "price"])
+        self.assertEqual(len(rows), 6)
+        self.assertIn(["3", "", "$300,000"], rows)
+
+    def test_csv_empty_result(self):
+        _, content = self.export(output="csv", state="NY", fields="zillow_id")
+        self.assertEqual(content, "zillow_id\r\n")
+
+    def test_unknown_output(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("output", response.json())
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {"fields": "nope"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..facets import PRICE_BUCKETS, facet_counts
+from ..models import Listing
+from .test_import import import_rows, make_row
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$100K", home_type="Condominium", bedrooms="2"),
+                make_row("2", price="$600K", bathrooms="2.5"),
+                make_row("3", price="$610K", state="TX"),
+                make_row("4", price="$5.2M", bedrooms="", bathrooms=""),
+                make_row("5", price="", bedrooms="4"),
+            ]
+        )
+        self.client = APIClient()
+        self.url = reverse("listing-facets")
+
+    def test_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            facets = facet_counts(
+                Listing.objects.all(),
+                ["home_type", "bedrooms", "bathrooms", "state", "price"],
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertIn("UNION ALL", queries[0]["sql"])
+
+        self.assertEqual(
+            facets["home_type"],
+            [
+                {"value": "Condominium", "count": 1},
+                {"value": "SingleFamily", "count": 4},
+            ],
+        )
+        self.assertEqual(
+            facets["bedrooms"],
+            [
+                {"value": 2, "count": 1},
+                {"value": 3, "count": 2},
+                {"value": 4, "count": 1},
+            ],
+        )
+        self.assertEqual(
+            [(str(f["value"]), f["count"]) for f in facets["bathrooms"]],
+            [("2.0", 3), ("2.5", 1)],
+        )
+        self.assertEqual(
+            facets["state"],
+            [{"value": "CA", "count": 4}, {"value": "TX", "count": 1}],
+        )
+
+    def test_price_buckets(self):
+        price = facet_counts(Listing.objects.all(), ["price"])["price"]
+        self.assertEqual(len(price), len(PRICE_BUCKETS))
+        self.assertEqual(price[0], {"min": 0, "max": 250_000, "count": 1})
+        self.assertEqual(price[2], {"min": 500_000, "max": 750_000, "count": 2})
+        self.assertEqual(price[-1], {"min": 5_000_000, "max": None, "count": 1})
+        self.assertEqual(sum(bucket["count"] for bucket in price), 4)
+
+    def test_endpoint_applies_filters(self):
+        response = self.client.get(
+            self.url, {"facets": "state,home_type", "home_type": "SingleFamily"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "home_type": [{"value": "SingleFamily", "count": 4}],
+                "state": [{"value": "CA", "count": 3}, {"value": "TX", "count": 1}],
+            },
+        )
+
+        response = self.client.get(self.url, {"search": "quimby", "state": "tx"})
+        self.assertEqual(
+            set(response.json()),
+            {"home_type", "bedrooms", "bathrooms", "state", "price"},
+        )
+        self.assertEqual(response.json()["bedrooms"], [{"value": 3, "count": 1}])
+
+    def test_unknown_facet(self):
+        response = self.client.get(self.url, {"facets": "zipcode"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("facets", response.json())
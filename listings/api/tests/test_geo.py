@@ -0,0 +1,175 @@
+import io
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..geo import (
+    GRID_COLUMNS,
+    cell_ranges,
+    geo_cell,
+    load_centroids,
+    locate,
+    radius_box,
+    reload_centroids,
+    update_locations,
+)
+from ..models import Listing
+from .test_import import import_rows, make_csv, make_row
+
+
+class LocateTests(TestCase):
+    def test_zipcode_and_prefix(self):
+        latitude, longitude = load_centroids()["91307"]
+        self.assertAlmostEqual(latitude, 34.2, places=1)
+        self.assertAlmostEqual(longitude, -118.66, places=1)
+        self.assertEqual(
+            locate("91307"), (latitude, longitude, geo_cell(latitude, longitude))
+        )
+        self.assertEqual(locate("91307-1234"), locate("91307"))
+        # Unlisted zipcodes fall back to their 3-digit prefix.
+        self.assertEqual(locate("94110")[:2], (37.7749, -122.4194))
+        self.assertEqual(locate("00000"), (None, None, None))
+        self.assertEqual(locate(""), (None, None, None))
+
+    def test_cell_ranges(self):
+        box = radius_box(34.15, -118.45, 10)
+        ranges = cell_ranges(box)
+        self.assertGreater(len(ranges), 1)
+        for first, last in ranges:
+            self.assertEqual(first // GRID_COLUMNS, last // GRID_COLUMNS)
+        self.assertEqual(ranges[0][0], geo_cell(box[0], box[1]))
+        self.assertEqual(ranges[-1][1], geo_cell(box[2], box[3]))
+
+
+class LocationFilterTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", zipcode="91307"),  # West Hills
+                make_row("2", zipcode="91436"),  # Encino, ~17 km east
+                make_row("3", zipcode="94105"),  # San Francisco
+                make_row("4", zipcode="00000"),  # unknown
+            ]
+        )
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+
+    def zillow_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(r["zillow_id"] for r in response.json()["results"])
+
+    def test_import_sets_coordinates(self):
+        listing = Listing.objects.get(zillow_id="1")
+        self.assertEqual(
+            (listing.latitude, listing.longitude, listing.geo_cell), locate("91307")
+        )
+        self.assertIsNone(Listing.objects.get(zillow_id="4").latitude)
+
+    def test_near(self):
+        self.assertEqual(self.zillow_ids(near="34.2,-118.66"), ["1"])
+        self.assertEqual(
+            self.zillow_ids(near="34.2,-118.66", radius_km="25"), ["1", "2"]
+        )
+        self.assertEqual(self.zillow_ids(near="37.77,-122.42", radius_km="1"), ["3"])
+
+    def test_bbox(self):
+        self.assertEqual(self.zillow_ids(bbox="-118.7,34.1,-118.4,34.25"), ["1", "2"])
+        self.assertEqual(self.zillow_ids(bbox="-125,30,-110,40"), ["1", "2", "3"])
+        self.assertEqual(self.zillow_ids(bbox="-80,30,-70,40"), [])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"near": "34.2"},
+            {"near": "north,-118"},
+            {"near": "95,-118"},
+            {"near": "34.2,-118.66", "radius_km": "600"},
+            {"bbox": "-118.4,34.1,-118.7,34.25"},
+            {"bbox": "1,2,3"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertTrue(set(response.json()) & {"near", "radius_km", "bbox"})
+
+    def test_save_and_update_locations(self):
+        listing = Listing.objects.get(zillow_id="1")
+        listing.zipcode = "94105"
+        listing.save()
+        self.assertEqual(listing.geo_cell, locate("94105")[2])
+
+        moved = Listing.objects.get(zillow_id="2")
+        Listing.objects.filter(zillow_id="2").update(latitude=None, geo_cell=None)
+        self.assertEqual(update_locations(Listing), 1)
+        relocated = Listing.objects.get(zillow_id="2")
+        self.assertEqual(relocated.geo_cell, locate("91436")[2])
+        self.assertGreater(relocated.updated_at, moved.updated_at)
+        self.assertEqual(update_locations(Listing), 0)
+
+
+GAZETTEER = (
+    "GEOID\tALAND\tAWATER\tALAND_SQMI\tAWATER_SQMI\tINTPTLAT\tINTPTLONG    \n"
+    "00601\t166847909\t799292\t64.42\t0.309\t18.180555\t-66.749961\n"
+    "00603\t79288158\t4446273\t30.613\t1.717\t18.362268\t-67.17613\n"
+)
+
+
+class LoadZipcodeCentroidsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(reload_centroids)
+        self.gazetteer = os.path.join(self.directory, "zcta.txt")
+        with open(self.gazetteer, "w") as file:
+            file.write(GAZETTEER)
+        self.output = os.path.join(self.directory, "centroids.csv")
+
+    def test_import_reports_unlocated_listings(self):
+        path = os.path.join(self.directory, "listings.csv")
+        for zipcode, expected in [("91307", False), ("00601", True)]:
+            with open(path, "w", newline="") as file:
+                file.write(make_csv([make_row(zipcode, zipcode=zipcode)]).getvalue())
+            out = io.StringIO()
+            call_command("import_listing_data", path, stdout=out)
+            warning = "1 listings have a zipcode without a known centroid"
+            self.assertEqual(warning in out.getvalue(), expected, zipcode)
+
+    def test_load_and_relocate(self):
+        import_rows([make_row("1", zipcode="00601"), make_row("2", zipcode="00602")])
+        out = io.StringIO()
+        with override_settings(LISTINGS_ZIPCODE_CENTROIDS=self.output):
+            call_command(
+                "load_zipcode_centroids",
+                self.gazetteer,
+                "--output",
+                self.output,
+                stdout=out,
+            )
+            self.assertEqual(load_centroids()["00601"], (18.180555, -66.749961))
+            # Unlisted zipcodes fall back to the mean of their prefix.
+            self.assertAlmostEqual(load_centroids()["006"][0], 18.2714115, places=5)
+            located = Listing.objects.get(zillow_id="2")
+            self.assertEqual(located.geo_cell, locate("00602")[2])
+        self.assertIn("Wrote 2 zipcodes and 1 prefixes", out.getvalue())
+        self.assertIn("Relocated 2 listings.", out.getvalue())
+        self.assertNotIn("no coordinates", out.getvalue())
+
+    def test_other_output_is_not_used(self):
+        out = io.StringIO()
+        call_command(
+            "load_zipcode_centroids",
+            self.gazetteer,
+            "--output",
+            self.output,
+            stdout=out,
+        )
+        self.assertIn("Set LISTINGS_ZIPCODE_CENTROIDS=", out.getvalue())
+        self.assertEqual(locate("00601"), (None, None, None))
+
+    def test_rejects_other_files(self):
+        with open(self.output, "w") as file:
+            file.write("zipcode,latitude,longitude\n")
+        with self.assertRaisesMessage(CommandError, "Not a ZCTA Gazetteer file"):
+            call_command("load_zipcode_centroids", self.output)
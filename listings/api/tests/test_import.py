@@ -0,0 +1,304 @@
+import csv
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import TestCase
+
+from ..importing import OrmWriter, import_csv, parallel
+from ..importing.parallel import shard_for, split_ranges
+from ..models import DERIVED_FIELDS, Listing, update_derived_values
+
+
+def make_row(zillow_id, **overrides):
+    row = {
+        "area_unit": "SqFt",
+        "bathrooms": "2.0",
+        "bedrooms": "3",
+        "home_size": "1500",
+        "home_type": "SingleFamily",
+        "last_sold_date": None,
+        "last_sold_price": "720000",
+        "link": f"https://www.zillow.com/homedetails/{zillow_id}_zpid/",
+        "price": "$739K",
+        "property_size": "7500",
+        "rent_price": "2850",
+        "rentzestimate_amount": "2850",
+        "rentzestimate_last_updated": None,
+        "tax_value": "215083.0",
+        "tax_year": "2017",
+        "year_built": "1956",
+        "zestimate_amount": "709630",
+        "zestimate_last_updated": None,
+        "zillow_id": zillow_id,
+        "address": "7417 Quimby Ave",
+        "city": "West Hills",
+        "state": "CA",
+        "zipcode": "91307",
+    }
+    row.update(overrides)
+    return row
+
+
+def make_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(make_row("0")))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+    buffer.seek(0)
+    return buffer
+
+
+def import_rows(rows, **kwargs):
+    return import_csv(make_csv(rows), **kwargs)
+
+
+class ImportRowsTests(TestCase):
+    def test_creates_listings_in_batches(self):
+        rows = [make_row(str(i)) for i in range(5)]
+        stats = import_rows(rows, batch_size=2)
+
+        self.assertEqual(stats.rows, 5)
+        self.assertEqual(stats.created, 5)
+        self.assertEqual(stats.updated, 0)
+        self.assertEqual(Listing.objects.count(), 5)
+
+        listing = Listing.objects.get(zillow_id="0")
+        self.assertEqual(listing.price, 73900000)
+        self.assertEqual(listing.data_hash, listing.calculate_data_hash())
+        self.assertIsNotNone(listing.created_at)
+        self.assertIsNotNone(listing.last_imported_at)
+
+    def test_updates_existing_listings(self):
+        import_rows([make_row("1"), make_row("2")])
+        stats = import_rows([make_row("1", price="$800K"), make_row("3")])
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(Listing.objects.count(), 3)
+
+        listing = Listing.objects.get(zillow_id="1")
+        self.assertEqual(listing.price, 80000000)
+        self.assertEqual(listing.data_hash, listing.calculate_data_hash())
+
+    def test_duplicate_ids_in_batch_keep_last_row(self):
+        stats = import_rows([make_row("1"), make_row("1", price="$1M")])
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(Listing.objects.get(zillow_id="1").price, 100000000)
+
+    def test_rows_without_zillow_id_are_skipped(self):
+        stats = import_rows([make_row("1"), make_row("")])
+
+        self.assertEqual(stats.skipped, 1)
+        self.assertEqual(Listing.objects.count(), 1)
+
+    def test_rows_the_database_rejects_are_skipped(self):
+        stats = import_rows(
+            [
+                make_row("1"),
+                make_row("2", city=""),
+                make_row("3", state="California"),
+                make_row("4", bathrooms="1000"),
+            ]
+        )
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.invalid, 3)
+        self.assertEqual(
+            stats.invalid_reasons,
+            [
+                "zillow_id 2: city is missing",
+                "zillow_id 3: state is longer than 2 characters",
+                "zillow_id 4: bathrooms 1000.0 is out of range",
+            ],
+        )
+        self.assertEqual(Listing.objects.count(), 1)
+
+    def test_command_reports_database_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "listings.csv")
+            with open(path, "w", newline="") as file:
+                file.write(make_csv([make_row("1"), make_row("2")]).getvalue())
+            with mock.patch.object(
+                OrmWriter, "write", side_effect=IntegrityError("NOT NULL failed")
+            ):
+                with self.assertRaisesMessage(
+                    CommandError,
+                    "The database rejected the batch of zillow_id 1 to 2: "
+                    "IntegrityError: NOT NULL failed",
+                ):
+                    call_command("import_listing_data", path, stdout=io.StringIO())
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        import_rows([make_row("1"), make_row("2")])
+        before = Listing.objects.get(zillow_id="1")
+
+        with self.assertNumQueries(1):
+            stats = import_rows([make_row("1"), make_row("2")])
+
+        self.assertEqual(stats.unchanged, 2)
+        self.assertEqual(stats.created, 0)
+        self.assertEqual(stats.updated, 0)
+        after = Listing.objects.get(zillow_id="1")
+        self.assertEqual(after.updated_at, before.updated_at)
+        self.assertEqual(after.last_imported_at, before.last_imported_at)
+
+    def test_changed_rows_are_counted_separately(self):
+        import_rows([make_row("1"), make_row("2")])
+        stats = import_rows([make_row("1"), make_row("2", rent_price="3100")])
+
+        self.assertEqual(stats.unchanged, 1)
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(Listing.objects.get(zillow_id="2").rent_price, 310000)
+
+    def test_hash_matches_model_hash(self):
+        import_rows([make_row("1", bathrooms="2.5")])
+        listing = Listing.objects.get(zillow_id="1")
+
+        self.assertEqual(listing.data_hash, listing.calculate_data_hash())
+
+    def test_copy_engine_requires_postgresql(self):
+        with self.assertRaises(ValueError):
+            import_rows([make_row("1")], engine="copy")
+        self.assertEqual(Listing.objects.count(), 0)
+
+    def test_header_names_are_stripped_and_column_order_ignored(self):
+        row = make_row("1")
+        header = [f" {name}" for name in reversed(list(row))]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        writer.writerow(list(reversed(list(row.values()))))
+        buffer.seek(0)
+
+        stats = import_csv(buffer)
+
+        self.assertEqual(stats.created, 1)
+        listing = Listing.objects.get(zillow_id="1")
+        self.assertEqual(listing.price, 73900000)
+        self.assertEqual(listing.city, "West Hills")
+
+    def test_command_imports_file_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "listings.csv")
+            with open(path, "w", newline="") as file:
+                file.write(make_csv([make_row("1"), make_row("2")]).getvalue())
+            out = io.StringIO()
+            call_command("import_listing_data", path, stdout=out)
+
+        self.assertEqual(Listing.objects.count(), 2)
+        self.assertIn("2 created, 0 updated, 0 unchanged", out.getvalue())
+
+
+class ParallelImportTests(TestCase):
+    def write_file(self, directory, rows):
+        path = os.path.join(directory, "listings.csv")
+        with open(path, "w", newline="") as file:
+            file.write(make_csv(rows).getvalue())
+        return path
+
+    def test_split_ranges_cover_every_line_once(self):
+        rows = [make_row(str(i)) for i in range(50)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_file(directory, rows)
+            header, ranges = split_ranges(path, 7)
+            with open(path, "rb") as file:
+                content = file.read()
+
+        self.assertTrue(header.startswith(b"area_unit,"))
+        self.assertEqual(ranges[0][0], len(header))
+        self.assertEqual(ranges[-1][1], len(content))
+        chunks = [content[start:end] for start, end in ranges]
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith(b"\n"))
+        self.assertEqual(header + b"".join(chunks), content)
+        self.assertLessEqual(len(ranges), 7)
+
+    def test_split_ranges_with_more_parts_than_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_file(directory, [make_row("1"), make_row("2")])
+            _, ranges = split_ranges(path, 16)
+
+        self.assertLessEqual(len(ranges), 2)
+
+    def test_shard_for_is_stable_and_in_range(self):
+        shards = {shard_for(str(i), 4) for i in range(100)}
+
+        self.assertEqual(shards, {0, 1, 2, 3})
+        self.assertEqual(shard_for("19866015", 4), shard_for("19866015", 4))
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite only")
+    def test_refused_on_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_file(directory, [make_row("1"), make_row("2")])
+            with self.assertRaisesMessage(ValueError, "SQLite"):
+                parallel.import_csv_parallel(path, 2, 10)
+
+    def test_writer_that_dies_is_not_waited_for(self):
+        died = multiprocessing.Process(target=sys.exit, args=(3,))
+        died.start()
+        died.join()
+        results = multiprocessing.Queue()
+        results.put((1, 2, 0, 0, set(), None))
+        writers = [died, multiprocessing.current_process()]
+
+        with mock.patch.object(parallel, "WORKER_POLL_SECONDS", 0.01):
+            reported, errors = parallel._collect_results(results, writers)
+
+        self.assertEqual(reported, [(2, 0, 0, set(), None)])
+        self.assertEqual(errors, ["writer 0: exited with code 3 without reporting"])
+
+
+class DerivedValuesTests(TestCase):
+    def test_import_stores_derived_values(self):
+        import_rows(
+            [
+                make_row("1", price="$600K", home_size="1500", rent_price="2500"),
+                make_row("2", price="", rent_price="", zestimate_amount=""),
+            ]
+        )
+        listing = Listing.objects.get(zillow_id="1")
+        self.assertEqual(listing.price_display, "$600,000")
+        self.assertEqual(listing.rent_price_display, "$2,500")
+        self.assertEqual(listing.price_per_sqft, 40000)
+        self.assertEqual(listing.rent_yield_bps, 500)
+        self.assertEqual(listing.zestimate_delta, 709630_00 - 600000_00)
+        empty = Listing.objects.get(zillow_id="2")
+        self.assertIsNone(empty.price_display)
+        self.assertIsNone(empty.price_per_sqft)
+        self.assertIsNone(empty.rent_yield_bps)
+
+        import_rows([make_row("1", price="$500K", home_size="1500", rent_price="2500")])
+        listing.refresh_from_db()
+        self.assertEqual(listing.price_display, "$500,000")
+        self.assertEqual(listing.rent_yield_bps, 600)
+
+    def test_update_derived_values(self):
+        import_rows([make_row("1"), make_row("2"), make_row("3")])
+        Listing.objects.update(**{field: None for field in DERIVED_FIELDS})
+        with mock.patch("api.models.DERIVE_BATCH_SIZE", 2):
+            self.assertEqual(update_derived_values(Listing), 3)
+        self.assertEqual(update_derived_values(Listing), 0)
+        self.assertEqual(Listing.objects.get(zillow_id="1").price_display, "$739,000")
+
+    def test_order_by_derived_metric(self):
+        import_rows(
+            [
+                make_row("1", price="$900K", home_size="1500"),
+                make_row("2", price="$300K", home_size="1500"),
+                make_row("3", price="$600K", home_size="1500"),
+            ]
+        )
+        response = self.client.get("/api/listings/?ordering=-price_per_sqft")
+        results = response.json()["results"]
+        self.assertEqual([row["zillow_id"] for row in results], ["1", "3", "2"])
+        self.assertEqual(results[0]["price_per_sqft"], 60000)
+        self.assertEqual(results[0]["price"], "$900,000")
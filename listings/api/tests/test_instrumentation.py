@@ -0,0 +1,73 @@
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..instrumentation import logfmt
+from ..query import filter_signature
+from .test_import import import_rows, make_row
+
+
+class FilterSignatureTests(TestCase):
+    def test_drops_values_and_paging(self):
+        signature = filter_signature(
+            QueryDict("page=3&city=Encino&price_min=500K&ordering=-price&fields=id")
+        )
+        self.assertEqual(signature, "city&ordering=-price&price_min")
+        self.assertEqual(
+            filter_signature(QueryDict("price_min=1M&city=tarzana&ordering=-price")),
+            signature,
+        )
+        self.assertEqual(filter_signature(QueryDict("cursor=")), "cursor")
+
+
+class LogfmtTests(TestCase):
+    def test_quotes_values(self):
+        self.assertEqual(
+            logfmt({"a": 1, "b": 0.5, "c": "x y", "d": None, "e": 'say "hi"\n'}),
+            'a=1 b=0.50 c="x y" e="say \\"hi\\"\\n"',
+        )
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        import_rows([make_row("1"), make_row("2", city="Encino")])
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+
+    def test_server_timing(self):
+        response = self.client.get(self.url, {"city": "hills"})
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="[1-9]\d* queries", ')
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("render;dur=", timing)
+        self.assertRegex(timing, r"total;dur=[\d.]+$")
+
+        # Cached responses only read the import generation.
+        response = self.client.get(self.url, {"city": "hills"})
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries"')
+
+    def test_detail_timing(self):
+        response = self.client.get(self.url, {"fields": "id"})
+        detail = reverse("listing-detail", args=[response.json()["results"][0]["id"]])
+        self.assertIn("serialize;dur=", self.client.get(detail)["Server-Timing"])
+
+    def test_request_log(self):
+        with self.assertLogs("api.metrics.requests", "INFO") as logs:
+            self.client.get(self.url, {"city": "Encino", "page_size": "5"})
+        (line,) = logs.output
+        self.assertIn("method=GET path=/api/listings/ status=200 queries=", line)
+        self.assertIn(" cache=MISS signature=city", line)
+
+    @override_settings(LISTINGS_SLOW_REQUEST_MS=0, LISTINGS_SLOW_REQUEST_EXPLAIN=True)
+    def test_slow_request_log(self):
+        with self.assertLogs("api.metrics.slow", "WARNING") as logs:
+            self.client.get(self.url, {"state": "CA", "ordering": "-price"})
+        (line,) = logs.output
+        self.assertIn('signature="ordering=-price&state"', line)
+        self.assertIn("slowest_query_ms=", line)
+        self.assertRegex(line, r'explain="[^"]*api_listing')
+
+    def test_other_paths_are_not_measured(self):
+        response = self.client.get("/admin/login/")
+        self.assertNotIn("Server-Timing", response)
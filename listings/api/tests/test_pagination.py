@@ -0,0 +1,91 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import Listing
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+        for i in range(23):
+            Listing.objects.create(
+                zillow_id=str(i),
+                # Repeated and missing prices exercise ties and nulls.
+                price=None if i % 5 == 0 else (i % 4) * 100000,
+                year_built=1950 + i,
+            )
+
+    def get(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def follow(self, link):
+        return self.get({k: v[0] for k, v in parse_qs(urlparse(link).query).items()})
+
+    def walk(self, params, direction="next"):
+        pages = [self.get(params)]
+        while pages[-1][direction]:
+            pages.append(self.follow(pages[-1][direction]))
+        return pages
+
+    def ids(self, pages):
+        return [item["zillow_id"] for page in pages for item in page["results"]]
+
+    def expected(self, *ordering):
+        return list(
+            Listing.objects.order_by(*ordering).values_list("zillow_id", flat=True)
+        )
+
+    def test_walks_every_row_once_in_order(self):
+        for ordering, expected in [
+            ("-price", ("-price", "-id")),
+            ("price", ("price", "id")),
+            ("year_built", ("year_built", "id")),
+            (None, ("-created_at", "-id")),
+        ]:
+            params = {"cursor": "", "page_size": 4}
+            if ordering:
+                params["ordering"] = ordering
+            pages = self.walk(params)
+            self.assertEqual(self.ids(pages), self.expected(*expected), ordering)
+            self.assertIsNone(pages[0]["previous"])
+            self.assertTrue(all(len(page["results"]) == 4 for page in pages[:-1]))
+
+    def test_previous_links_walk_back_to_the_start(self):
+        forward = self.walk({"cursor": "", "ordering": "-price", "page_size": 5})
+        backward = [forward[-1]]
+        while backward[-1]["previous"]:
+            backward.append(self.follow(backward[-1]["previous"]))
+        self.assertEqual(
+            [page["results"] for page in reversed(backward)],
+            [page["results"] for page in forward],
+        )
+
+    def test_no_count_in_response(self):
+        data = self.get({"cursor": ""})
+        self.assertNotIn("count", data)
+        self.assertEqual(len(data["results"]), 10)
+
+    def test_respects_filters(self):
+        pages = self.walk({"cursor": "", "year_built_min": 1960, "page_size": 3})
+        self.assertEqual(len(self.ids(pages)), 13)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_is_bound_to_its_ordering(self):
+        link = self.get({"cursor": "", "ordering": "price"})["next"]
+        cursor = parse_qs(urlparse(link).query)["cursor"][0]
+        response = self.client.get(self.url, {"cursor": cursor, "ordering": "-price"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_without_cursor(self):
+        data = self.get({"page": 2})
+        self.assertEqual(data["count"], 23)
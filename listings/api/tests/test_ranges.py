@@ -0,0 +1,88 @@
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Listing
+from ..ranges import RangeBoundFilter, parse_price_bound
+from ..views import ListingFilter
+from .test_import import import_rows, make_row
+
+
+class RangeFilterSetTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$300K", home_size="1200", bathrooms="1.5"),
+                make_row("2", price="$600K", home_size="1800"),
+                make_row("3", price="$1.2M", home_size="2400", bathrooms="3"),
+                make_row("4", price="", home_size=""),
+            ]
+        )
+        self.client = APIClient()
+
+    def filtered(self, query_string):
+        filterset = ListingFilter(QueryDict(query_string), Listing.objects.all())
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return filterset.qs
+
+    def zillow_ids(self, query_string):
+        return sorted(self.filtered(query_string).values_list("zillow_id", flat=True))
+
+    def test_declares_bound_filters(self):
+        for name in ("price_min", "tax_value_max", "home_size_min", "bathrooms_max"):
+            self.assertIsInstance(ListingFilter.base_filters[name], RangeBoundFilter)
+
+    def test_ranges(self):
+        self.assertEqual(self.zillow_ids("price_min=500K"), ["2", "3"])
+        self.assertEqual(self.zillow_ids("price_max=$600,000"), ["1", "2"])
+        self.assertEqual(self.zillow_ids("price_min=500K&price_max=1M"), ["2"])
+        self.assertEqual(self.zillow_ids("home_size_min=1800&bathrooms_max=2"), ["2"])
+        self.assertEqual(
+            self.zillow_ids("price_min=&home_size_max="), ["1", "2", "3", "4"]
+        )
+
+    def test_single_condition(self):
+        sql = str(
+            self.filtered(
+                "price_min=500K&price_max=1M&home_size_min=1000&home_size_max=2000"
+                "&year_built_min=1900"
+            ).query
+        )
+        self.assertEqual(sql.count("WHERE"), 1)
+        self.assertEqual(sql.count("BETWEEN"), 2)
+
+    def test_impossible_ranges_run_no_query(self):
+        for query_string in (
+            "price_min=2M&price_max=1M",
+            "home_size_min=3&home_size_max=2",
+        ):
+            queryset = self.filtered(query_string)
+            with self.assertNumQueries(0):
+                self.assertEqual(list(queryset), [])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("listing-list"), {"price_min": "2M", "price_max": "1M"}
+            )
+        self.assertEqual(response.json()["count"], 0)
+        self.assertFalse([q for q in queries if "api_listing" in q["sql"]])
+
+    def test_unparseable_price_matches_nothing(self):
+        self.assertEqual(self.zillow_ids("price_min=abc"), [])
+        self.assertEqual(self.zillow_ids("price_min=500K&price_max=1.5X"), [])
+
+    def test_invalid_number_is_rejected(self):
+        response = self.client.get(reverse("listing-list"), {"home_size_min": "big"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("home_size_min", response.json())
+
+    def test_price_parsing_is_memoized(self):
+        parse_price_bound.cache_clear()
+        self.zillow_ids("price_min=1.5M")
+        self.zillow_ids("price_min=1.5M")
+        info = parse_price_bound.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertEqual(parse_price_bound("1.5M"), 150_000_000)
@@ -0,0 +1,86 @@
+import datetime
+from collections import OrderedDict
+from decimal import Decimal
+from types import ModuleType
+from typing import Any, cast
+from unittest import mock, skipIf
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .. import renderers
+from ..renderers import FastJSONRenderer, dumps
+from .test_import import import_rows, make_row
+
+PAYLOAD = OrderedDict(
+    [
+        ("count", 2),
+        ("estimated_count", False),
+        ("next", None),
+        (
+            "results",
+            [
+                {
+                    "bathrooms": Decimal("2.50"),
+                    "last_sold_date": datetime.date(2020, 1, 15),
+                    "updated_at": datetime.datetime(
+                        2024, 5, 6, 7, 8, 9, 123456, tzinfo=datetime.timezone.utc
+                    ),
+                    "naive": datetime.datetime(2024, 5, 6, 7, 8, 9),
+                    "time": datetime.time(7, 8, 9, 500),
+                    "price": "$1,200,000",
+                    "address": "12 Rue de l’Église  Unit  5",
+                    "label": gettext_lazy("Listing"),
+                },
+            ],
+        ),
+    ]
+)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_json_renderer(self):
+        expected = JSONRenderer().render(PAYLOAD)
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+        self.assertEqual(dumps(PAYLOAD), expected)
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_indent_uses_json_renderer(self):
+        rendered = FastJSONRenderer().render(PAYLOAD, "application/json; indent=2", {})
+        self.assertEqual(
+            rendered,
+            JSONRenderer().render(PAYLOAD, "application/json; indent=2", {}),
+        )
+        self.assertIn(b'\n  "count": 2', rendered)
+
+    @skipIf(renderers.orjson is None, "orjson is not installed")
+    def test_uses_orjson(self):
+        orjson = cast(ModuleType, renderers.orjson)
+        with mock.patch.object(orjson, "dumps", wraps=orjson.dumps) as orjson_dumps:
+            FastJSONRenderer().render(PAYLOAD)
+        orjson_dumps.assert_called_once()
+
+    def test_falls_back_without_orjson(self):
+        expected = JSONRenderer().render(PAYLOAD)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), expected)
+            self.assertEqual(dumps(PAYLOAD), expected)
+
+
+class RendererAPITests(TestCase):
+    def setUp(self):
+        import_rows([make_row("1"), make_row("2", price="$1.2M")])
+        self.client = APIClient()
+
+    def test_list_renders_with_fast_renderer(self):
+        # A DRF response, with the renderer and data it was rendered from.
+        response: Any = self.client.get(reverse("listing-list"), {"serializer": "drf"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.json()["count"], 2)
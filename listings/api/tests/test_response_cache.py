@@ -0,0 +1,220 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..cache import bump_generation
+from ..models import ImportGeneration, Listing
+from ..query import canonical_query
+from .test_import import import_rows, make_row
+from .test_summary import committing
+
+
+class CanonicalQueryTests(TestCase):
+    def canonical(self, query_string):
+        return canonical_query(QueryDict(query_string))
+
+    def test_parameter_order(self):
+        self.assertEqual(
+            self.canonical("ordering=-price&bedrooms_min=3"),
+            self.canonical("bedrooms_min=3&ordering=-price"),
+        )
+
+    def test_price_formats(self):
+        expected = self.canonical("price_min=500000")
+        self.assertEqual(self.canonical("price_min=500K"), expected)
+        self.assertEqual(self.canonical("price_min=$500,000"), expected)
+        self.assertEqual(self.canonical("price_min=0.5m"), expected)
+
+    def test_case_insensitive_filters(self):
+        self.assertEqual(self.canonical("city=Encino"), self.canonical("city=ENCINO"))
+        self.assertEqual(
+            self.canonical("search=Sherman Oaks"), self.canonical("search=oaks,sherman")
+        )
+        self.assertNotEqual(
+            self.canonical("home_type=Condo"), self.canonical("home_type=condo")
+        )
+
+    def test_lists_and_defaults(self):
+        self.assertEqual(
+            self.canonical("bedrooms=4, 3"), self.canonical("bedrooms=3,4")
+        )
+        self.assertEqual(self.canonical("page=1&city="), self.canonical(""))
+        self.assertEqual(self.canonical("city=a&city=b"), self.canonical("city=b"))
+        self.assertNotEqual(self.canonical("cursor="), self.canonical(""))
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+        self.listing = Listing.objects.create(
+            zillow_id="1", city="Encino", price=75000000, bedrooms=3
+        )
+        Listing.objects.create(zillow_id="2", city="Tarzana", price=25000000)
+
+    def test_repeated_query_is_served_with_one_generation_query(self):
+        first = self.client.get(self.url, {"ordering": "-price"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(1):  # the import generation
+            second = self.client.get(self.url, {"ordering": "-price"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_generation_bumped_by_another_process_invalidates_responses(self):
+        self.client.get(self.url, {"ordering": "-price"})
+        # What an import in another process leaves behind: a new generation
+        # in the database, and nothing in this process's cache.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE api_importgeneration SET generation = generation + 1"
+            )
+        response = self.client.get(self.url, {"ordering": "-price"})
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_equivalent_queries_share_an_entry(self):
+        self.client.get(self.url, {"city": "Encino", "bedrooms": "3"})
+        response = self.client.get(self.url + "?bedrooms=3&city=ENCINO")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_different_queries_do_not_share_an_entry(self):
+        self.client.get(self.url, {"city": "Encino"})
+        response = self.client.get(self.url, {"city": "Tarzana"})
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["zillow_id"], "2")
+
+    def test_import_invalidates_responses(self):
+        self.client.get(self.url)
+        import_rows([make_row("3")])
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_saving_a_listing_invalidates_responses(self):
+        detail = reverse("listing-detail", args=[self.listing.pk])
+        self.client.get(detail)
+        self.assertEqual(self.client.get(detail)["X-Cache"], "HIT")
+        self.listing.city = "Van Nuys"
+        with committing(self):
+            self.listing.save()
+        response = self.client.get(detail)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["city"], "Van Nuys")
+
+    def test_errors_are_not_cached(self):
+        detail = reverse("listing-detail", args=[999])
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        response = self.client.get(detail)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("X-Cache"))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+        self.listing = Listing.objects.create(zillow_id="1", price=75000000)
+
+    def test_list_not_modified(self):
+        first = self.client.get(self.url, {"ordering": "-price"})
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertTrue(first.has_header("Last-Modified"))
+        self.assertIn("public", first["Cache-Control"])
+        self.assertIn("s-maxage=", first["Cache-Control"])
+        self.assertIn("Accept", first["Vary"])
+
+        with self.assertNumQueries(1):  # the import generation
+            response = self.client.get(
+                self.url + "?ordering=-price&page=1", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+        other = self.client.get(self.url, {"ordering": "price"})
+        self.assertNotEqual(other["ETag"], etag)
+
+    def test_import_changes_list_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        import_rows([make_row("2")])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_import_by_another_process_changes_list_validators(self):
+        first = self.client.get(self.url)
+        # An import in another process only changes the database row.
+        ImportGeneration.objects.update(
+            generation=F("generation") + 1,
+            started_at=timezone.now() + timedelta(minutes=1),
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_modified_until_saved(self):
+        detail = reverse("listing-detail", args=[self.listing.pk])
+        first = self.client.get(detail)
+        etag = first["ETag"]
+        # The validators come from the cached response; only the import
+        # generation is read.
+        with self.assertNumQueries(1):
+            response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        sparse = self.client.get(detail, {"fields": "id"})
+        self.assertNotEqual(sparse["ETag"], etag)
+
+        self.listing.city = "Van Nuys"
+        with committing(self):
+            self.listing.save()
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        bump_generation()
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_relocation_changes_detail_validators(self):
+        detail = reverse("listing-detail", args=[self.listing.pk])
+        first = self.client.get(detail)
+        # Relocations and backfills neither save the listing nor change its
+        # data_hash; they start a new import generation.
+        Listing.objects.filter(pk=self.listing.pk).update(
+            latitude=34.2, longitude=-118.6
+        )
+        ImportGeneration.objects.update(
+            generation=F("generation") + 1,
+            started_at=timezone.now() + timedelta(minutes=1),
+        )
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["latitude"], 34.2)
+        response = self.client.get(
+            detail, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_listing_has_no_validators(self):
+        response = self.client.get(reverse("listing-detail", args=[999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
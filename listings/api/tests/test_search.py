@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Listing
+from ..search import (
+    SEARCH_TABLE,
+    restore_sqlite_triggers,
+    search,
+    sqlite_search_supported,
+)
+
+
+def make_listing(zillow_id, address, city, state="CA", zipcode="91316"):
+    return Listing.objects.create(
+        zillow_id=zillow_id, address=address, city=city, state=state, zipcode=zipcode
+    )
+
+
+class ListingSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.encino = make_listing("1", "4924 Quimby Ave", "Encino", zipcode="91316")
+        self.oaks = make_listing("2", "3939 Vicky Pl", "Sherman Oaks", zipcode="91423")
+        self.austin = make_listing("3", "12 Oak St", "Austin", "TX", "78701")
+
+    def search_ids(self, **params):
+        response = self.client.get(reverse("listing-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["zillow_id"] for item in response.json()["results"])
+
+    def test_search_matches_substrings_case_insensitively(self):
+        self.assertEqual(self.search_ids(search="QUIMB"), ["1"])
+        self.assertEqual(self.search_ids(search="oak"), ["2", "3"])
+        self.assertEqual(self.search_ids(search="914"), ["2"])
+
+    def test_search_terms_must_all_match(self):
+        self.assertEqual(self.search_ids(search="oak sherman"), ["2"])
+        self.assertEqual(self.search_ids(search="oak encino"), [])
+
+    def test_short_terms_fall_back_to_icontains(self):
+        self.assertEqual(self.search_ids(search="TX"), ["3"])
+        self.assertEqual(self.search_ids(search="tx oak"), ["3"])
+
+    def test_quotes_in_terms_are_literal(self):
+        self.assertEqual(self.search_ids(search='"oak'), [])
+
+    def test_substring_filters(self):
+        self.assertEqual(self.search_ids(city="OAKS"), ["2"])
+        self.assertEqual(self.search_ids(address="vicky pl"), ["2"])
+        self.assertEqual(self.search_ids(zipcode="9142"), ["2"])
+        self.assertEqual(self.search_ids(address="oak", city="austin"), ["3"])
+
+    def test_index_follows_updates_and_deletes(self):
+        Listing.objects.filter(pk=self.encino.pk).update(city="Tarzana")
+        self.oaks.delete()
+        self.assertEqual(self.search_ids(search="tarzana"), ["1"])
+        self.assertEqual(self.search_ids(search="encino"), [])
+        self.assertEqual(self.search_ids(search="sherman"), [])
+
+    def test_uses_search_table_on_sqlite(self):
+        queryset = search(Listing.objects.all(), ["quimby"], ["address"])
+        uses_table = SEARCH_TABLE in str(queryset.query)
+        self.assertEqual(uses_table, sqlite_search_supported(connection))
+
+    def test_restore_triggers_after_table_rebuild(self):
+        if not sqlite_search_supported(connection):
+            self.skipTest("SQLite FTS5 trigram search is not available")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {SEARCH_TABLE}_insert")
+        restore_sqlite_triggers()
+        make_listing("4", "1 Ventura Blvd", "Studio City")
+        self.assertEqual(self.search_ids(search="ventura"), ["4"])
@@ -0,0 +1,128 @@
+import datetime
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Listing
+from ..serializers import ListingRowSerializer, ListingSerializer
+from .test_import import import_rows, make_row
+
+
+class ListingRowSerializerTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1"),
+                make_row("2", price="$1.2M", bathrooms="3", last_sold_price=""),
+                make_row("3", price="", bathrooms="", last_sold_date=""),
+            ]
+        )
+        Listing.objects.create(
+            zillow_id="4",
+            price=0,
+            bathrooms=2.25,
+            last_sold_date="2020-01-15",
+            last_imported_at=datetime.datetime(
+                2024, 5, 6, 7, 8, 9, 123456, tzinfo=datetime.timezone.utc
+            ),
+        )
+        self.listings = Listing.objects.order_by("id")
+
+    def assertSameOutput(self):
+        expected = ListingSerializer(self.listings, many=True).data
+        rows = self.listings.values_list(*ListingRowSerializer.columns, named=True)
+        self.assertEqual(ListingRowSerializer(rows, many=True).data, expected)
+        self.assertEqual(ListingRowSerializer(self.listings, many=True).data, expected)
+        listing = self.listings[0]
+        self.assertEqual(
+            ListingRowSerializer(listing).data, ListingSerializer(listing).data
+        )
+
+    def test_matches_listing_serializer(self):
+        self.assertSameOutput()
+
+    def test_matches_listing_serializer_in_other_time_zones(self):
+        with timezone.override("America/Los_Angeles"):
+            self.assertSameOutput()
+
+    def test_api_output_is_identical(self):
+        client = APIClient()
+        url = reverse("listing-list")
+        fast = client.get(url, {"serializer": "fast", "ordering": "price"})
+        drf = client.get(url, {"serializer": "drf", "ordering": "price"})
+        self.assertEqual(json.loads(fast.content), json.loads(drf.content))
+        detail = reverse("listing-detail", args=[self.listings[0].pk])
+        self.assertEqual(
+            client.get(detail, {"serializer": "fast"}).json(),
+            client.get(detail, {"serializer": "drf"}).json(),
+        )
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("listing-list")
+        import_rows([make_row(str(i), price=f"${i}00K") for i in range(1, 6)])
+
+    def get(self, params, url=None):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_fields(self):
+        for serializer in ("fast", "drf"):
+            data = self.get({"fields": "price,id", "serializer": serializer})
+            self.assertEqual(list(data["results"][0]), ["id", "price"])
+
+    def test_exclude(self):
+        data = self.get({"exclude": "link,data_hash"})
+        self.assertEqual(
+            list(data["results"][0]),
+            [
+                f
+                for f in ListingSerializer.Meta.fields
+                if f not in ("link", "data_hash")
+            ],
+        )
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.url, {"fields": "id,nope", "exclude": "bad"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"fields", "exclude"})
+        response = self.client.get(self.url, {"fields": "id", "exclude": "id"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_requested_columns_are_queried(self):
+        for serializer in ("fast", "drf"):
+            with CaptureQueriesContext(connection) as queries:
+                self.get({"fields": "address", "serializer": serializer})
+            page_sql = queries.captured_queries[-1]["sql"]
+            self.assertIn('"address"', page_sql)
+            self.assertNotIn('"link"', page_sql)
+            self.assertNotIn('"data_hash"', page_sql)
+
+    def test_keyset_pages_with_fields(self):
+        params = {
+            "fields": "address",
+            "ordering": "-price",
+            "cursor": "",
+            "page_size": 2,
+        }
+        first = self.get(params)
+        self.assertEqual(first["results"], [{"address": "7417 Quimby Ave"}] * 2)
+        second = self.client.get(first["next"])
+        self.assertEqual(len(second.json()["results"]), 2)
+
+    def test_detail_with_fields(self):
+        listing = Listing.objects.get(zillow_id="1")
+        url = reverse("listing-detail", args=[listing.pk])
+        for serializer in ("fast", "drf"):
+            data = self.get(
+                {"fields": "zillow_id,price", "serializer": serializer}, url
+            )
+            self.assertEqual(data, {"zillow_id": "1", "price": "$100,000"})
@@ -0,0 +1,103 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .. import snapshot
+from ..benchmarks import seed_listings
+from ..cache import bump_generation
+from ..models import Listing
+
+QUERIES = [
+    "",
+    "ordering=price",
+    "ordering=-last_sold_price",
+    "ordering=last_sold_price&page=3",
+    "price_min=500K&price_max=1M&ordering=-price",
+    "bedrooms=3,4&ordering=home_size",
+    "bathrooms=2.5&bedrooms_min=2",
+    "home_size_min=2000&home_size_max=2200",
+    "year_built_min=1990&ordering=-year_built&page_size=5&page=2",
+    "last_sold_price_max=300K&ordering=-zestimate_amount",
+    "price_min=2M&price_max=1M",
+    "bedrooms=x",
+    "bedrooms=,",
+    "bedrooms=4,5&bedrooms_min=5",
+    "bedrooms=2,3,4&bedrooms_min=3&bedrooms_max=3&ordering=price",
+    "bathrooms=2&bathrooms_max=1",
+    "bathrooms=1,2,3.5&bathrooms_min=1.5&bedrooms=3&bedrooms_min=2",
+    "fields=id,price&ordering=-price",
+]
+
+
+class ListingSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_listings(400)
+
+    def setUp(self):
+        snapshot.listing_snapshot.clear()
+        self.client = APIClient()
+
+    def fetch(self, query, enabled):
+        bump_generation()  # bypass the response cache
+        with override_settings(LISTINGS_SNAPSHOT=enabled):
+            response = self.client.get(f"{reverse('listing-list')}?{query}")
+        self.assertEqual(response.status_code, 200, query)
+        return response.json()
+
+    def ordered_values(self, query, data):
+        ordering = dict(
+            part.split("=") for part in query.split("&") if part.startswith("ordering")
+        ).get("ordering", "-created_at")
+        ids = [row["id"] for row in data["results"]]
+        values = dict(
+            Listing.objects.filter(id__in=ids).values_list("id", ordering.lstrip("-"))
+        )
+        return [values[pk] for pk in ids]
+
+    def test_matches_database(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                expected = self.fetch(query, enabled=False)
+                actual = self.fetch(query, enabled=True)
+                self.assertEqual(actual["count"], expected["count"])
+                self.assertEqual(
+                    self.ordered_values(query, actual),
+                    self.ordered_values(query, expected),
+                )
+                self.assertEqual(
+                    actual["results"] and list(actual["results"][0]),
+                    expected["results"] and list(expected["results"][0]),
+                )
+
+    def test_full_result(self):
+        query = "price_min=300K&ordering=-price&page_size=100"
+        with override_settings(LISTINGS_SNAPSHOT=True):
+            ids = [
+                row["id"]
+                for page in range(1, 5)
+                for row in self.fetch(f"{query}&page={page}", enabled=True)["results"]
+            ]
+        expected = Listing.objects.filter(price__gte=30_000_000).order_by("-price")
+        self.assertEqual(len(ids), expected.count())
+        self.assertEqual(set(ids), set(expected.values_list("id", flat=True)))
+
+    def test_serves_page_with_one_query(self):
+        self.fetch("ordering=price", enabled=True)  # builds the snapshot
+        # Every request reads the import generation.
+        with override_settings(LISTINGS_SNAPSHOT=True):
+            with self.assertNumQueries(2):
+                self.client.get(
+                    f"{reverse('listing-list')}?price_min=500K&ordering=price"
+                )
+            # Other filters go to the database.
+            with self.assertNumQueries(3):
+                self.client.get(f"{reverse('listing-list')}?state=CA&page_size=5")
+
+    def test_rebuilt_after_import(self):
+        self.fetch("", enabled=True)
+        built = snapshot.get_snapshot()
+        seed_listings(410)
+        data = self.fetch("ordering=price", enabled=True)
+        self.assertIsNot(snapshot.get_snapshot(), built)
+        self.assertEqual(data["count"], 410)
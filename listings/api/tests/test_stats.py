@@ -0,0 +1,149 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Listing
+from ..stats import Percentile, PercentileCont, listing_stats, parse_percentile
+from .test_import import import_rows, make_row
+
+
+class PercentileContTests(TestCase):
+    def percentile(self, fraction, values):
+        aggregate = PercentileCont()
+        for value in values:
+            aggregate.step(fraction, value)
+        return aggregate.finalize()
+
+    def test_interpolates(self):
+        self.assertEqual(self.percentile(0.5, [4, 1, 3, 2]), 2.5)
+        self.assertEqual(self.percentile(0.9, [10, 20]), 19.0)
+        self.assertEqual(self.percentile(0, [3, 1, 2]), 1)
+        self.assertEqual(self.percentile(1, [3, 1, 2]), 3)
+
+    def test_ignores_nulls(self):
+        self.assertEqual(self.percentile(0.5, [None, 5, None]), 5)
+        self.assertIsNone(self.percentile(0.5, [None]))
+        self.assertIsNone(self.percentile(0.5, []))
+
+    def test_parse_percentile(self):
+        self.assertEqual(parse_percentile("p50"), 0.5)
+        self.assertEqual(parse_percentile("p99.9"), 99.9 / 100)
+        self.assertIsNone(parse_percentile("p101"))
+        self.assertIsNone(parse_percentile("pmax"))
+        self.assertIsNone(parse_percentile("avg"))
+
+
+class ListingStatsTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$100K", zipcode="91307", home_type="Condominium"),
+                make_row("2", price="$200K", zipcode="91307"),
+                make_row("3", price="$400K", zipcode="91307"),
+                make_row("4", price="$1M", zipcode="91436", state="TX"),
+                make_row("5", price="", zipcode="91436", state="TX"),
+            ]
+        )
+        self.client = APIClient()
+        self.url = reverse("listing-stats")
+
+    def test_percentile_runs_in_sql(self):
+        result = Listing.objects.aggregate(median=Percentile("price", 0.5))
+        self.assertEqual(result["median"], 30_000_000)
+        self.assertIn(
+            "PERCENTILE_CONT",
+            str(Listing.objects.annotate(median=Percentile("price", 0.5)).query),
+        )
+
+    def test_grouped(self):
+        results = listing_stats(
+            Listing.objects.all(), ["zipcode"], ["price"], ["min", "avg", "p50"]
+        )
+        self.assertEqual(
+            results,
+            [
+                {
+                    "zipcode": "91307",
+                    "count": 3,
+                    "price": {"min": 10_000_000, "avg": 23_333_333, "p50": 20_000_000},
+                },
+                {
+                    "zipcode": "91436",
+                    "count": 2,
+                    "price": {
+                        "min": 100_000_000,
+                        "avg": 100_000_000,
+                        "p50": 100_000_000,
+                    },
+                },
+            ],
+        )
+
+    def test_ungrouped(self):
+        results = listing_stats(Listing.objects.none(), [], ["price"], ["max"])
+        self.assertEqual(results, [{"count": 0, "price": {"max": None}}])
+
+    def test_endpoint_applies_filters(self):
+        response = self.client.get(
+            self.url,
+            {
+                "group_by": "home_type",
+                "metrics": "rent_price,price",
+                "aggregates": "p90,max",
+                "state": "ca",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["group_by"], ["home_type"])
+        self.assertEqual(
+            data["results"][1],
+            {
+                "home_type": "SingleFamily",
+                "count": 2,
+                "price": {"max": 40_000_000, "p90": 38_000_000},
+                "rent_price": {"max": 285_000, "p90": 285_000},
+            },
+        )
+        self.assertEqual(list(data["results"][1]["price"]), ["max", "p90"])
+
+    def test_endpoint_default(self):
+        response = self.client.get(self.url, {"search": "quimby"})
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "count": 5,
+                    "price": {
+                        "min": 10_000_000,
+                        "max": 100_000_000,
+                        "avg": 42_500_000,
+                        "p50": 30_000_000,
+                    },
+                }
+            ],
+        )
+
+    def test_unknown_values(self):
+        response = self.client.get(
+            self.url, {"group_by": "address", "metrics": "price", "aggregates": "sum"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"group_by", "aggregates"})
+
+    def test_cached_until_import(self):
+        params = {"group_by": "state"}
+        self.assertEqual(self.client.get(self.url, params)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.url, params)["X-Cache"], "HIT")
+        import_rows([make_row("6", state="NY")])
+        response = self.client.get(self.url, params)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def test_sqlite_aggregate_registered(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT percentile_cont(0.5, price) FROM api_listing")
+            self.assertEqual(cursor.fetchone()[0], 30_000_000)
@@ -0,0 +1,205 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..facets import facet_counts
+from ..models import Listing, ListingSummary
+from ..stats import listing_stats
+from ..summary import SUMMARY_FIELDS, refresh_summaries, summarize
+from .test_import import import_rows, make_row
+
+
+@contextmanager
+def committing(test_case):
+    """Run the block in a transaction of its own and its on-commit callbacks,
+    which ``TestCase`` never commits."""
+    with test_case.captureOnCommitCallbacks(execute=True), transaction.atomic():
+        yield
+
+
+def summary_rows():
+    fields = [f.name for f in ListingSummary._meta.fields if f.name != "id"]
+    return sorted(
+        ListingSummary.objects.values_list(*fields),
+        key=lambda row: [str(value) for value in row],
+    )
+
+
+class RefreshSummariesTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$100K", zipcode="91307"),
+                make_row("2", price="$300K", zipcode="91307", rent_price=""),
+                make_row("3", price="$1M", zipcode="91436", bedrooms="4"),
+                make_row("4", price="", zipcode="91436", bedrooms=""),
+            ]
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = summary_rows()
+        refresh_summaries()
+        self.assertEqual(incremental, summary_rows())
+
+    def test_import_fills_summary(self):
+        group = ListingSummary.objects.get(zipcode="91307")
+        self.assertEqual(group.count, 2)
+        self.assertEqual(
+            (group.price_count, group.price_sum, group.price_min, group.price_max),
+            (2, 40_000_000, 10_000_000, 30_000_000),
+        )
+        self.assertEqual(group.rent_price_count, 1)
+        self.assertEqual(ListingSummary.objects.filter(zipcode="91436").count(), 2)
+        self.assertMatchesRebuild()
+
+    def test_unchanged_import_refreshes_nothing(self):
+        stats = import_rows([make_row("1", price="$100K", zipcode="91307")])
+        self.assertEqual(stats.zipcodes, set())
+
+    def test_moved_listing_refreshes_both_zipcodes(self):
+        stats = import_rows([make_row("3", price="$1M", zipcode="91307", bedrooms="4")])
+        self.assertEqual(stats.zipcodes, {"91307", "91436"})
+        self.assertEqual(ListingSummary.objects.get(zipcode="91436").bedrooms, None)
+        self.assertEqual(ListingSummary.objects.filter(zipcode="91307").count(), 2)
+        self.assertMatchesRebuild()
+
+    def test_only_changed_zipcodes_are_recomputed(self):
+        with CaptureQueriesContext(connection) as queries:
+            import_rows([make_row("5", zipcode="90210")])
+        refreshes = [q["sql"] for q in queries if "GROUP BY" in q["sql"]]
+        self.assertEqual(len(refreshes), 1)
+        self.assertIn("'90210'", refreshes[0])
+        self.assertNotIn("'91307'", refreshes[0])
+        self.assertMatchesRebuild()
+
+    def test_model_save_and_delete(self):
+        listing = Listing.objects.get(zillow_id="1")
+        listing.zipcode = "90210"
+        with committing(self):
+            listing.save()
+        self.assertEqual(ListingSummary.objects.get(zipcode="90210").count, 1)
+        self.assertEqual(ListingSummary.objects.get(zipcode="91307").count, 1)
+        with committing(self):
+            Listing.objects.get(zillow_id="2").delete()
+        self.assertFalse(ListingSummary.objects.filter(zipcode="91307").exists())
+        self.assertMatchesRebuild()
+
+    def test_saves_in_one_transaction_refresh_once(self):
+        first, second, third = Listing.objects.filter(zillow_id__in=["1", "2", "3"])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                first.zipcode = "90210"
+                first.save()
+                # Later saves only write the listing.
+                with self.assertNumQueries(1):
+                    second.save()
+                with self.assertNumQueries(1):
+                    third.delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ListingSummary.objects.get(zipcode="90210").count, 1)
+        self.assertMatchesRebuild()
+
+    def test_summarize_groups(self):
+        rows = summarize(Listing.objects.all())
+        self.assertEqual(sum(row.count for row in rows), 4)
+        self.assertEqual(
+            len({tuple(getattr(row, f) for f in SUMMARY_FIELDS) for row in rows}), 3
+        )
+
+
+class AutocommitRefreshTests(TransactionTestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$100K", zipcode="91307"),
+                make_row("2", price="$300K", zipcode="91307"),
+            ]
+        )
+
+    def test_model_save_and_delete(self):
+        listing = Listing.objects.get(zillow_id="1")
+        listing.zipcode = "90210"
+        listing.save()
+        self.assertEqual(ListingSummary.objects.get(zipcode="90210").count, 1)
+        self.assertEqual(ListingSummary.objects.get(zipcode="91307").count, 1)
+        Listing.objects.get(zillow_id="2").delete()
+        self.assertFalse(ListingSummary.objects.filter(zipcode="91307").exists())
+        incremental = summary_rows()
+        refresh_summaries()
+        self.assertEqual(incremental, summary_rows())
+
+
+class SummaryReadTests(TestCase):
+    def setUp(self):
+        import_rows(
+            [
+                make_row("1", price="$100K", home_type="Condominium"),
+                make_row("2", price="$300K", city="Encino", zipcode="91436"),
+                make_row("3", price="$1M", state="TX", city="Austin", zipcode="78701"),
+                make_row("4", price="$500K", bedrooms="4", zipcode="91436"),
+                make_row("5", price="", bedrooms="", zipcode="91436"),
+            ]
+        )
+        self.client = APIClient()
+
+    def get(self, name, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        tables = {
+            table
+            for query in queries
+            for table in ("api_listingsummary", 'api_listing"')
+            if table in query["sql"]
+        }
+        return response.json(), tables
+
+    def test_stats_from_summary(self):
+        params = {
+            "group_by": "state,bedrooms",
+            "metrics": "price,rent_price",
+            "aggregates": "min,max,avg",
+            "city": "en",
+            "bedrooms_min": "3",
+        }
+        data, tables = self.get("listing-stats", params)
+        self.assertEqual(tables, {"api_listingsummary"})
+        expected = listing_stats(
+            Listing.objects.filter(city__icontains="en", bedrooms__gte=3),
+            ["state", "bedrooms"],
+            ["price", "rent_price"],
+            ["min", "max", "avg"],
+        )
+        self.assertEqual(data["results"], expected)
+
+    def test_stats_fall_back_to_listings(self):
+        _, tables = self.get("listing-stats", {"aggregates": "p50"})
+        self.assertEqual(tables, {'api_listing"'})
+        _, tables = self.get("listing-stats", {"search": "quimby"})
+        self.assertNotIn("api_listingsummary", tables)
+        _, tables = self.get("listing-stats", {"metrics": "tax_value"})
+        self.assertNotIn("api_listingsummary", tables)
+
+    def test_facets_from_summary(self):
+        params = {"state": "ca", "facets": "home_type,bedrooms,state"}
+        data, tables = self.get("listing-facets", params)
+        self.assertEqual(tables, {"api_listingsummary"})
+        self.assertEqual(
+            data,
+            facet_counts(
+                Listing.objects.filter(state__iexact="ca"),
+                ["home_type", "bedrooms", "state"],
+            ),
+        )
+
+    def test_facets_mix_summary_and_listings(self):
+        data, tables = self.get("listing-facets", {"facets": "state,price"})
+        self.assertEqual(tables, {"api_listingsummary", 'api_listing"'})
+        self.assertEqual(
+            data["state"], [{"value": "CA", "count": 4}, {"value": "TX", "count": 1}]
+        )
+        self.assertEqual(sum(bucket["count"] for bucket in data["price"]), 4)
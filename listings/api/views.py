@@ -1,146 +1,232 @@
-from django.db.models import Q
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import QuerySet, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
 from django_filters import filters as django_filters
-from django_filters.rest_framework import DjangoFilterBackend, FilterSet
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .bitmaps import BITMAP_FIELDS, BitmapIndex, filter_conditions, get_bitmap_index
+from .cache import (
+    get_generation,
+    get_generation_time,
+    listings_cache,
+    pinned_generation,
+)
+from .counting import remember_count
+from .export import EXPORT_FORMATS, export_listings
+from .facets import FACETS, facet_counts
+from .geo import BoundingBoxFilter, NearFilter, RadiusFilter
+from .models import (
+    DERIVED_METRICS,
+    DISPLAY_FIELDS,
+    PRICE_FIELDS,
+    Listing,
+    ListingSummary,
+)
+from .pagination import CustomPageNumberPagination, KeysetPagination
+from .query import PAGING_PARAMS, canonical_query
+from .ranges import RangeBoundFilter, RangeFilterSet
+from .search import search
+from .serializers import ListingRowSerializer, ListingSerializer
+from .snapshot import (
+    MEMBER_FIELDS,
+    ORDER_ONLY_FIELDS,
+    SNAPSHOT_FIELDS,
+    SnapshotRows,
+    get_snapshot,
+    snapshot_ids,
+)
+from .stats import (
+    AGGREGATES,
+    DEFAULT_AGGREGATES,
+    DEFAULT_METRICS,
+    GROUP_BY_FIELDS,
+    METRIC_FIELDS,
+    listing_stats,
+    parse_percentile,
+)
+from .summary import SUMMARY_AGGREGATES, SUMMARY_FIELDS, SUMMARY_METRICS, summary_stats
+
+
+class CachedResponseMixin(viewsets.GenericViewSet):
+    """Mixin to serve ``list`` and ``retrieve`` responses from the listings cache.
+
+    Rendered responses are cached per import generation, so an import or a
+    saved listing invalidates them all. The key is built from the canonical
+    query string, so equivalent queries share an entry, and a hit is answered
+    with a single query, for the import generation.
+
+    Responses carry a strong ``ETag`` and a ``Last-Modified`` date: from the
+    import generation and the canonical query for lists, and also from the
+    listing's ``data_hash`` and ``updated_at`` for details. Relocations and
+    backfills change listings without saving them, but start a new import
+    generation. A request whose ``If-None-Match`` or ``If-Modified-Since``
+    still matches gets a ``304`` without the response being computed.
+    ``Cache-Control`` lets browsers and shared caches keep responses for
+    ``LISTINGS_HTTP_MAX_AGE`` and ``LISTINGS_HTTP_SHARED_MAX_AGE`` seconds.
+    """
 
-from .models import Listing
-from .pagination import CustomPageNumberPagination
-from .serializers import ListingSerializer
-from .utils import convert_price_param_to_cents
-
-
-class RangeFilterMixin:
-    """Mixin to add min/max range filtering for numeric fields."""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if not hasattr(self, "filters"):
-            self.filters = {}
-
-    def create_range_filter(self, field_name, filter_name=None):
-        """Create min/max filters for a numeric field."""
-        if filter_name is None:
-            filter_name = field_name
-
-        self.filters[f"{filter_name}_min"] = django_filters.NumberFilter(
-            field_name=field_name,
-            lookup_expr="gte",
-        )
-        self.filters[f"{filter_name}_max"] = django_filters.NumberFilter(
-            field_name=field_name,
-            lookup_expr="lte",
-        )
-
-
-class PriceRangeFilterMixin:
-    """Mixin to add price range filtering with currency conversion."""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if not hasattr(self, "filters"):
-            self.filters = {}
-
-    def create_price_range_filter(self, field_name, filter_name=None):
-        """Create min/max filters for a price field with currency conversion."""
-        if filter_name is None:
-            filter_name = field_name
-
-        self.filters[f"{filter_name}_min"] = django_filters.CharFilter(
-            method=f"filter_{field_name}_min",
-        )
-        self.filters[f"{filter_name}_max"] = django_filters.CharFilter(
-            method=f"filter_{field_name}_max",
-        )
-
-    def filter_price_range(self, queryset, field, min_value=None, max_value=None):
-        """Filter queryset by price range.
-        Uses a single Q object to combine min and max conditions.
+    cache_key_prefix = "listings:response"
+
+    def dispatch(self, request, *args, **kwargs):
+        # Read the import generation once for every cache the request uses.
+        with pinned_generation():
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_request_digest(self, request: Any) -> str:
+        """Digest of what, besides the data, determines the response."""
+        parts = [
+            self.action,
+            request.scheme,
+            request.get_host(),
+            request.accepted_renderer.format,
+            str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, "")),
+            canonical_query(request.query_params),
+        ]
+        return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+    def get_response_cache_key(self, request: Any) -> str:
+        digest = self.get_request_digest(request)
+        return f"{self.cache_key_prefix}:{get_generation()}:{digest}"
+
+    def get_validators(self, request: Any) -> Tuple[Optional[str], Optional[float]]:
+        """The ``ETag`` and ``Last-Modified`` timestamp of the response.
+
+        Details cost one query for the listing's ``data_hash`` and
+        ``updated_at``; both are None when the listing does not exist.
         """
-        if not min_value and not max_value:
+        digest = self.get_request_digest(request)
+        generation = get_generation()
+        if self.action != "retrieve":
+            return f'"{generation}-{digest}"', get_generation_time(generation)
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            row = (
+                Listing.objects.filter(**{self.lookup_field: lookup})
+                .order_by()
+                .values_list("data_hash", "updated_at")
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            return None, None
+        data_hash, updated_at = row
+        version = f"{data_hash}:{updated_at.isoformat()}:{generation}:{digest}"
+        etag = f'"{hashlib.sha1(version.encode()).hexdigest()}"'
+        return etag, max(updated_at.timestamp(), get_generation_time(generation))
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        cached = listings_cache().get(key)
+        if cached is not None:
+            content, content_type, etag, last_modified = cached
+        else:
+            etag, last_modified = self.get_validators(request)
+        self.validators = etag, last_modified
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=int(last_modified)
+            )
+            if not_modified is not None:
+                return not_modified
+        if cached is not None:
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Cache"] = "HIT"
+            return response
+        self.response_cache_key = key
+        return handler(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, last_modified = getattr(self, "validators", (None, None))
+        if etag is not None and response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=settings.LISTINGS_HTTP_MAX_AGE,
+                s_maxage=settings.LISTINGS_HTTP_SHARED_MAX_AGE,
+            )
+            patch_vary_headers(response, ("Accept",))
+        key = getattr(self, "response_cache_key", None)
+        if key and response.status_code == 200:
+            response.render()
+            listings_cache().set(
+                key,
+                (response.content, response["Content-Type"], etag, last_modified),
+                settings.LISTINGS_RESPONSE_CACHE_TIMEOUT,
+            )
+            response["X-Cache"] = "MISS"
+        return response
+
+
+class ListingSearchFilter(filters.SearchFilter):
+    """SearchFilter backed by the listing search index (see ``api.search``)."""
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
             return queryset
+        return search(queryset, search_terms, search_fields)
 
-        filters = Q()
 
-        if min_value:
-            min_cents = convert_price_param_to_cents(min_value)
-            if min_cents is not None:
-                filters &= Q(**{f"{field}__gte": min_cents})
+class SubstringFilter(django_filters.CharFilter):
+    """Case-insensitive substring filter backed by the listing search index."""
 
-        if max_value:
-            max_cents = convert_price_param_to_cents(max_value)
-            if max_cents is not None:
-                filters &= Q(**{f"{field}__lte": max_cents})
-
-        return queryset.filter(filters) if filters else queryset.none()
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return search(qs, [value], [self.field_name])
 
 
-class ListingFilter(FilterSet, RangeFilterMixin, PriceRangeFilterMixin):
+class ListingFilter(RangeFilterSet):
     """Filter for Listing model with support for range and price filtering."""
 
     # Address-related filters
-    address = django_filters.CharFilter(lookup_expr="icontains")
-    city = django_filters.CharFilter(lookup_expr="icontains")
+    address = SubstringFilter()
+    city = SubstringFilter()
     state = django_filters.CharFilter(lookup_expr="iexact")
-    zipcode = django_filters.CharFilter(lookup_expr="icontains")
+    zipcode = SubstringFilter()
 
     bedrooms = django_filters.CharFilter(method="filter_bedrooms")
     bathrooms = django_filters.CharFilter(method="filter_bathrooms")
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        # Add range filters for numeric fields
-        self.create_range_filter("home_size")
-        self.create_range_filter("bedrooms")
-        self.create_range_filter("bathrooms")
-        self.create_range_filter("property_size")
-        self.create_range_filter("year_built")
+    # Location filters, served by the spatial index (see api.geo).
+    near = NearFilter()
+    radius_km = RadiusFilter()
+    bbox = BoundingBoxFilter()
 
-        # Add price range filters
-        self.create_price_range_filter("price")
-        self.create_price_range_filter("last_sold_price")
-        self.create_price_range_filter("rent_price")
-        self.create_price_range_filter("rentzestimate_amount")
-        self.create_price_range_filter("tax_value")
-        self.create_price_range_filter("zestimate_amount")
-
-    def filter_price_min(self, queryset, name, value):
-        return self.filter_price_range(queryset, "price", min_value=value)
-
-    def filter_price_max(self, queryset, name, value):
-        return self.filter_price_range(queryset, "price", max_value=value)
-
-    def filter_last_sold_price_min(self, queryset, name, value):
-        return self.filter_price_range(queryset, "last_sold_price", min_value=value)
-
-    def filter_last_sold_price_max(self, queryset, name, value):
-        return self.filter_price_range(queryset, "last_sold_price", max_value=value)
-
-    def filter_rent_price_min(self, queryset, name, value):
-        return self.filter_price_range(queryset, "rent_price", min_value=value)
-
-    def filter_rent_price_max(self, queryset, name, value):
-        return self.filter_price_range(queryset, "rent_price", max_value=value)
-
-    def filter_rentzestimate_amount_min(self, queryset, name, value):
-        field = "rentzestimate_amount"
-        return self.filter_price_range(queryset, field, min_value=value)
-
-    def filter_rentzestimate_amount_max(self, queryset, name, value):
-        field = "rentzestimate_amount"
-        return self.filter_price_range(queryset, field, max_value=value)
-
-    def filter_tax_value_min(self, queryset, name, value):
-        return self.filter_price_range(queryset, "tax_value", min_value=value)
-
-    def filter_tax_value_max(self, queryset, name, value):
-        return self.filter_price_range(queryset, "tax_value", max_value=value)
-
-    def filter_zestimate_amount_min(self, queryset, name, value):
-        return self.filter_price_range(queryset, "zestimate_amount", min_value=value)
-
-    def filter_zestimate_amount_max(self, queryset, name, value):
-        return self.filter_price_range(queryset, "zestimate_amount", max_value=value)
+    # <field>_min/<field>_max filters, applied together by RangeFilterSet.
+    range_fields = [
+        "home_size",
+        "bedrooms",
+        "bathrooms",
+        "property_size",
+        "year_built",
+    ]
+    price_range_fields = PRICE_FIELDS
 
     def filter_bedrooms(self, queryset, name: str, value: str):
         """Filter by a single value or a comma-separated list of bedroom counts."""
@@ -171,7 +257,51 @@ class ListingFilter(FilterSet, RangeFilterMixin, PriceRangeFilterMixin):
         }
 
 
-class ListingViewSet(viewsets.ReadOnlyModelViewSet):
+class ListingSummaryFilter(RangeFilterSet):
+    """The ``ListingFilter`` filters that ``ListingSummary`` rows can answer."""
+
+    city = django_filters.CharFilter(lookup_expr="icontains")
+    state = django_filters.CharFilter(lookup_expr="iexact")
+    zipcode = django_filters.CharFilter(lookup_expr="icontains")
+    bedrooms = django_filters.CharFilter(method="filter_bedrooms")
+
+    range_fields = ["bedrooms"]
+
+    filter_bedrooms = ListingFilter.filter_bedrooms
+
+    class Meta:
+        model = ListingSummary
+        fields = {
+            "home_type": ["exact"],
+        }
+
+
+# List parameters the listing snapshot can answer (see api.snapshot).
+SNAPSHOT_PARAMS = (
+    {
+        name
+        for name, bound_filter in ListingFilter.base_filters.items()
+        if isinstance(bound_filter, RangeBoundFilter)
+        and bound_filter.field_name in SNAPSHOT_FIELDS
+    }
+    | set(MEMBER_FIELDS)
+    | PAGING_PARAMS
+    | {"ordering"}
+)
+
+# Filters the bitmap index can answer (see api.bitmaps).
+BITMAP_PARAMS = set(BITMAP_FIELDS) | {
+    name
+    for name, bound_filter in ListingFilter.base_filters.items()
+    if isinstance(bound_filter, RangeBoundFilter)
+    and bound_filter.field_name in BITMAP_FIELDS
+}
+
+# Parameters of the stats and facets actions that do not filter listings.
+SUMMARY_IGNORED_PARAMS = {"group_by", "metrics", "aggregates", "facets", "ordering"}
+
+
+class ListingViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows listings to be viewed.
 
@@ -183,6 +313,64 @@ class ListingViewSet(viewsets.ReadOnlyModelViewSet):
     Example:
     - GET /api/listings/?page=2&page_size=20
 
+    Keyset Pagination:
+    - Pass an empty 'cursor' parameter to page with cursors instead of page
+      numbers; follow the 'next' and 'previous' links from there
+    - No total count is returned and every page costs the same
+
+    Example:
+    - GET /api/listings/?cursor=&ordering=-price
+
+    Sparse Fieldsets:
+    - fields: Comma-separated fields to return; only these columns are queried
+    - exclude: Comma-separated fields to leave out
+    - Unknown field names are rejected with 400
+
+    Example:
+    - GET /api/listings/?fields=id,address,price,bedrooms
+
+    Export:
+    - GET /api/listings/export/ streams every matching listing, unpaginated
+    - output: 'ndjson' (default) or 'csv'
+    - Takes the same filter, search, ordering, fields and exclude parameters
+
+    Example:
+    - GET /api/listings/export/?output=csv&state=CA&ordering=-price
+
+    Statistics:
+    - GET /api/listings/stats/ aggregates the matching listings in the database
+    - group_by: Comma-separated, from state, city, zipcode, home_type, bedrooms
+    - metrics: Comma-separated price fields to aggregate (default price)
+    - aggregates: Comma-separated from min, max, avg and percentiles such as
+      p50 or p90 (default min,max,avg,p50); values are in cents
+    - Takes the same filter and search parameters as the list
+
+    Example:
+    - GET /api/listings/stats/?group_by=zipcode&aggregates=p50&state=CA
+
+    Facets:
+    - GET /api/listings/facets/ counts the matching listings per home_type,
+      bedrooms, bathrooms, state and price bucket, in a single query
+    - facets: Comma-separated subset of those to return (default all)
+    - Takes the same filter and search parameters as the list
+
+    Example:
+    - GET /api/listings/facets/?facets=home_type,price&state=CA
+
+    Statistics and facets are read from the ListingSummary table when the
+    request only filters on city, state, zipcode, home_type and bedrooms and
+    does not ask for percentiles.
+
+    Caching:
+    - List, detail, statistics and facet responses are cached until the next import; the
+      'X-Cache' header says whether a response was a cache HIT or MISS
+    - Responses carry an ETag and Last-Modified; a matching If-None-Match or
+      If-Modified-Since gets a 304 without running the query
+    - With LISTINGS_SNAPSHOT, list requests that only filter on numeric ranges and
+      bedroom or bathroom lists are filtered and ordered in memory (see api.snapshot)
+    - With LISTINGS_BITMAP_INDEX, list counts and facets of requests that only filter on
+      home_type, state, bedrooms and bathrooms come from bitmaps (see api.bitmaps)
+
     Price Filtering:
     Supports various price formats:
     - Plain numbers: price_min=500000 (500K)
@@ -207,6 +395,16 @@ class ListingViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/listings/?state=CA
     - GET /api/listings/?zipcode=94105
 
+    Location Filtering:
+    - near: 'lat,lng' point; matches listings within radius_km of it
+    - radius_km: Radius for near, in kilometres (default 10, max 500)
+    - bbox: 'min_lng,min_lat,max_lng,max_lat' box
+    - Listings are located at the centroid of their zipcode
+
+    Examples:
+    - GET /api/listings/?near=34.15,-118.45&radius_km=5
+    - GET /api/listings/?bbox=-118.6,34.1,-118.4,34.2
+
     Numeric Range Filtering:
     - home_size_min/max: Filter by home size range
     - bedrooms_min/max: Filter by number of bedrooms
@@ -224,7 +422,7 @@ class ListingViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ListingSerializer
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        ListingSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_class = ListingFilter
@@ -239,6 +437,287 @@ class ListingViewSet(viewsets.ReadOnlyModelViewSet):
         "year_built",
         "home_size",
         "property_size",
+        *DERIVED_METRICS,
     ]
     ordering = ["-created_at"]  # Default ordering
     pagination_class = CustomPageNumberPagination
+
+    @property
+    def paginator(self):
+        """Use keyset pagination when the request carries a ``cursor`` parameter."""
+        if (
+            not hasattr(self, "_paginator")
+            and KeysetPagination.cursor_query_param in self.request.query_params
+        ):
+            self._paginator = KeysetPagination()
+        return super().paginator
+
+    def use_fast_serializer(self) -> bool:
+        """Whether to serialize with ``ListingRowSerializer``.
+
+        ``?serializer=drf`` or ``?serializer=fast`` overrides the
+        ``LISTINGS_FAST_SERIALIZER`` setting, for A/B comparisons.
+        """
+        choice: Optional[str] = self.request.query_params.get("serializer")
+        if choice in ("drf", "fast"):
+            return choice == "fast"
+        return bool(settings.LISTINGS_FAST_SERIALIZER)
+
+    def get_serializer_class(self):
+        if self.use_fast_serializer():
+            return ListingRowSerializer
+        return super().get_serializer_class()
+
+    def get_requested_fields(self) -> List[str]:
+        """Serializer fields selected by the ``fields`` and ``exclude`` parameters.
+
+        Raises:
+            ValidationError: If either parameter names an unknown field.
+        """
+        if not hasattr(self, "_requested_fields"):
+            available = ListingSerializer.Meta.fields
+            selected = set(available)
+            errors = {}
+            for param in ("fields", "exclude"):
+                value = self.request.query_params.get(param, "")
+                names = {name.strip() for name in value.split(",") if name.strip()}
+                unknown = (
+                    names - selected if param == "fields" else names - set(available)
+                )
+                if unknown:
+                    errors[param] = [f"Unknown field(s): {', '.join(sorted(unknown))}."]
+                elif names:
+                    selected = (
+                        selected & names if param == "fields" else selected - names
+                    )
+            if not selected and not errors:
+                errors["fields"] = ["No fields selected."]
+            if errors:
+                raise ValidationError(errors)
+            self._requested_fields = [name for name in available if name in selected]
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if len(fields) < len(ListingSerializer.Meta.fields):
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_columns(self, queryset: QuerySet) -> List[str]:
+        """Columns to fetch: the requested fields first, then the ordering
+        fields and primary key that pagination reads."""
+        columns = [
+            DISPLAY_FIELDS.get(name, name) for name in self.get_requested_fields()
+        ]
+        for field in queryset.query.order_by:
+            if isinstance(field, str) and field.lstrip("-") not in columns:
+                columns.append(field.lstrip("-"))
+        if "id" not in columns:
+            columns.append("id")
+        return columns
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            queryset = queryset.only(*self.get_columns(queryset))
+        return queryset
+
+    def get_snapshot_ids(self, queryset):
+        """Ids of the filtered, ordered listings read from the listing
+        snapshot, or None when the request needs the database."""
+        params = self.request.query_params
+        if not settings.LISTINGS_SNAPSHOT or isinstance(
+            self.paginator, KeysetPagination
+        ):
+            return None
+        if any(value and name not in SNAPSHOT_PARAMS for name, value in params.items()):
+            return None
+        ordering = queryset.query.order_by
+        if (
+            len(ordering) != 1
+            or ordering[0].lstrip("-") not in SNAPSHOT_FIELDS + ORDER_ONLY_FIELDS
+        ):
+            return None
+        filterset = self.filterset_class(params, queryset=queryset)
+        if not filterset.is_valid():
+            return None
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return None
+        return snapshot_ids(snapshot, filterset, ordering[0])
+
+    def get_filter_bitmap(
+        self, ignored: Iterable[str]
+    ) -> Optional[Tuple[BitmapIndex, int]]:
+        """The bitmap index and the bitmap of the matching listings, or None
+        when the request filters on anything but the ``BITMAP_PARAMS``.
+
+        ``ignored`` are the parameters that do not filter listings.
+        """
+        params = self.request.query_params
+        if not settings.LISTINGS_BITMAP_INDEX:
+            return None
+        names = {name for name, value in params.items() if value} - set(ignored)
+        if not names <= BITMAP_PARAMS:
+            return None
+        filterset = ListingFilter(params, queryset=Listing.objects.none())
+        if not filterset.is_valid():
+            return None
+        index = get_bitmap_index()
+        if index is None:
+            return None
+        conditions = filter_conditions(filterset)
+        return index, 0 if conditions is None else index.select(conditions)
+
+    def paginate_queryset(self, queryset):
+        columns = self.get_columns(queryset)
+        ids = self.get_snapshot_ids(queryset)
+        if ids is not None:
+            # Filtered and ordered in memory; only the page's rows are read.
+            queryset = self.get_queryset()
+        elif not isinstance(self.paginator, KeysetPagination):
+            # Categorical filters are counted from the bitmap index.
+            bitmap = self.get_filter_bitmap(PAGING_PARAMS | {"ordering"})
+            if bitmap is not None:
+                remember_count(queryset, bitmap[0].count(bitmap[1]))
+        if self.use_fast_serializer():
+            # Fetch plain rows instead of building model instances.
+            queryset = queryset.values_list(*columns, named=True)
+        elif len(columns) < len(ListingSerializer.Meta.fields):
+            queryset = queryset.only(*columns)
+        if ids is not None:
+            queryset = SnapshotRows(ids, queryset)
+        return super().paginate_queryset(queryset)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        """Stream all matching listings as NDJSON or CSV."""
+        output = request.query_params.get("output") or "ndjson"
+        if output not in EXPORT_FORMATS:
+            choices = ", ".join(EXPORT_FORMATS)
+            raise ValidationError({"output": [f"Must be one of: {choices}."]})
+        queryset = self.filter_queryset(self.get_queryset())
+        content_type, extension, _ = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            export_listings(
+                queryset,
+                self.get_requested_fields(),
+                output,
+                settings.LISTINGS_EXPORT_CHUNK_SIZE,
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="listings.{extension}"'
+        return response
+
+    def get_stats_params(self) -> Dict[str, List[str]]:
+        """The ``group_by``, ``metrics`` and ``aggregates`` stats parameters.
+
+        Metrics and aggregates come back in a fixed order, so equivalent
+        requests produce the same response.
+
+        Raises:
+            ValidationError: If a parameter names an unknown value.
+        """
+        params = self.request.query_params
+        errors = {}
+        selected = {}
+        options: List[Tuple[str, Optional[List[str]], List[str]]] = [
+            ("group_by", GROUP_BY_FIELDS, []),
+            ("metrics", METRIC_FIELDS, DEFAULT_METRICS),
+            ("aggregates", None, DEFAULT_AGGREGATES),
+        ]
+        for param, allowed, default in options:
+            value = params.get(param, "")
+            names = [name.strip() for name in value.split(",") if name.strip()]
+            names = list(dict.fromkeys(names)) or default
+            if allowed is None:
+                unknown = [
+                    name
+                    for name in names
+                    if name not in AGGREGATES and parse_percentile(name) is None
+                ]
+            else:
+                unknown = [name for name in names if name not in allowed]
+            if unknown:
+                errors[param] = [f"Unknown value(s): {', '.join(unknown)}."]
+            selected[param] = names
+        if errors:
+            raise ValidationError(errors)
+        selected["metrics"].sort(key=METRIC_FIELDS.index)
+        selected["aggregates"].sort(
+            key=lambda name: (
+                (0, list(AGGREGATES).index(name), 0)
+                if name in AGGREGATES
+                else (1, 0, parse_percentile(name))
+            )
+        )
+        return selected
+
+    def get_summary_queryset(self) -> Optional[QuerySet]:
+        """``ListingSummary`` rows for the request's filters.
+
+        None when a parameter filters on something the summary table does not
+        hold, such as ``search``, ``address`` or a price range.
+        """
+        params = {
+            name for name, value in self.request.query_params.items() if value
+        } - SUMMARY_IGNORED_PARAMS
+        if not params <= set(ListingSummaryFilter.base_filters):
+            return None
+        filterset = ListingSummaryFilter(
+            self.request.query_params, queryset=ListingSummary.objects.all()
+        )
+        if not filterset.is_valid():
+            return None
+        summaries: QuerySet = filterset.qs
+        return summaries
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request, *args, **kwargs):
+        """Counts and aggregates of the matching listings, per group."""
+        return self.cached_response(self.compute_stats, request, *args, **kwargs)
+
+    def compute_stats(self, request, *args, **kwargs):
+        params = self.get_stats_params()
+        selection = params["group_by"], params["metrics"], params["aggregates"]
+        summaries = self.get_summary_queryset()
+        if (
+            summaries is not None
+            and set(params["metrics"]) <= set(SUMMARY_METRICS)
+            and set(params["aggregates"]) <= set(SUMMARY_AGGREGATES)
+        ):
+            results = summary_stats(summaries, *selection)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            results = listing_stats(queryset, *selection)
+        return Response({"group_by": params["group_by"], "results": results})
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request, *args, **kwargs):
+        """Counts of the matching listings per value of each facet."""
+        return self.cached_response(self.compute_facets, request, *args, **kwargs)
+
+    def compute_facets(self, request, *args, **kwargs):
+        value = request.query_params.get("facets", "")
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = names - set(FACETS)
+        if unknown:
+            raise ValidationError(
+                {"facets": [f"Unknown facet(s): {', '.join(sorted(unknown))}."]}
+            )
+        facets = [name for name in FACETS if name in names] if names else FACETS
+        bitmap = self.get_filter_bitmap(SUMMARY_IGNORED_PARAMS)
+        if bitmap is not None:
+            index, selected = bitmap
+            return Response(index.facets(selected, facets))
+        counts = {}
+        summaries = self.get_summary_queryset()
+        if summaries is not None:
+            summary_facets = [name for name in facets if name in SUMMARY_FIELDS]
+            counts.update(facet_counts(summaries, summary_facets, Sum("count")))
+        remaining = [name for name in facets if name not in counts]
+        if remaining:
+            queryset = self.filter_queryset(self.get_queryset())
+            counts.update(facet_counts(queryset, remaining))
+        return Response({name: counts[name] for name in facets})
@@ -43,11 +43,12 @@ INSTALLED_APPS = [
     "rest_framework",
     "django_filters",
     "api",
-    'corsheaders',
+    "corsheaders",
 ]
 
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
+    "api.instrumentation.RequestMetricsMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -157,8 +158,100 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        # Uses orjson when it is installed, the stdlib json module otherwise.
+        "api.renderers.FastJSONRenderer",
     ],
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Local memory by default, which is single-process: every web worker keeps
+# its own entries. Entries are keyed by the import generation stored in the
+# database, so imports invalidate them in every worker either way; point
+# CACHE_BACKEND/CACHE_LOCATION at a shared backend (e.g. memcached) to share
+# entries between workers.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "listings"),
+    }
+}
+
+# Cache used for listing counts and responses (see api/cache.py).
+LISTINGS_CACHE_ALIAS = "default"
+
+# Exact listing counts are cached for this many seconds per filter set.
+LISTING_COUNT_CACHE_TIMEOUT = 300
+
+# On PostgreSQL, report the planner's estimate instead of an exact count when
+# it is at least this large.
+LISTING_COUNT_ESTIMATE_THRESHOLD = 100_000
+
+# Rendered list and detail responses are cached for this many seconds, or
+# until the next import.
+LISTINGS_RESPONSE_CACHE_TIMEOUT = 300
+
+# Cache-Control max-age for list and detail responses in browsers, and
+# s-maxage in shared caches (CDNs, reverse proxies). Browsers revalidate with
+# the ETag, which is answered with a 304 until the next import; shared caches
+# may serve a response for up to LISTINGS_HTTP_SHARED_MAX_AGE after an import.
+LISTINGS_HTTP_MAX_AGE = int(os.environ.get("LISTINGS_HTTP_MAX_AGE", 0))
+LISTINGS_HTTP_SHARED_MAX_AGE = int(os.environ.get("LISTINGS_HTTP_SHARED_MAX_AGE", 60))
+
+# Serialize listings from plain rows with ListingRowSerializer instead of
+# ListingSerializer; same output, a fraction of the per-row cost.
+LISTINGS_FAST_SERIALIZER = True
+
+# Answer list requests that only filter on numeric ranges and bedroom or
+# bathroom lists from an in-process columnar snapshot of the listings (see
+# api.snapshot). Costs about 150 bytes per listing in every worker.
+LISTINGS_SNAPSHOT = os.environ.get("LISTINGS_SNAPSHOT", "") == "1"
+
+# Count list requests and compute facets that only filter on home_type, state,
+# bedrooms and bathrooms from in-process bitmaps (see api.bitmaps). Costs
+# about 100 bits per listing in every worker.
+LISTINGS_BITMAP_INDEX = os.environ.get("LISTINGS_BITMAP_INDEX", "") == "1"
+
+# Zipcode centroid table used to locate listings (see api.geo); the bundled
+# api/data/zipcode_centroids.csv when empty. Build a complete table with
+# manage.py load_zipcode_centroids.
+LISTINGS_ZIPCODE_CENTROIDS = os.environ.get("LISTINGS_ZIPCODE_CENTROIDS", "")
+
+# Rows fetched and encoded per chunk by the streaming /api/listings/export/.
+LISTINGS_EXPORT_CHUNK_SIZE = 2000
+
+# Requests whose path starts with this prefix are measured by
+# api.instrumentation.RequestMetricsMiddleware: query count, DB, serialize and
+# render time are returned in a Server-Timing header and logged.
+LISTINGS_METRICS_PATH_PREFIX = "/api/"
+
+# Requests taking at least this many milliseconds are logged on
+# api.metrics.slow, with the query plan of their slowest query when
+# LISTINGS_SLOW_REQUEST_EXPLAIN is set.
+LISTINGS_SLOW_REQUEST_MS = int(os.environ.get("LISTINGS_SLOW_REQUEST_MS", 500))
+LISTINGS_SLOW_REQUEST_EXPLAIN = os.environ.get("LISTINGS_SLOW_REQUEST_EXPLAIN") == "1"
+
+# Metrics are logged as logfmt lines. Set LISTINGS_METRICS_LOG_LEVEL=INFO to log
+# every request, not just slow ones.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "logfmt": {
+            "format": "time=%(asctime)s level=%(levelname)s logger=%(name)s %(message)s",
+            "datefmt": "%Y-%m-%dT%H:%M:%S%z",
+        },
+    },
+    "handlers": {
+        "metrics": {"class": "logging.StreamHandler", "formatter": "logfmt"},
+    },
+    "loggers": {
+        "api.metrics": {
+            "handlers": ["metrics"],
+            "level": os.environ.get("LISTINGS_METRICS_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
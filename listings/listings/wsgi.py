@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "listings.settings")
 
 application = get_wsgi_application()
+
+from api.bitmaps import warm_bitmap_index  # noqa: E402  (needs configured settings)
+from api.snapshot import warm_snapshot  # noqa: E402
+
+warm_bitmap_index()
+warm_snapshot()